@@ -1,11 +1,14 @@
 from fastapi import FastAPI, Request, Depends, HTTPException, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from datetime import datetime, timedelta, timezone
 import asyncio
 from typing import Optional, List
 from admin.database import AdminDatabase
+from database import queries
+from database.models import ScheduledPush, User, WishlistItem
+from database.migrations import migrate
 from admin.auth import verify_password, get_password_hash, create_access_token, verify_token
 from admin.config import AdminConfig
 import httpx
@@ -16,6 +19,19 @@ MOSCOW_TZ = timezone(timedelta(hours=3))
 app = FastAPI(title="Wedding Bot Admin Panel")
 templates = Jinja2Templates(directory="admin/templates")
 
+
+def moscow_time(value: Optional[datetime]) -> str:
+    """Время из БД (UTC) в московском для шаблонов: {{ push.sent_at|moscow_time }}"""
+    if not value:
+        return ""
+    if value.tzinfo is None:
+        # Если время без timezone, считаем его UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(MOSCOW_TZ).strftime("%Y-%m-%d %H:%M:%S")
+
+
+templates.env.filters["moscow_time"] = moscow_time
+
 # Инициализация БД при старте
 @app.on_event("startup")
 async def startup():
@@ -28,136 +44,8 @@ async def startup():
 
 
 async def init_admin_db():
-    """Инициализация таблиц базы данных для админки"""
-    # Создаем таблицы, которые могут отсутствовать
-    await AdminDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS admin_users (
-            id SERIAL PRIMARY KEY,
-            username VARCHAR(100) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    await AdminDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS scheduled_pushes (
-            id SERIAL PRIMARY KEY,
-            message TEXT NOT NULL,
-            send_to_all BOOLEAN DEFAULT TRUE,
-            target_user_ids BIGINT[],
-            scheduled_at TIMESTAMP,
-            sent_at TIMESTAMP,
-            is_sent BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Миграции для улучшенной логики пушей
-    await AdminDatabase.execute(
-        "ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'pending'"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS locked_at TIMESTAMP"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS attempts INT DEFAULT 0"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS last_error TEXT"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS total_targets INT DEFAULT 0"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS success_count INT DEFAULT 0"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS fail_count INT DEFAULT 0"
-    )
-    
-    # Обновляем существующие записи
-    await AdminDatabase.execute("""
-        UPDATE scheduled_pushes 
-        SET status = CASE 
-            WHEN is_sent = TRUE THEN 'sent'
-            ELSE 'pending'
-        END
-        WHERE status IS NULL OR status = ''
-    """)
-    
-    # Таблица логов доставки пушей
-    await AdminDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS push_delivery_logs (
-            id SERIAL PRIMARY KEY,
-            push_id INT NOT NULL REFERENCES scheduled_pushes(id) ON DELETE CASCADE,
-            user_id BIGINT NOT NULL,
-            status TEXT NOT NULL,
-            error TEXT,
-            duration_ms INT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Индексы для производительности
-    await AdminDatabase.execute("""
-        CREATE INDEX IF NOT EXISTS idx_push_pending
-        ON scheduled_pushes(status, scheduled_at)
-    """)
-    await AdminDatabase.execute("""
-        CREATE INDEX IF NOT EXISTS idx_push_logs_push
-        ON push_delivery_logs(push_id)
-    """)
-    
-    # Также создаем остальные таблицы, если их нет (для совместимости)
-    await AdminDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            user_id BIGINT PRIMARY KEY,
-            username VARCHAR(255),
-            first_name VARCHAR(255),
-            last_name VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    await AdminDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS wishlist_items (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(500) NOT NULL,
-            description TEXT,
-            link VARCHAR(1000),
-            link2 VARCHAR(1000),
-            price_hint VARCHAR(255),
-            order_index INTEGER DEFAULT 0,
-            is_taken BOOLEAN DEFAULT FALSE,
-            taken_by_user_id BIGINT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (taken_by_user_id) REFERENCES users(user_id) ON DELETE SET NULL
-        )
-    """)
-    # Обновляем существующую таблицу при необходимости
-    await AdminDatabase.execute(
-        "ALTER TABLE wishlist_items ADD COLUMN IF NOT EXISTS price_hint VARCHAR(255)"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE wishlist_items ADD COLUMN IF NOT EXISTS order_index INTEGER DEFAULT 0"
-    )
-    await AdminDatabase.execute(
-        "ALTER TABLE wishlist_items ADD COLUMN IF NOT EXISTS link2 VARCHAR(1000)"
-    )
-    
-    await AdminDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS wedding_info (
-            id SERIAL PRIMARY KEY,
-            section VARCHAR(100) NOT NULL,
-            title VARCHAR(255) NOT NULL,
-            content TEXT NOT NULL,
-            order_index INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    """Инициализация таблиц базы данных для админки (общие миграции с ботом)"""
+    await migrate(AdminDatabase._pool)
 
 
 @app.on_event("shutdown")
@@ -168,13 +56,13 @@ async def shutdown():
 async def create_default_admin():
     """Создание админа по умолчанию"""
     existing = await AdminDatabase.fetchrow(
-        "SELECT id FROM admin_users WHERE username = $1",
+        queries.ADMIN_BY_USERNAME,
         AdminConfig.ADMIN_USERNAME
     )
     if not existing:
         password_hash = get_password_hash(AdminConfig.ADMIN_PASSWORD)
         await AdminDatabase.execute(
-            "INSERT INTO admin_users (username, password_hash) VALUES ($1, $2)",
+            queries.ADMIN_INSERT,
             AdminConfig.ADMIN_USERNAME,
             password_hash
         )
@@ -190,7 +78,7 @@ async def index(request: Request):
 @app.post("/login")
 async def login(request: Request, username: str = Form(...), password: str = Form(...)):
     user = await AdminDatabase.fetchrow(
-        "SELECT * FROM admin_users WHERE username = $1",
+        queries.ADMIN_BY_USERNAME,
         username
     )
     
@@ -221,11 +109,10 @@ async def dashboard(request: Request):
         return RedirectResponse(url="/", status_code=303)
     
     # Статистика
-    users_count = await AdminDatabase.fetchval("SELECT COUNT(*) FROM users")
-    wishlist_count = await AdminDatabase.fetchval("SELECT COUNT(*) FROM wishlist_items")
-    pending_pushes = await AdminDatabase.fetchval(
-        "SELECT COUNT(*) FROM scheduled_pushes WHERE is_sent = FALSE"
-    )
+    users_count = await AdminDatabase.fetchval(queries.USERS_COUNT)
+    wishlist_count = await AdminDatabase.fetchval(queries.WISHLIST_COUNT)
+    pending_pushes = await AdminDatabase.fetchval(queries.PUSHES_PENDING_COUNT)
+    active_users = await AdminDatabase.fetchval(queries.USERS_ACTIVE_24H)
     
     return templates.TemplateResponse(
         "dashboard.html",
@@ -234,7 +121,8 @@ async def dashboard(request: Request):
             "username": username,
             "users_count": users_count,
             "wishlist_count": wishlist_count,
-            "pending_pushes": pending_pushes
+            "pending_pushes": pending_pushes,
+            "active_users": active_users
         }
     )
 
@@ -247,6 +135,22 @@ async def logout():
     return response
 
 
+# Статистика SQL-запросов админки (p50/p99 по нормализованному тексту, ожидание пула)
+@app.get("/query-stats")
+async def query_stats(request: Request, limit: int = 50):
+    token = request.cookies.get("access_token")
+    if not token:
+        return RedirectResponse(url="/", status_code=303)
+    
+    try:
+        from jose import jwt
+        jwt.decode(token, AdminConfig.SECRET_KEY, algorithms=["HS256"])
+    except:
+        return RedirectResponse(url="/", status_code=303)
+    
+    return JSONResponse(AdminDatabase.stats.report(limit=limit))
+
+
 # ========== ВИШ-ЛИСТ ==========
 
 @app.get("/wishlist", response_class=HTMLResponse)
@@ -255,12 +159,10 @@ async def wishlist_page(request: Request):
     if not token:
         return RedirectResponse(url="/", status_code=303)
     
-    items = await AdminDatabase.fetch(
-        "SELECT * FROM wishlist_items ORDER BY is_taken, order_index, created_at"
-    )
+    items = await AdminDatabase.fetch(queries.WISHLIST_ADMIN_LIST)
     return templates.TemplateResponse(
         "wishlist.html",
-        {"request": request, "items": [dict(item) for item in items]}
+        {"request": request, "items": [WishlistItem.from_record(item) for item in items]}
     )
 
 
@@ -280,14 +182,11 @@ async def wishlist_add(
     
     # Определяем order_index, если он не задан явно
     if not order_index:
-        max_order = await AdminDatabase.fetchval(
-            "SELECT COALESCE(MAX(order_index), 0) FROM wishlist_items"
-        )
+        max_order = await AdminDatabase.fetchval(queries.WISHLIST_MAX_ORDER)
         order_index = max_order + 1
     
     await AdminDatabase.execute(
-        "INSERT INTO wishlist_items (name, description, link, link2, price_hint, order_index) "
-        "VALUES ($1, $2, $3, $4, $5, $6)",
+        queries.WISHLIST_INSERT,
         name, description, link, link2, price_hint, order_index
     )
     return RedirectResponse(url="/wishlist", status_code=303)
@@ -299,7 +198,7 @@ async def wishlist_delete(request: Request, item_id: int):
     if not token:
         return RedirectResponse(url="/", status_code=303)
     
-    await AdminDatabase.execute("DELETE FROM wishlist_items WHERE id = $1", item_id)
+    await AdminDatabase.execute(queries.WISHLIST_DELETE, item_id)
     return RedirectResponse(url="/wishlist", status_code=303)
 
 
@@ -319,17 +218,7 @@ async def wishlist_edit(
         return RedirectResponse(url="/", status_code=303)
     
     await AdminDatabase.execute(
-        """
-        UPDATE wishlist_items
-        SET name = $1,
-            description = $2,
-            link = $3,
-            link2 = $4,
-            price_hint = $5,
-            order_index = $6,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE id = $7
-        """,
+        queries.WISHLIST_UPDATE,
         name, description, link, link2, price_hint, order_index, item_id
     )
     return RedirectResponse(url="/wishlist", status_code=303)
@@ -343,40 +232,16 @@ async def pushes_page(request: Request):
     if not token:
         return RedirectResponse(url="/", status_code=303)
     
-    pushes = await AdminDatabase.fetch(
-        "SELECT * FROM scheduled_pushes ORDER BY created_at DESC LIMIT 50"
-    )
-    users = await AdminDatabase.fetch("SELECT user_id, first_name, username FROM users")
-    
-    # Конвертируем время из UTC в московское для отображения
-    pushes_list = []
-    for push in pushes:
-        push_dict = dict(push)
-        # Конвертируем scheduled_at из UTC в московское время
-        if push_dict.get("scheduled_at"):
-            if isinstance(push_dict["scheduled_at"], datetime):
-                if push_dict["scheduled_at"].tzinfo is None:
-                    # Если время без timezone, считаем его UTC
-                    utc_time = push_dict["scheduled_at"].replace(tzinfo=timezone.utc)
-                else:
-                    utc_time = push_dict["scheduled_at"].astimezone(timezone.utc)
-                push_dict["scheduled_at"] = utc_time.astimezone(MOSCOW_TZ).strftime("%Y-%m-%d %H:%M:%S")
-        # Конвертируем sent_at из UTC в московское время
-        if push_dict.get("sent_at"):
-            if isinstance(push_dict["sent_at"], datetime):
-                if push_dict["sent_at"].tzinfo is None:
-                    utc_time = push_dict["sent_at"].replace(tzinfo=timezone.utc)
-                else:
-                    utc_time = push_dict["sent_at"].astimezone(timezone.utc)
-                push_dict["sent_at"] = utc_time.astimezone(MOSCOW_TZ).strftime("%Y-%m-%d %H:%M:%S")
-        pushes_list.append(push_dict)
+    pushes = await AdminDatabase.fetch(queries.PUSHES_RECENT)
+    users = await AdminDatabase.fetch(queries.USERS_FOR_PUSHES)
     
+    # Время переводится в московское в шаблоне (фильтр moscow_time)
     return templates.TemplateResponse(
         "pushes.html",
         {
             "request": request,
-            "pushes": pushes_list,
-            "users": [dict(u) for u in users]
+            "pushes": [ScheduledPush.from_record(push) for push in pushes],
+            "users": [User.from_record(u) for u in users]
         }
     )
 
@@ -429,8 +294,7 @@ async def push_send(
     # Всегда создаём запись в БД со статусом 'pending'
     # Scheduler заберёт и отправит (единый путь для всех пушей)
     await AdminDatabase.execute(
-        """INSERT INTO scheduled_pushes (message, send_to_all, target_user_ids, scheduled_at, status)
-           VALUES ($1, $2, $3, COALESCE($4, CURRENT_TIMESTAMP), 'pending')""",
+        queries.PUSHES_INSERT,
         message, send_to_all, user_ids_array, scheduled_time
     )
     
@@ -445,7 +309,7 @@ async def push_delete(request: Request, push_id: int):
         return RedirectResponse(url="/", status_code=303)
     
     # Удаляем пуш (логи удалятся каскадно благодаря ON DELETE CASCADE)
-    await AdminDatabase.execute("DELETE FROM scheduled_pushes WHERE id = $1", push_id)
+    await AdminDatabase.execute(queries.PUSHES_DELETE, push_id)
     
     return RedirectResponse(url="/pushes", status_code=303)
 
@@ -456,6 +320,8 @@ if __name__ == "__main__":
     
     # Настройка логирования - только ошибки
     logging.basicConfig(level=logging.ERROR)
+    # Медленные запросы (дольше SLOW_QUERY_MS) с параметрами пишутся, несмотря на уровень ERROR
+    logging.getLogger("utils.query_stats").setLevel(logging.WARNING)
     logging.getLogger("uvicorn").setLevel(logging.CRITICAL)
     logging.getLogger("uvicorn.access").setLevel(logging.CRITICAL)
     logging.getLogger("fastapi").setLevel(logging.CRITICAL)
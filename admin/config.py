@@ -9,11 +9,25 @@ class AdminConfig:
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # Пул подключений, режим пулера и реплика — те же переменные, что у бота (см. config.py)
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOLER_MODE: str = os.getenv("DB_POOLER_MODE", "session").lower()
+    DB_POOLER_PREPARED_STATEMENTS: bool = os.getenv("DB_POOLER_PREPARED_STATEMENTS", "False").lower() == "true"
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+    DB_REPLICA_CHECK_INTERVAL: float = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+    DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))
     
     # Admin Panel
     ADMIN_USERNAME: str = os.getenv("ADMIN_USERNAME", "admin")
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
+    ADMIN_PORT: int = int(os.getenv("ADMIN_PORT", "8000"))
+    
+    # Запросы к БД дольше порога логируются с параметрами; если задан файл — туда пишется их EXPLAIN
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_EXPLAIN_FILE: str = os.getenv("SLOW_QUERY_EXPLAIN_FILE", "")
     
     # Telegram Bot (для отправки пушей)
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
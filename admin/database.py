@@ -1,52 +1,31 @@
-import asyncpg
-from typing import Optional
 from admin.config import AdminConfig
+from database import queries
+from database.repository import Repository
+from utils.query_stats import QueryStats
 
 
-class AdminDatabase:
-    """Класс для работы с базой данных в админке"""
+class AdminDatabase(Repository):
+    """Класс для работы с базой данных в админке и scheduler'е"""
     
-    _pool: Optional[asyncpg.Pool] = None
-    
-    @classmethod
-    async def create_pool(cls) -> None:
-        """Создание пула подключений к БД"""
-        if cls._pool is None:
-            cls._pool = await asyncpg.create_pool(
-                AdminConfig.DATABASE_URL,
-                min_size=1,
-                max_size=10,
-                command_timeout=60
-            )
-    
-    @classmethod
-    async def close_pool(cls) -> None:
-        """Закрытие пула подключений"""
-        if cls._pool:
-            await cls._pool.close()
-            cls._pool = None
-    
-    @classmethod
-    async def execute(cls, query: str, *args) -> str:
-        """Выполнение запроса без возврата результата"""
-        async with cls._pool.acquire() as connection:
-            return await connection.execute(query, *args)
-    
-    @classmethod
-    async def fetch(cls, query: str, *args) -> list:
-        """Выполнение запроса с возвратом списка строк"""
-        async with cls._pool.acquire() as connection:
-            return await connection.fetch(query, *args)
-    
-    @classmethod
-    async def fetchrow(cls, query: str, *args) -> Optional[dict]:
-        """Выполнение запроса с возвратом одной строки"""
-        async with cls._pool.acquire() as connection:
-            row = await connection.fetchrow(query, *args)
-            return dict(row) if row else None
-    
-    @classmethod
-    async def fetchval(cls, query: str, *args) -> Optional[any]:
-        """Выполнение запроса с возвратом одного значения"""
-        async with cls._pool.acquire() as connection:
-            return await connection.fetchval(query, *args)
+    _pool = None
+    dsn = AdminConfig.DATABASE_URL
+    min_size = AdminConfig.DB_POOL_MIN_SIZE
+    max_size = AdminConfig.DB_POOL_MAX_SIZE
+    pooler_mode = AdminConfig.DB_POOLER_MODE
+    pooler_prepared_statements = AdminConfig.DB_POOLER_PREPARED_STATEMENTS
+    replica_dsn = AdminConfig.DATABASE_REPLICA_URL
+    replica_max_lag = AdminConfig.DB_REPLICA_MAX_LAG_SECONDS
+    replica_check_interval = AdminConfig.DB_REPLICA_CHECK_INTERVAL
+    read_your_writes_window = AdminConfig.DB_READ_YOUR_WRITES_SECONDS
+    # Время запросов по имени запроса (сводка на /query-stats)
+    stats = QueryStats(
+        "admin_db_query_duration_seconds",
+        slow_query_ms=AdminConfig.SLOW_QUERY_MS,
+        explain_file=AdminConfig.SLOW_QUERY_EXPLAIN_FILE,
+    )
+    # Цикл scheduler'а: опрос очереди и журнал доставки (строка на каждого получателя)
+    warm_queries = (
+        queries.PUSHES_CLAIM_NEXT,
+        queries.DELIVERY_LOG_SENT,
+        queries.DELIVERY_LOG_FAILED,
+    )
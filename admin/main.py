@@ -7,6 +7,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import uvicorn
 from admin.app import app
+from admin.config import AdminConfig
 
 # Настройка логирования - только ошибки
 logging.basicConfig(
@@ -14,6 +15,9 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(name)s - %(message)s"
 )
 
+# Медленные запросы (дольше SLOW_QUERY_MS) с параметрами пишутся, несмотря на уровень ERROR
+logging.getLogger("utils.query_stats").setLevel(logging.WARNING)
+
 # Отключаем лишние логи
 logging.getLogger("uvicorn").setLevel(logging.CRITICAL)
 logging.getLogger("uvicorn.access").setLevel(logging.CRITICAL)
@@ -23,6 +27,6 @@ if __name__ == "__main__":
     uvicorn.run(
         app, 
         host="0.0.0.0", 
-        port=8000,
+        port=AdminConfig.ADMIN_PORT,
         log_level="error"  # Только ошибки
     )
@@ -16,7 +16,11 @@ import httpx
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from admin.database import AdminDatabase
+from database import queries
+from database.migrations import migrate
+from database.models import ScheduledPush
 from admin.config import AdminConfig
+from utils import json_codec
 from utils.telegram_logger import send_to_logs_group, init_telegram_logger, close_telegram_logger
 
 logger = logging.getLogger("push_scheduler")
@@ -24,6 +28,8 @@ logging.basicConfig(
     level=logging.ERROR,  # Только ошибки
     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 )
+# Медленные запросы (дольше SLOW_QUERY_MS) с параметрами пишутся, несмотря на уровень ERROR
+logging.getLogger("utils.query_stats").setLevel(logging.WARNING)
 
 
 POLL_INTERVAL_SEC = 5
@@ -31,38 +37,19 @@ CONCURRENCY = 15
 HTTP_TIMEOUT = 10.0
 
 
-async def claim_next_push() -> Optional[dict]:
+async def claim_next_push() -> Optional[ScheduledPush]:
     """
     Атомарно забираем 1 задачу в processing.
     Важно: работает корректно только если scheduler один (или много, но с SKIP LOCKED).
     """
-    row = await AdminDatabase.fetchrow(
-        """
-        WITH next AS (
-            SELECT id
-            FROM scheduled_pushes
-            WHERE status = 'pending'
-              AND (scheduled_at IS NULL OR scheduled_at <= CURRENT_TIMESTAMP)
-            ORDER BY scheduled_at NULLS FIRST, created_at ASC
-            FOR UPDATE SKIP LOCKED
-            LIMIT 1
-        )
-        UPDATE scheduled_pushes sp
-        SET status = 'processing',
-            locked_at = CURRENT_TIMESTAMP,
-            attempts = attempts + 1
-        FROM next
-        WHERE sp.id = next.id
-        RETURNING sp.*;
-        """
-    )
-    return dict(row) if row else None
+    row = await AdminDatabase.fetchrow(queries.PUSHES_CLAIM_NEXT)
+    return ScheduledPush.from_record(row) if row else None
 
 
 async def get_recipients(send_to_all: bool, target_user_ids) -> List[int]:
     """Получает список получателей для пуша"""
     if send_to_all:
-        users = await AdminDatabase.fetch("SELECT user_id FROM users")
+        users = await AdminDatabase.fetch(queries.USERS_ALL_IDS)
         return [int(u["user_id"]) for u in users]
 
     if not target_user_ids:
@@ -73,15 +60,24 @@ async def get_recipients(send_to_all: bool, target_user_ids) -> List[int]:
     return [int(target_user_ids)]
 
 
-async def send_one(client: httpx.AsyncClient, user_id: int, message: str) -> Tuple[bool, Optional[str], int]:
+def message_body_tail(message: str) -> bytes:
+    """
+    Тело sendMessage без chat_id: у всех получателей рассылки оно одно и то же,
+    поэтому сериализуется один раз на пуш, а не на каждого получателя
     """
-    Отправляет 1 сообщение. Возвращает: ok, error_text, duration_ms
+    return b"," + json_codec.dumps_bytes({"text": message, "parse_mode": "HTML"})[1:]
+
+
+async def send_one(client: httpx.AsyncClient, user_id: int, body_tail: bytes) -> Tuple[bool, Optional[str], int]:
+    """
+    Отправляет 1 сообщение (body_tail — из message_body_tail). Возвращает: ok, error_text, duration_ms
     """
     start = time.perf_counter()
     try:
         resp = await client.post(
             f"https://api.telegram.org/bot{AdminConfig.BOT_TOKEN}/sendMessage",
-            json={"chat_id": user_id, "text": message, "parse_mode": "HTML"},
+            content=b'{"chat_id":%d' % user_id + body_tail,
+            headers=json_codec.JSON_HEADERS,
             timeout=HTTP_TIMEOUT
         )
         duration_ms = int((time.perf_counter() - start) * 1000)
@@ -89,7 +85,7 @@ async def send_one(client: httpx.AsyncClient, user_id: int, message: str) -> Tup
         if resp.status_code != 200:
             return False, f"HTTP {resp.status_code}: {resp.text[:500]}", duration_ms
 
-        data = resp.json()
+        data = json_codec.loads(resp.content)
         if not data.get("ok"):
             return False, f"TG not ok: {str(data)[:500]}", duration_ms
 
@@ -99,42 +95,29 @@ async def send_one(client: httpx.AsyncClient, user_id: int, message: str) -> Tup
         return False, str(e)[:500], duration_ms
 
 
-async def process_push(push: dict) -> None:
+async def process_push(push: ScheduledPush) -> None:
     """Обрабатывает один пуш: получает получателей, отправляет параллельно, логирует результаты"""
-    push_id = push["id"]
-    message = push["message"]
-    send_to_all = push["send_to_all"]
-    target_user_ids = push.get("target_user_ids")
+    push_id = push.id
+    message = push.message
+    send_to_all = push.send_to_all
+    target_user_ids = push.target_user_ids
 
     recipients = await get_recipients(send_to_all, target_user_ids)
     total = len(recipients)
 
-    await AdminDatabase.execute(
-        "UPDATE scheduled_pushes SET total_targets = $1 WHERE id = $2",
-        total, push_id
-    )
+    await AdminDatabase.execute(queries.PUSHES_SET_TOTAL, total, push_id)
 
     if total == 0:
-        await AdminDatabase.execute(
-            """
-            UPDATE scheduled_pushes
-            SET status = 'failed',
-                last_error = 'No recipients',
-                sent_at = CURRENT_TIMESTAMP,
-                success_count = 0,
-                fail_count = 0
-            WHERE id = $1
-            """,
-            push_id
-        )
+        await AdminDatabase.execute(queries.PUSHES_NO_RECIPIENTS, push_id)
         logger.warning(f"Push {push_id}: no recipients")
         return
 
     sem = asyncio.Semaphore(CONCURRENCY)
+    body_tail = message_body_tail(message)
 
     async def guarded_send(uid: int):
         async with sem:
-            return uid, await send_one(client, uid, message)
+            return uid, await send_one(client, uid, body_tail)
 
     success = 0
     fail = 0
@@ -145,37 +128,16 @@ async def process_push(push: dict) -> None:
             uid, (ok, err, duration_ms) = await task
             if ok:
                 success += 1
-                await AdminDatabase.execute(
-                    """
-                    INSERT INTO push_delivery_logs (push_id, user_id, status, duration_ms)
-                    VALUES ($1, $2, 'sent', $3)
-                    """,
-                    push_id, uid, duration_ms
-                )
+                await AdminDatabase.execute(queries.DELIVERY_LOG_SENT, push_id, uid, duration_ms)
             else:
                 fail += 1
-                await AdminDatabase.execute(
-                    """
-                    INSERT INTO push_delivery_logs (push_id, user_id, status, error, duration_ms)
-                    VALUES ($1, $2, 'failed', $3, $4)
-                    """,
-                    push_id, uid, err, duration_ms
-                )
+                await AdminDatabase.execute(queries.DELIVERY_LOG_FAILED, push_id, uid, err, duration_ms)
 
     status = "sent" if fail == 0 else ("sent_with_errors" if success > 0 else "failed")
     last_error = None if fail == 0 else f"{fail} deliveries failed (see push_delivery_logs)"
 
     await AdminDatabase.execute(
-        """
-        UPDATE scheduled_pushes
-        SET status = $2,
-            is_sent = TRUE,
-            sent_at = CURRENT_TIMESTAMP,
-            success_count = $3,
-            fail_count = $4,
-            last_error = $5
-        WHERE id = $1
-        """,
+        queries.PUSHES_FINISH,
         push_id, status, success, fail, last_error
     )
 
@@ -196,6 +158,8 @@ async def run_scheduler_forever():
     """Основной цикл scheduler"""
     AdminConfig.validate()
     await AdminDatabase.create_pool()
+    # Схема та же, что у бота и админки; на актуальной базе — один запрос
+    await migrate(AdminDatabase._pool)
     await init_telegram_logger()
 
     try:
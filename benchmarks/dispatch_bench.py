@@ -0,0 +1,111 @@
+"""
+Микробенчмарк выбора обработчика: цепочка роутеров с фильтрами F.text / F.data
+против таблицы маршрутизации (utils/dispatch_table.py).
+
+Запуск из корня репозитория:
+    python benchmarks/dispatch_bench.py
+
+Для каждого числа разделов N строится N роутеров (как handlers/*.py до таблицы)
+и таблица с N записями; в худшем случае обновление адресовано последнему разделу.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Update
+
+from utils import callback_codec
+from utils.dispatch_table import DispatchTable
+
+ROUNDS = 2000
+SECTIONS = (6, 24, 96)
+
+
+def _message_update(text: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 1700000000,
+                "chat": {"id": 1, "type": "private"},
+                "from": {"id": 1, "is_bot": False, "first_name": "Гость"},
+                "text": text,
+            },
+        }
+    )
+
+
+def _callback_update(data: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "callback_query": {
+                "id": "1",
+                "from": {"id": 1, "is_bot": False, "first_name": "Гость"},
+                "chat_instance": "1",
+                "data": data,
+            },
+        }
+    )
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+def _build_routers(sections: int) -> Dispatcher:
+    dp = Dispatcher()
+    for i in range(sections):
+        router = Router(name=f"section_{i}")
+        router.message.register(_noop, F.text == f"Раздел {i}")
+        router.callback_query.register(_noop, F.data.startswith(f"section{i}_item_"))
+        dp.include_router(router)
+    return dp
+
+
+def _build_table(sections: int) -> Dispatcher:
+    table = DispatchTable(name=f"table_{sections}")
+    for i in range(sections):
+        table.message(f"Раздел {i}")(_noop)
+        table.callback(f"s{i}")(_noop)
+    dp = Dispatcher()
+    dp.include_router(table.router)
+    return dp
+
+
+async def _measure(dp: Dispatcher, bot: Bot, update: Update) -> float:
+    """Среднее время feed_update в микросекундах"""
+    for _ in range(100):
+        await dp.feed_update(bot, update)
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - started) / ROUNDS * 1_000_000
+
+
+async def main() -> None:
+    bot = Bot("42:BENCHMARK")
+    print(f"{'разделов':>8} | {'роутеры, msg':>13} | {'таблица, msg':>13} | {'роутеры, cb':>12} | {'таблица, cb':>12}")
+    for sections in SECTIONS:
+        last = sections - 1
+        routers = _build_routers(sections)
+        table = _build_table(sections)
+        message = _message_update(f"Раздел {last}")
+        routers_msg = await _measure(routers, bot, message)
+        table_msg = await _measure(table, bot, message)
+        routers_cb = await _measure(routers, bot, _callback_update(f"section{last}_item_71"))
+        table_cb = await _measure(table, bot, _callback_update(callback_codec.encode(f"s{last}", 71)))
+        print(
+            f"{sections:>8} | {routers_msg:>10.1f} мкс | {table_msg:>10.1f} мкс | "
+            f"{routers_cb:>9.1f} мкс | {table_cb:>9.1f} мкс"
+        )
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Стоимость JSON на одно обновление и на одно сообщение рассылки:
+стандартный json (как было) против utils/json_codec.py (orjson, если установлен).
+
+Запуск из корня репозитория:
+    python benchmarks/json_bench.py
+
+- разбор тела webhook (нажатие кнопки вишлиста);
+- подготовка editMessageText с клавиатурой вишлиста сессией aiogram
+  (json_dumps сериализует вложенные объекты, например reply_markup);
+- тело sendMessage рассылки на одного получателя: json= в httpx (было),
+  json_codec.dumps_bytes на каждого и общий хвост из message_body_tail (стало).
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import EditMessageText
+
+from admin.scheduler import message_body_tail
+from database.models import WishlistItem
+from keyboards.wishlist import get_wishlist_keyboard
+from messages import get_wishlist_how_it_works_text
+from utils import callback_codec, json_codec
+
+ROUNDS = 20000
+
+UPDATE_BODY = json.dumps(
+    {
+        "update_id": 100500,
+        "callback_query": {
+            "id": "4382bfdwdsb323b2d9",
+            "from": {
+                "id": 123456789,
+                "is_bot": False,
+                "first_name": "Гость",
+                "last_name": "Свадебный",
+                "username": "wedding_guest",
+                "language_code": "ru",
+            },
+            "message": {
+                "message_id": 4242,
+                "from": {"id": 42, "is_bot": True, "first_name": "Свадебный бот", "username": "wedding_bot"},
+                "chat": {"id": 123456789, "first_name": "Гость", "username": "wedding_guest", "type": "private"},
+                "date": 1700000000,
+                "text": get_wishlist_how_it_works_text(),
+            },
+            "chat_instance": "-1234567890123456789",
+            "data": callback_codec.encode(callback_codec.WISHLIST_ITEM, 17),
+        },
+    },
+    ensure_ascii=False,
+)
+
+BROADCAST_TEXT = (
+    "<b>Дорогие гости!</b>\n\n"
+    "Напоминаем, что до свадьбы осталась неделя 🤍 Трансфер отправляется в 14:00 "
+    "от главного входа, дресс-код — в разделе «Дресс-код». Если планы поменялись, "
+    "пожалуйста, напишите нам заранее.\n\nДо встречи! ✨"
+)
+
+
+def _per_call(func, rounds: int = ROUNDS) -> float:
+    """Среднее время одного вызова, мкс"""
+    for _ in range(100):
+        func()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1_000_000
+
+
+def main() -> None:
+    stdlib_bot = Bot("42:BENCHMARK")
+    codec_bot = Bot(
+        "42:BENCHMARK",
+        session=AiohttpSession(json_loads=json_codec.loads, json_dumps=json_codec.dumps),
+    )
+    items = [
+        WishlistItem(id=i, name=f"Подарок {i}", is_taken=i % 3 == 0, display_index=i + 1)
+        for i in range(30)
+    ]
+    method = EditMessageText(
+        chat_id=123456789,
+        message_id=4242,
+        text=get_wishlist_how_it_works_text(),
+        reply_markup=get_wishlist_keyboard(items),
+        disable_web_page_preview=True,
+    )
+    payload = method.model_dump(warnings=False)
+
+    user_id = 123456789
+    tail = message_body_tail(BROADCAST_TEXT)
+    broadcast = {"chat_id": user_id, "text": BROADCAST_TEXT, "parse_mode": "HTML"}
+
+    cases = (
+        (
+            "разбор webhook",
+            lambda: json.loads(UPDATE_BODY),
+            lambda: codec_bot.session.json_loads(UPDATE_BODY),
+        ),
+        (
+            "editMessageText",
+            lambda: stdlib_bot.session.prepare_value(payload, bot=stdlib_bot, files={}),
+            lambda: codec_bot.session.prepare_value(payload, bot=codec_bot, files={}),
+        ),
+        (
+            "рассылка: dumps_bytes",
+            lambda: json.dumps(broadcast).encode(),
+            lambda: json_codec.dumps_bytes(broadcast),
+        ),
+        (
+            "рассылка: общий хвост",
+            lambda: json.dumps(broadcast).encode(),
+            lambda: b'{"chat_id":%d' % user_id + tail,
+        ),
+    )
+    print(f"JSON: {json_codec.BACKEND}")
+    print(f"{'операция':>24} | {'было, мкс':>10} | {'стало, мкс':>10}")
+    for name, old, new in cases:
+        print(f"{name:>24} | {_per_call(old):>10.2f} | {_per_call(new):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Строки вишлиста: копия каждой asyncpg.Record в dict (как было) против
+неизменяемых моделей со __slots__ (database/models.py).
+
+Запуск из корня репозитория:
+    python benchmarks/models_bench.py
+
+Записи — настоящие asyncpg.Record (собираются без сервера тем же способом,
+что в тестах asyncpg) с колонками запроса wishlist.window. Для каждого размера
+вишлиста меряется время «строки -> клавиатура списка» и память, которую
+занимают сами строки (столько держит в памяти последний список подарков).
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from asyncpg.protocol.protocol import _create_record
+
+from database.models import WishlistItem
+from keyboards.wishlist import get_wishlist_keyboard
+from utils import callback_codec
+
+SIZES = (50, 500, 5000)
+ROUNDS = 20
+
+COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "link",
+    "link2",
+    "price_hint",
+    "is_taken",
+    "taken_by_user_id",
+    "display_index",
+)
+
+
+def _records(count: int) -> list:
+    mapping = {name: index for index, name in enumerate(COLUMNS)}
+    return [
+        _create_record(
+            mapping,
+            (
+                i,
+                f"Подарок {i}",
+                "Комментарий к подарку",
+                f"https://example.com/item/{i}",
+                None,
+                "5 000 ₽",
+                i % 3 == 0,
+                1000 + i if i % 3 == 0 else None,
+                i + 1,
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def _old_keyboard(items: list[dict]) -> InlineKeyboardMarkup:
+    # Клавиатура до моделей: доступ к полям через dict.get
+    buttons = []
+    for item in items:
+        index = item.get("display_index")
+        if item.get("is_taken"):
+            text = f"✅ {item.get('name', 'Без названия')}"
+        else:
+            text = f"{index}. {item.get('name', 'Без названия')}"
+        buttons.append([
+            InlineKeyboardButton(
+                text=text,
+                callback_data=callback_codec.encode(callback_codec.WISHLIST_ITEM, item["id"]),
+            )
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def _old_rows(records: list) -> list:
+    return [dict(record) for record in records]
+
+
+def _new_rows(records: list) -> list:
+    return [WishlistItem.from_record(record) for record in records]
+
+
+def _rows_time(convert, records: list) -> float:
+    """Среднее время (мс) на преобразование всех строк"""
+    convert(records)
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        convert(records)
+    return (time.perf_counter() - started) / ROUNDS * 1000
+
+
+def _render_time(convert, keyboard, records: list) -> float:
+    """Среднее время (мс) «строки -> клавиатура списка»"""
+    keyboard(convert(records))
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        keyboard(convert(records))
+    return (time.perf_counter() - started) / ROUNDS * 1000
+
+
+def _retained(convert, records: list) -> int:
+    """Сколько байт занимают преобразованные строки"""
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    rows = convert(records)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current - baseline
+
+
+def main() -> None:
+    print(f"{'строк':>6} | {'строки, мс':>17} | {'с клавиатурой, мс':>17} | {'память строк, КБ':>17}")
+    print(f"{'':>6} | {'dict':>8} {'модель':>8} | {'dict':>8} {'модель':>8} | {'dict':>8} {'модель':>8}")
+    for size in SIZES:
+        records = _records(size)
+        old_rows = _rows_time(_old_rows, records)
+        new_rows = _rows_time(_new_rows, records)
+        old_render = _render_time(_old_rows, _old_keyboard, records)
+        new_render = _render_time(_new_rows, get_wishlist_keyboard, records)
+        old_memory = _retained(_old_rows, records) / 1024
+        new_memory = _retained(_new_rows, records) / 1024
+        print(
+            f"{size:>6} | {old_rows:>8.2f} {new_rows:>8.2f} | {old_render:>8.2f} {new_render:>8.2f}"
+            f" | {old_memory:>8.1f} {new_memory:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Аллокации на одно обновление: ответы, собираемые заново в каждом обработчике,
+против заранее собранных ответов из responses.py.
+
+Запуск из корня репозитория:
+    python benchmarks/responses_bench.py
+
+«Было» повторяет прежние обработчики: новая клавиатура главного меню,
+URL календарей с quote() и sendMessage, который aiogram сериализует сам.
+«Стало» — StaticReply.answer() с готовым телом ответа на webhook.
+"""
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram import Bot
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    Message,
+    ReplyKeyboardMarkup,
+)
+
+import messages
+from keyboards.main_menu import MENU_DISCLAIMER, MENU_DRESSCODE, MENU_INFO, MENU_MAIN, MENU_VIDEO, MENU_WISHLIST
+from responses import DRESSCODE_REPLY, INFO_REPLY
+
+ROUNDS = 2000
+
+
+def _old_main_menu_keyboard() -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text=MENU_INFO), KeyboardButton(text=MENU_DRESSCODE)],
+            [KeyboardButton(text=MENU_WISHLIST), KeyboardButton(text=MENU_DISCLAIMER)],
+            [KeyboardButton(text=MENU_VIDEO), KeyboardButton(text=MENU_MAIN)],
+        ],
+        resize_keyboard=True,
+        input_field_placeholder="Выберите раздел из меню",
+    )
+
+
+def _old_calendar_keyboard() -> InlineKeyboardMarkup:
+    # Без кеша, как было до реестра ответов
+    google_calendar_url = messages.get_google_calendar_url.__wrapped__()
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="📅 Google Calendar", url=google_calendar_url)]]
+    )
+
+
+def _serialize(bot: Bot, method) -> None:
+    # Так aiogram готовит запрос к Bot API (или ответ на webhook) из модели метода
+    bot.session.prepare_value(method.model_dump(warnings=False), bot=bot, files={})
+
+
+def _old_dresscode(bot: Bot, message: Message) -> None:
+    _serialize(bot, message.answer(messages.get_dresscode_text(), reply_markup=_old_main_menu_keyboard()))
+
+
+def _old_info(bot: Bot, message: Message) -> None:
+    _serialize(
+        bot,
+        message.answer(
+            messages.get_info_text(),
+            reply_markup=_old_calendar_keyboard(),
+            parse_mode="HTML",
+            disable_web_page_preview=True,
+        ),
+    )
+
+
+def _new_dresscode(bot: Bot, message: Message) -> None:
+    DRESSCODE_REPLY.answer(message).static_body
+
+
+def _new_info(bot: Bot, message: Message) -> None:
+    INFO_REPLY.answer(message).static_body
+
+
+def _measure(func, bot: Bot, message: Message) -> float:
+    """Средний пик выделенной памяти (байт) на одно обновление"""
+    for _ in range(50):
+        func(bot, message)
+    total = 0
+    tracemalloc.start()
+    for _ in range(ROUNDS):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(bot, message)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - baseline
+    tracemalloc.stop()
+    return total / ROUNDS
+
+
+def main() -> None:
+    bot = Bot("42:BENCHMARK")
+    message = Message.model_validate(
+        {
+            "message_id": 1,
+            "date": 1700000000,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Гость"},
+            "text": MENU_DRESSCODE,
+        },
+        context={"bot": bot},
+    )
+    cases = (
+        ("дресс-код", _old_dresscode, _new_dresscode),
+        ("информация", _old_info, _new_info),
+    )
+    print("Пик памяти на одно обновление")
+    print(f"{'раздел':>10} | {'было, байт':>11} | {'стало, байт':>11}")
+    for name, old, new in cases:
+        old_bytes = _measure(old, bot, message)
+        new_bytes = _measure(new, bot, message)
+        print(f"{name:>10} | {old_bytes:>11.0f} | {new_bytes:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
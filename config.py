@@ -14,9 +14,31 @@ class Config:
     
     # Telegram Bot
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
+    # Свой сервер Bot API (telegram-bot-api или заглушка нагрузочного теста); пусто — api.telegram.org
+    TELEGRAM_API_URL: str = os.getenv("TELEGRAM_API_URL", "")
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # Пул подключений к БД и режим работы через пулер (PgBouncer и т.п.):
+    # session — прямое подключение или пулер в режиме session;
+    # transaction — пулер в режиме transaction: без именованных prepared statements
+    # (если пулер их не поддерживает, см. DB_POOLER_PREPARED_STATEMENTS) и без сброса сессии
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOLER_MODE: str = os.getenv("DB_POOLER_MODE", "session").lower()
+    # PgBouncer 1.21+ с max_prepared_statements > 0 сам отслеживает prepared statements протокола
+    DB_POOLER_PREPARED_STATEMENTS: bool = os.getenv("DB_POOLER_PREPARED_STATEMENTS", "False").lower() == "true"
+    # Срок на один запрос бота к БД (секунды) и выключатель: после DB_BREAKER_FAILURES
+    # сбоев соединения подряд запросы отклоняются сразу, пробный — через DB_BREAKER_RESET_SECONDS
+    DB_QUERY_TIMEOUT: float = float(os.getenv("DB_QUERY_TIMEOUT", "3"))
+    DB_BREAKER_FAILURES: int = int(os.getenv("DB_BREAKER_FAILURES", "5"))
+    DB_BREAKER_RESET_SECONDS: float = float(os.getenv("DB_BREAKER_RESET_SECONDS", "15"))
+    # Реплика для чтения (опционально): запросы readonly идут на неё, пока отставание не больше порога
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+    DB_REPLICA_CHECK_INTERVAL: float = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+    # Сколько секунд после записи гость читает с primary (видит свои изменения)
+    DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))
     
     # Admin
     ADMIN_USER_IDS: list[int] = [
@@ -37,14 +59,51 @@ class Config:
     # Calendar Server URL for .ics file
     CALENDAR_SERVER_URL: str = os.getenv("CALENDAR_SERVER_URL", "")  # URL календарного сервера на Railway
     
+    # Учёт активности пользователей (отложенная пакетная запись в users)
+    ACTIVITY_FLUSH_INTERVAL: float = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "30"))  # секунды между сбросами
+    ACTIVITY_FLUSH_MAX_ENTRIES: int = int(os.getenv("ACTIVITY_FLUSH_MAX_ENTRIES", "500"))  # досрочный сброс при N гостях в буфере
+    
+    # Очередь фоновых побочных эффектов (уведомления в группу логов и т.п.)
+    SIDE_EFFECTS_QUEUE_SIZE: int = int(os.getenv("SIDE_EFFECTS_QUEUE_SIZE", "1000"))
+    SIDE_EFFECTS_WORKERS: int = int(os.getenv("SIDE_EFFECTS_WORKERS", "2"))
+    SIDE_EFFECTS_OVERFLOW: str = os.getenv("SIDE_EFFECTS_OVERFLOW", "drop_oldest")  # drop_new / drop_oldest / block
+    
+    # Ограничение частоты действий одного пользователя (token bucket: токенов в секунду и запас)
+    THROTTLE_MESSAGE_RATE: float = float(os.getenv("THROTTLE_MESSAGE_RATE", "1"))
+    THROTTLE_MESSAGE_BURST: int = int(os.getenv("THROTTLE_MESSAGE_BURST", "5"))
+    THROTTLE_CALLBACK_RATE: float = float(os.getenv("THROTTLE_CALLBACK_RATE", "2"))
+    THROTTLE_CALLBACK_BURST: int = int(os.getenv("THROTTLE_CALLBACK_BURST", "8"))
+    
     # Webhook
     WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "")  # URL для webhook (например: https://your-app.railway.app)
     # Путь для webhook (должен начинаться с / или быть пустым)
     _webhook_path = os.getenv("WEBHOOK_PATH", "/webhook")
     WEBHOOK_PATH: str = _webhook_path if _webhook_path.startswith("/") or _webhook_path == "" else f"/{_webhook_path}"
     WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")  # Секретный ключ для webhook (опционально)
+    # Режим приёма обновлений: reply — обработка внутри запроса с ответом в теле webhook,
+    # queue — мгновенное подтверждение и обработка воркерами из очереди
+    WEBHOOK_MODE: str = os.getenv("WEBHOOK_MODE", "reply").lower()
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_QUEUE_SIZE: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
     # Порт для веб-сервера (Railway использует переменную PORT, локально - 8001)
     WEBHOOK_PORT: int = int(os.getenv("PORT", os.getenv("WEBHOOK_PORT", "8001")))
+    # Запросы к БД дольше порога логируются с параметрами; если задан файл — туда пишется их EXPLAIN
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_EXPLAIN_FILE: str = os.getenv("SLOW_QUERY_EXPLAIN_FILE", "")
+    
+    # Трассировка: обновления дольше порога пишутся в TRACE_FILE целиком, остальные — выборочно
+    TRACE_SLOW_THRESHOLD_MS: float = float(os.getenv("TRACE_SLOW_THRESHOLD_MS", "1000"))
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "traces.jsonl")
+    # Токен для /metrics (Authorization: Bearer <токен> или ?token=); пусто — без проверки
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    
+    # Профилирование холодного старта: время импорта модулей и фаз инициализации в лог
+    STARTUP_PROFILE: bool = os.getenv("STARTUP_PROFILE", "False").lower() == "true"
+    STARTUP_PROFILE_TOP: int = int(os.getenv("STARTUP_PROFILE_TOP", "25"))  # сколько самых медленных модулей показать
+    
+    # JSON для Bot API и webhook: auto — orjson, если установлен; json — только стандартный модуль
+    JSON_CODEC: str = os.getenv("JSON_CODEC", "auto").lower()
     
     @classmethod
     def validate(cls) -> bool:
@@ -1,4 +1,5 @@
 from .connection import Database
 from .models import init_db
+from .repository import DatabaseUnavailableError
 
-__all__ = ["Database", "init_db"]
+__all__ = ["Database", "DatabaseUnavailableError", "init_db"]
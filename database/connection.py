@@ -1,52 +1,59 @@
-import asyncpg
 from typing import Optional
 from config import Config
+from database import queries
+from database.repository import Repository
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import db_acquire_wait, registry
+from utils.query_stats import QueryStats
 
 
-class Database:
-    """Класс для работы с базой данных PostgreSQL"""
+class Database(Repository):
+    """Класс для работы с базой данных PostgreSQL (бот)"""
     
-    _pool: Optional[asyncpg.Pool] = None
-    
-    @classmethod
-    async def create_pool(cls) -> None:
-        """Создание пула подключений к БД"""
-        if cls._pool is None:
-            cls._pool = await asyncpg.create_pool(
-                Config.DATABASE_URL,
-                min_size=1,
-                max_size=10,
-                command_timeout=60
-            )
-    
-    @classmethod
-    async def close_pool(cls) -> None:
-        """Закрытие пула подключений"""
-        if cls._pool:
-            await cls._pool.close()
-            cls._pool = None
-    
-    @classmethod
-    async def execute(cls, query: str, *args) -> str:
-        """Выполнение запроса без возврата результата"""
-        async with cls._pool.acquire() as connection:
-            return await connection.execute(query, *args)
-    
-    @classmethod
-    async def fetch(cls, query: str, *args) -> list:
-        """Выполнение запроса с возвратом списка строк"""
-        async with cls._pool.acquire() as connection:
-            return await connection.fetch(query, *args)
-    
-    @classmethod
-    async def fetchrow(cls, query: str, *args) -> Optional[dict]:
-        """Выполнение запроса с возвратом одной строки"""
-        async with cls._pool.acquire() as connection:
-            row = await connection.fetchrow(query, *args)
-            return dict(row) if row else None
-    
-    @classmethod
-    async def fetchval(cls, query: str, *args) -> Optional[any]:
-        """Выполнение запроса с возвратом одного значения"""
-        async with cls._pool.acquire() as connection:
-            return await connection.fetchval(query, *args)
+    _pool = None
+    dsn = Config.DATABASE_URL
+    min_size = Config.DB_POOL_MIN_SIZE
+    max_size = Config.DB_POOL_MAX_SIZE
+    pooler_mode = Config.DB_POOLER_MODE
+    pooler_prepared_statements = Config.DB_POOLER_PREPARED_STATEMENTS
+    replica_dsn = Config.DATABASE_REPLICA_URL
+    replica_max_lag = Config.DB_REPLICA_MAX_LAG_SECONDS
+    replica_check_interval = Config.DB_REPLICA_CHECK_INTERVAL
+    read_your_writes_window = Config.DB_READ_YOUR_WRITES_SECONDS
+    # Время запросов по имени запроса (p50/p99 в /metrics)
+    stats = QueryStats(
+        "db_query_duration_seconds",
+        slow_query_ms=Config.SLOW_QUERY_MS,
+        explain_file=Config.SLOW_QUERY_EXPLAIN_FILE,
+    )
+    acquire_wait_metric = db_acquire_wait
+    # Гость не ждёт ответа БД дольше нескольких секунд; при её сбое — деградированный режим
+    query_timeout = Config.DB_QUERY_TIMEOUT
+    breaker = CircuitBreaker(
+        "postgres",
+        failure_threshold=Config.DB_BREAKER_FAILURES,
+        reset_timeout=Config.DB_BREAKER_RESET_SECONDS,
+    )
+    # Запросы на каждое нажатие кнопки вишлиста и /start
+    warm_queries = (
+        queries.WISHLIST_WINDOW,
+        queries.WISHLIST_ITEM,
+        queries.WISHLIST_ITEM_STATUS,
+        queries.WISHLIST_TAKE,
+        queries.WISHLIST_UNTAKE,
+        queries.USER_UPSERT,
+    )
+
+
+def _pool_stat(getter: str):
+    def collect() -> Optional[int]:
+        pool = Database._pool
+        return getattr(pool, getter)() if pool is not None else None
+    return collect
+
+
+# Состояние пула читается в момент запроса /metrics
+registry.gauge("db_pool_size", "Открытые соединения пула", _pool_stat("get_size"))
+registry.gauge("db_pool_idle", "Свободные соединения пула", _pool_stat("get_idle_size"))
+registry.gauge("db_pool_max_size", "Максимальный размер пула", _pool_stat("get_max_size"))
+registry.register(Database.stats)
@@ -0,0 +1,222 @@
+"""
+Версионированные миграции схемы БД, общие для бота, админки и scheduler'а.
+
+Раньше каждый процесс при старте выполнял десятки CREATE/ALTER подряд (часть из
+них — дважды). Теперь применённые версии хранятся в schema_migrations:
+- тёплый старт — один запрос с номером последней версии;
+- если есть новые миграции, они применяются в одной транзакции под
+  advisory-блокировкой, так что бот и админка, стартуя одновременно, не
+  выполняют их дважды.
+
+Первые миграции повторяют прежний init_db и написаны идемпотентно
+(IF NOT EXISTS), поэтому на уже существующей базе они ничего не ломают.
+Новые изменения схемы — только новыми записями в конец MIGRATIONS.
+"""
+import logging
+from typing import List, NamedTuple, Set
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_advisory_xact_lock для миграций (любое постоянное число)
+MIGRATIONS_LOCK_KEY = 730251044
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    sql: str
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial_schema", """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id BIGINT PRIMARY KEY,
+            username VARCHAR(255),
+            first_name VARCHAR(255),
+            last_name VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS wishlist_items (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(500) NOT NULL,
+            description TEXT,
+            link VARCHAR(1000),
+            link2 VARCHAR(1000),
+            price_hint VARCHAR(255),
+            order_index INTEGER DEFAULT 0,
+            is_taken BOOLEAN DEFAULT FALSE,
+            taken_by_user_id BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (taken_by_user_id) REFERENCES users(user_id) ON DELETE SET NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS wedding_info (
+            id SERIAL PRIMARY KEY,
+            section VARCHAR(100) NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            content TEXT NOT NULL,
+            order_index INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Таблицы для будущих викторин
+        CREATE TABLE IF NOT EXISTS quizzes (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            is_active BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS quiz_questions (
+            id SERIAL PRIMARY KEY,
+            quiz_id INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            options JSONB NOT NULL,
+            correct_answer INTEGER NOT NULL,
+            order_index INTEGER DEFAULT 0,
+            FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS quiz_answers (
+            id SERIAL PRIMARY KEY,
+            quiz_id INTEGER NOT NULL,
+            user_id BIGINT NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer INTEGER NOT NULL,
+            is_correct BOOLEAN NOT NULL,
+            answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (question_id) REFERENCES quiz_questions(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS scheduled_pushes (
+            id SERIAL PRIMARY KEY,
+            message TEXT NOT NULL,
+            send_to_all BOOLEAN DEFAULT TRUE,
+            target_user_ids BIGINT[],
+            scheduled_at TIMESTAMP,
+            sent_at TIMESTAMP,
+            is_sent BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Админы веб-админки
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(100) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    Migration(2, "wishlist_details", """
+        -- На случай таблицы, созданной до появления этих колонок
+        ALTER TABLE wishlist_items ADD COLUMN IF NOT EXISTS price_hint VARCHAR(255);
+        ALTER TABLE wishlist_items ADD COLUMN IF NOT EXISTS order_index INTEGER DEFAULT 0;
+        ALTER TABLE wishlist_items ADD COLUMN IF NOT EXISTS link2 VARCHAR(1000);
+    """),
+    Migration(3, "push_delivery", """
+        -- Улучшенная логика пушей: статусы, блокировка, счётчики доставки
+        ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'pending';
+        ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS locked_at TIMESTAMP;
+        ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS attempts INT DEFAULT 0;
+        ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS last_error TEXT;
+        ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS total_targets INT DEFAULT 0;
+        ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS success_count INT DEFAULT 0;
+        ALTER TABLE scheduled_pushes ADD COLUMN IF NOT EXISTS fail_count INT DEFAULT 0;
+
+        UPDATE scheduled_pushes
+        SET status = CASE
+            WHEN is_sent = TRUE THEN 'sent'
+            ELSE 'pending'
+        END
+        WHERE status IS NULL OR status = '';
+
+        CREATE TABLE IF NOT EXISTS push_delivery_logs (
+            id SERIAL PRIMARY KEY,
+            push_id INT NOT NULL REFERENCES scheduled_pushes(id) ON DELETE CASCADE,
+            user_id BIGINT NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            duration_ms INT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_push_pending ON scheduled_pushes(status, scheduled_at);
+        CREATE INDEX IF NOT EXISTS idx_push_logs_push ON push_delivery_logs(push_id);
+    """),
+    Migration(4, "users_counter", """
+        -- Счётчик пользователей (чтобы не делать COUNT(*) по users на каждого нового гостя)
+        CREATE TABLE IF NOT EXISTS users_counter (
+            id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            total BIGINT NOT NULL DEFAULT 0
+        );
+        INSERT INTO users_counter (id, total)
+        SELECT 1, COUNT(*) FROM users
+        ON CONFLICT (id) DO NOTHING;
+    """),
+    Migration(5, "users_activity", """
+        -- Активность гостей (заполняется пакетно из middlewares/activity.py)
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP;
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS interactions_count INT NOT NULL DEFAULT 0;
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def current_version(pool: asyncpg.Pool) -> int:
+    """Последняя применённая версия (0 — миграций ещё не было)"""
+    try:
+        return await pool.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    except asyncpg.UndefinedTableError:
+        return 0
+
+
+async def _applied_versions(connection: asyncpg.Connection) -> Set[int]:
+    rows = await connection.fetch("SELECT version FROM schema_migrations")
+    return {row["version"] for row in rows}
+
+
+async def migrate(pool: asyncpg.Pool) -> int:
+    """
+    Применяет недостающие миграции. Возвращает число применённых.
+    На актуальной базе — один запрос.
+    """
+    if await current_version(pool) >= LATEST_VERSION:
+        return 0
+
+    async with pool.acquire() as connection:
+        async with connection.transaction():
+            # Второй процесс ждёт здесь, пока первый не закончит, и затем видит его версии
+            await connection.execute("SELECT pg_advisory_xact_lock($1)", MIGRATIONS_LOCK_KEY)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            applied = await _applied_versions(connection)
+            pending = [m for m in MIGRATIONS if m.version not in applied]
+            for migration in pending:
+                # Без параметров asyncpg отправляет весь текст одним запросом
+                await connection.execute(migration.sql)
+                await connection.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+                    migration.version,
+                    migration.name,
+                )
+
+    if pending:
+        logger.info(
+            f"Применены миграции: {', '.join(f'{m.version}_{m.name}' for m in pending)}"
+        )
+    return len(pending)
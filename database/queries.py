@@ -0,0 +1,243 @@
+"""
+Все SQL-запросы бота, админки и scheduler'а под постоянными именами.
+
+Обработчики передают в Database/AdminDatabase не текст, а объект Query:
+- статистика запросов (/metrics, /query-stats) ведётся по имени, а не по
+  тексту, и не меняется от правки пробелов в SQL;
+- каждый запрос подготавливается на соединении один раз (PREPARE), а
+  горячие запросы процесса (warm_queries у Database/AdminDatabase) — сразу
+  при открытии соединения, см. database/repository.py;
+- запросы с readonly=True можно выполнять на реплике (если она задана).
+  Проверки перед записью (например, wishlist.item_status) помечать так нельзя:
+  реплика может отставать.
+
+Новые запросы добавляются сюда через declare(); имена уникальны.
+"""
+from typing import Dict, NamedTuple
+
+
+class Query(NamedTuple):
+    name: str
+    sql: str
+    # Только чтение: можно отправить на реплику
+    readonly: bool = False
+
+
+QUERIES: Dict[str, Query] = {}
+
+
+def declare(name: str, sql: str, readonly: bool = False) -> Query:
+    """Объявление именованного запроса"""
+    if name in QUERIES:
+        raise ValueError(f"Запрос {name} уже объявлен")
+    query = QUERIES[name] = Query(name, sql, readonly)
+    return query
+
+
+# ========== ГОСТИ ==========
+
+# Сохранение/обновление пользователя и счётчика одним запросом:
+# xmax = 0 только у только что вставленной строки
+USER_UPSERT = declare("users.upsert", """
+    WITH upserted AS (
+        INSERT INTO users (user_id, username, first_name, last_name)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (user_id)
+        DO UPDATE SET
+            username = EXCLUDED.username,
+            first_name = EXCLUDED.first_name,
+            last_name = EXCLUDED.last_name,
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING (xmax = 0) AS inserted
+    ),
+    counter AS (
+        UPDATE users_counter
+        SET total = total + 1
+        WHERE id = 1 AND (SELECT inserted FROM upserted)
+        RETURNING total
+    )
+    SELECT upserted.inserted AS is_new_user,
+           (SELECT total FROM counter) AS total_users
+    FROM upserted
+""")
+
+# Пакетная запись активности (middlewares/activity.py)
+USERS_FLUSH_ACTIVITY = declare("users.flush_activity", """
+    UPDATE users AS u
+    SET last_seen_at = GREATEST(u.last_seen_at, a.last_seen_at),
+        interactions_count = u.interactions_count + a.hits
+    FROM unnest($1::bigint[], $2::timestamp[], $3::int[]) AS a(user_id, last_seen_at, hits)
+    WHERE u.user_id = a.user_id
+""")
+
+USERS_COUNT = declare("users.count", "SELECT COUNT(*) FROM users", readonly=True)
+USERS_ACTIVE_24H = declare(
+    "users.active_24h",
+    "SELECT COUNT(*) FROM users WHERE last_seen_at > CURRENT_TIMESTAMP - INTERVAL '24 hours'",
+    readonly=True,
+)
+USERS_FOR_PUSHES = declare(
+    "users.for_pushes",
+    "SELECT user_id, first_name, username, last_seen_at, interactions_count FROM users "
+    "ORDER BY last_seen_at DESC NULLS LAST",
+    readonly=True,
+)
+USERS_ALL_IDS = declare("users.all_ids", "SELECT user_id FROM users", readonly=True)
+
+# ========== ВИШ-ЛИСТ ==========
+
+# Номер подарка в списке (display_index) считается в том же порядке, что и сам список
+_WISHLIST_WINDOW_SELECT = """
+    SELECT id,
+           name,
+           description,
+           link,
+           link2,
+           price_hint,
+           is_taken,
+           taken_by_user_id,
+           ROW_NUMBER() OVER (ORDER BY is_taken, order_index, created_at) AS display_index
+    FROM wishlist_items
+"""
+
+WISHLIST_WINDOW = declare(
+    "wishlist.window",
+    _WISHLIST_WINDOW_SELECT + "ORDER BY is_taken, order_index, created_at",
+    readonly=True,
+)
+WISHLIST_ITEM = declare(
+    "wishlist.item",
+    f"SELECT * FROM ({_WISHLIST_WINDOW_SELECT}) wi WHERE wi.id = $1",
+    readonly=True,
+)
+WISHLIST_ITEM_STATUS = declare(
+    "wishlist.item_status",
+    "SELECT is_taken, taken_by_user_id FROM wishlist_items WHERE id = $1",
+)
+WISHLIST_TAKE = declare("wishlist.take", """
+    UPDATE wishlist_items
+    SET is_taken = TRUE, taken_by_user_id = $1, updated_at = CURRENT_TIMESTAMP
+    WHERE id = $2
+""")
+WISHLIST_UNTAKE = declare("wishlist.untake", """
+    UPDATE wishlist_items
+    SET is_taken = FALSE, taken_by_user_id = NULL, updated_at = CURRENT_TIMESTAMP
+    WHERE id = $1
+""")
+
+WISHLIST_COUNT = declare("wishlist.count", "SELECT COUNT(*) FROM wishlist_items", readonly=True)
+WISHLIST_ADMIN_LIST = declare(
+    "wishlist.admin_list",
+    "SELECT * FROM wishlist_items ORDER BY is_taken, order_index, created_at",
+    readonly=True,
+)
+WISHLIST_MAX_ORDER = declare(
+    "wishlist.max_order", "SELECT COALESCE(MAX(order_index), 0) FROM wishlist_items"
+)
+WISHLIST_INSERT = declare(
+    "wishlist.insert",
+    "INSERT INTO wishlist_items (name, description, link, link2, price_hint, order_index) "
+    "VALUES ($1, $2, $3, $4, $5, $6)",
+)
+WISHLIST_UPDATE = declare("wishlist.update", """
+    UPDATE wishlist_items
+    SET name = $1,
+        description = $2,
+        link = $3,
+        link2 = $4,
+        price_hint = $5,
+        order_index = $6,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $7
+""")
+WISHLIST_DELETE = declare("wishlist.delete", "DELETE FROM wishlist_items WHERE id = $1")
+
+# ========== АДМИНЫ ==========
+
+ADMIN_BY_USERNAME = declare("admin.by_username", "SELECT * FROM admin_users WHERE username = $1")
+ADMIN_INSERT = declare(
+    "admin.insert", "INSERT INTO admin_users (username, password_hash) VALUES ($1, $2)"
+)
+
+# ========== ПУШИ ==========
+
+PUSHES_PENDING_COUNT = declare(
+    "pushes.pending_count",
+    "SELECT COUNT(*) FROM scheduled_pushes WHERE is_sent = FALSE",
+    readonly=True,
+)
+PUSHES_RECENT = declare(
+    "pushes.recent",
+    "SELECT * FROM scheduled_pushes ORDER BY created_at DESC LIMIT 50",
+    readonly=True,
+)
+PUSHES_INSERT = declare(
+    "pushes.insert",
+    """INSERT INTO scheduled_pushes (message, send_to_all, target_user_ids, scheduled_at, status)
+       VALUES ($1, $2, $3, COALESCE($4, CURRENT_TIMESTAMP), 'pending')""",
+)
+PUSHES_DELETE = declare("pushes.delete", "DELETE FROM scheduled_pushes WHERE id = $1")
+
+# Атомарный захват одной задачи scheduler'ом (SKIP LOCKED — можно запускать несколько)
+PUSHES_CLAIM_NEXT = declare("pushes.claim_next", """
+    WITH next AS (
+        SELECT id
+        FROM scheduled_pushes
+        WHERE status = 'pending'
+          AND (scheduled_at IS NULL OR scheduled_at <= CURRENT_TIMESTAMP)
+        ORDER BY scheduled_at NULLS FIRST, created_at ASC
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    UPDATE scheduled_pushes sp
+    SET status = 'processing',
+        locked_at = CURRENT_TIMESTAMP,
+        attempts = attempts + 1
+    FROM next
+    WHERE sp.id = next.id
+    RETURNING sp.*;
+""")
+PUSHES_SET_TOTAL = declare(
+    "pushes.set_total", "UPDATE scheduled_pushes SET total_targets = $1 WHERE id = $2"
+)
+PUSHES_NO_RECIPIENTS = declare("pushes.no_recipients", """
+    UPDATE scheduled_pushes
+    SET status = 'failed',
+        last_error = 'No recipients',
+        sent_at = CURRENT_TIMESTAMP,
+        success_count = 0,
+        fail_count = 0
+    WHERE id = $1
+""")
+PUSHES_FINISH = declare("pushes.finish", """
+    UPDATE scheduled_pushes
+    SET status = $2,
+        is_sent = TRUE,
+        sent_at = CURRENT_TIMESTAMP,
+        success_count = $3,
+        fail_count = $4,
+        last_error = $5
+    WHERE id = $1
+""")
+
+# Журнал доставки — по строке на получателя
+DELIVERY_LOG_SENT = declare("push_delivery_logs.sent", """
+    INSERT INTO push_delivery_logs (push_id, user_id, status, duration_ms)
+    VALUES ($1, $2, 'sent', $3)
+""")
+DELIVERY_LOG_FAILED = declare("push_delivery_logs.failed", """
+    INSERT INTO push_delivery_logs (push_id, user_id, status, error, duration_ms)
+    VALUES ($1, $2, 'failed', $3, $4)
+""")
+
+# ========== РЕПЛИКА ==========
+
+# Отставание реплики в секундах (0 — всё полученное применено, NULL — неизвестно).
+# Сравнение LSN нужно, чтобы простаивающий primary не выглядел как отставание.
+REPLICA_LAG = declare("replica.lag", """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
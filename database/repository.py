@@ -0,0 +1,405 @@
+"""
+Общая обёртка над пулом asyncpg для бота (database.Database) и админки со
+scheduler'ом (admin.database.AdminDatabase): раньше это были две почти
+одинаковые копии.
+
+Запросы передаются как Query из database/queries.py (или текстом — для
+разовых запросов). Выполняются они по тексту через кеш statements asyncpg:
+на каждом соединении запрос подготавливается один раз и дальше идёт без
+разбора и планирования; запросы из warm_queries попадают в кеш сразу при
+открытии соединения (hook init пула), так что первый гость на новом
+соединении не платит за PREPARE. Сами объекты PreparedStatement между
+выдачами соединения из пула не хранятся: asyncpg делает их недействительными
+при возврате соединения в пул.
+
+За пулером в режиме transaction (pooler_mode="transaction") соседние запросы
+одного клиента попадают на разные серверные соединения, поэтому именованные
+prepared statements там не работают: кеш asyncpg выключается, и запросы идут
+безымянными statements (разбор на каждый вызов, зато корректно). PgBouncer 1.21+ с max_prepared_statements сам отслеживает
+prepared statements протокола — тогда pooler_prepared_statements=True
+оставляет их включёнными.
+
+Реплика для чтения (replica_dsn) необязательна. На неё уходят только запросы с
+readonly=True, и только пока её отставание (проверяется не чаще раза в
+replica_check_interval секунд) не больше replica_max_lag; иначе, а также при
+ошибке соединения с репликой или если она не ответила за query_timeout, чтение
+идёт на primary. Read-your-writes: после записи от гостя (пользователь
+текущего обновления в ContextVar, см. bind_user) его чтения
+read_your_writes_window секунд идут на primary — так после «Забронировать»
+карточка и список сразу показывают новый статус.
+
+Сбои primary: у бота каждый запрос ограничен query_timeout секунд (вместо
+command_timeout=60 — гость не ждёт минуту), а после серии сбоев соединения
+выключатель breaker (utils/circuit_breaker.py) на время отклоняет запросы
+сразу. И то и другое приходит в обработчики как DatabaseUnavailableError.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Union
+
+import asyncpg
+
+from database.queries import REPLICA_LAG, Query
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.lru import LRUCache
+from utils.metrics import Histogram
+from utils.query_stats import QueryStats, QueryTimer
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+QueryLike = Union[Query, str]
+
+# Пользователь обрабатываемого обновления (None — админка, scheduler, фоновые задачи)
+_current_user: ContextVar[Optional[int]] = ContextVar("db_current_user", default=None)
+# Кто недавно писал в БД: user_id (или None) -> момент, до которого читать с primary
+_recent_writes = LRUCache(max_size=10000)
+
+# Ошибки соединения (а не самого запроса): сервер недоступен, перегружен или не ответил вовремя.
+# InterfaceError сюда не входит: от него наследуется клиентский DataError (неверный аргумент
+# запроса) — это ошибка в коде, а не сбой БД. Оборванное соединение asyncpg сообщает
+# ConnectionDoesNotExistError — это PostgresConnectionError.
+_CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.TooManyConnectionsError,
+)
+
+
+class DatabaseUnavailableError(Exception):
+    """БД не ответила вовремя, соединение оборвалось или выключатель разомкнут"""
+
+
+def bind_user(user_id: Optional[int]) -> Token:
+    """Привязывает запросы текущего контекста к гостю (для read-your-writes)"""
+    return _current_user.set(user_id)
+
+
+def unbind_user(token: Token) -> None:
+    _current_user.reset(token)
+
+
+class TransactionPoolerConnection(asyncpg.Connection):
+    """
+    Соединение через пулер в режиме transaction. Состояние сессии между
+    транзакциями всё равно не сохраняется, поэтому сброс при возврате в пул
+    (RESET ALL, UNLISTEN *, ...) — лишний запрос на каждый вызов; отключаем его.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Пустой текст вместо None: asyncpg не собирает запрос сброса (ROLLBACK при
+        # незавершённой транзакции остаётся)
+        self._reset_query = ""
+
+
+class Repository:
+    """
+    Пул подключений и выполнение запросов со статистикой и трассировкой.
+    Подкласс задаёт dsn, stats, warm_queries и свой атрибут _pool.
+    """
+
+    _pool: Optional[asyncpg.Pool] = None
+    # False — пул чужой (общий процесс, см. run_all.py): не создаём и не закрываем
+    _owns_pool: bool = True
+    dsn: str = ""
+    min_size: int = 1
+    max_size: int = 10
+    # session — прямое подключение (или пулер в режиме session), transaction — см. описание модуля
+    pooler_mode: str = "session"
+    pooler_prepared_statements: bool = False
+    stats: QueryStats
+    # Горячие запросы процесса: подготавливаются на каждом новом соединении
+    warm_queries: Sequence[Query] = ()
+    # Гистограмма ожидания соединения для /metrics (только у бота)
+    acquire_wait_metric: Optional[Histogram] = None
+
+    # Реплика для чтения (пустой dsn — не используется)
+    replica_dsn: str = ""
+    replica_max_lag: float = 5.0
+    replica_check_interval: float = 5.0
+    read_your_writes_window: float = 10.0
+    _replica_pool: Optional[asyncpg.Pool] = None
+    _replica_lag: Optional[float] = None  # None — неизвестно или реплика недоступна
+    _replica_checked_at: float = 0.0
+    _replica_check_task: Optional[asyncio.Task] = None
+    replica_reads: int = 0
+    replica_fallbacks: int = 0
+
+    # Срок на один запрос к primary или реплике вместе с ожиданием соединения (None — только command_timeout)
+    query_timeout: Optional[float] = None
+    # Выключатель primary (None — без него)
+    breaker: Optional[CircuitBreaker] = None
+
+    @classmethod
+    def named_statements(cls) -> bool:
+        """Можно ли держать именованные prepared statements на соединении"""
+        return cls.pooler_mode != "transaction" or cls.pooler_prepared_statements
+
+    @classmethod
+    async def create_pool(cls) -> None:
+        """Создание пула подключений к БД (и к реплике, если она задана)"""
+        if cls._pool is None:
+            cls._pool = await cls._create_pool(cls.dsn)
+        if cls.replica_dsn and cls._replica_pool is None:
+            try:
+                cls._replica_pool = await cls._create_pool(cls.replica_dsn)
+            except Exception as e:
+                # Без реплики бот работает как раньше — всё читается с primary
+                logger.error(f"Не удалось подключиться к реплике, чтение идёт с primary: {e}")
+                return
+            await cls._check_replica()
+
+    @classmethod
+    async def _create_pool(cls, dsn: str) -> asyncpg.Pool:
+        options = {}
+        if cls.pooler_mode == "transaction":
+            options["connection_class"] = TransactionPoolerConnection
+        if cls.named_statements():
+            options["init"] = cls._warm_connection
+        else:
+            # Без кеша asyncpg использует безымянные statements
+            options["statement_cache_size"] = 0
+        return await asyncpg.create_pool(
+            dsn,
+            min_size=cls.min_size,
+            max_size=cls.max_size,
+            command_timeout=60,
+            **options,
+        )
+
+    @classmethod
+    async def _warm_connection(cls, connection: asyncpg.Connection) -> None:
+        """Hook init пула: PREPARE горячих запросов в кеш statements нового соединения"""
+        for query in cls.warm_queries:
+            try:
+                # Публичный prepare() кеш asyncpg не заполняет, а fetch() выполнил бы запрос
+                await connection._get_statement(query.sql, None)
+            except asyncpg.PostgresError as e:
+                # Например, первая установка: таблиц ещё нет, миграции идут после пула.
+                # Запрос будет подготовлен при первом использовании.
+                logger.debug(f"Не удалось подготовить {query.name}: {e}")
+
+    @classmethod
+    def use_pool(cls, pool: asyncpg.Pool, replica_pool: Optional[asyncpg.Pool] = None) -> None:
+        """Работа через чужой пул (общий процесс с ботом, см. run_all.py)"""
+        cls._pool = pool
+        cls._replica_pool = replica_pool
+        cls._owns_pool = False
+
+    @classmethod
+    async def close_pool(cls) -> None:
+        """Закрытие пула подключений"""
+        if cls._replica_check_task is not None:
+            cls._replica_check_task.cancel()
+            cls._replica_check_task = None
+        for pool in (cls._pool, cls._replica_pool):
+            if pool is not None and cls._owns_pool:
+                await pool.close()
+        cls._pool = None
+        cls._replica_pool = None
+
+    # --- Реплика ---
+
+    @classmethod
+    async def _check_replica(cls) -> None:
+        """Замер отставания реплики"""
+        cls._replica_checked_at = time.monotonic()
+        try:
+            async with cls._replica_pool.acquire() as connection:
+                lag = await connection.fetchval(REPLICA_LAG.sql, timeout=2)
+            cls._replica_lag = float(lag) if lag is not None else None
+        except Exception as e:
+            cls._replica_lag = None
+            logger.warning(f"Реплика недоступна, чтение идёт с primary: {e}")
+
+    @classmethod
+    def _schedule_replica_check(cls) -> None:
+        """Проверка отставания в фоне, не чаще раза в replica_check_interval"""
+        if time.monotonic() - cls._replica_checked_at < cls.replica_check_interval:
+            return
+        if cls._replica_check_task is not None and not cls._replica_check_task.done():
+            return
+        cls._replica_checked_at = time.monotonic()
+        cls._replica_check_task = asyncio.create_task(cls._check_replica())
+
+    @classmethod
+    def _read_pool(cls, query: QueryLike) -> Optional[asyncpg.Pool]:
+        """Пул реплики для этого запроса или None — выполнять на primary"""
+        if cls._replica_pool is None or not isinstance(query, Query) or not query.readonly:
+            return None
+        cls._schedule_replica_check()
+        lag = cls._replica_lag
+        if lag is None or lag > cls.replica_max_lag:
+            cls.replica_fallbacks += 1
+            return None
+        # Гость только что что-то записал — читаем его же записи с primary
+        written_until = _recent_writes.get(_current_user.get())
+        if written_until is not None and written_until > time.monotonic():
+            return None
+        return cls._replica_pool
+
+    @classmethod
+    def _record_write(cls) -> None:
+        if cls._replica_pool is not None:
+            _recent_writes.set(_current_user.get(), time.monotonic() + cls.read_your_writes_window)
+
+    @classmethod
+    def replica_stats(cls) -> Dict[str, Any]:
+        """Состояние реплики для /health"""
+        if cls._replica_pool is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "lag_seconds": cls._replica_lag,
+            "healthy": cls._replica_lag is not None and cls._replica_lag <= cls.replica_max_lag,
+            "reads": cls.replica_reads,
+            "fallbacks": cls.replica_fallbacks,
+        }
+
+    # --- Выполнение запросов ---
+
+    @classmethod
+    @asynccontextmanager
+    async def _acquire(
+        cls,
+        operation: str,
+        query: QueryLike,
+        pool: Optional[asyncpg.Pool] = None,
+    ) -> AsyncIterator[asyncpg.Connection]:
+        """
+        Соединение из пула для одного запроса: span трассировки «db.<operation>»
+        и время ожидания соединения
+        """
+        if isinstance(query, Query):
+            attrs = {"query": query.name, "sql": query.sql}
+        else:
+            attrs = {"sql": query}
+        if pool is not None:
+            attrs["replica"] = True
+        with span(f"db.{operation}", **attrs) as current:
+            started = time.perf_counter()
+            async with (pool or cls._pool).acquire() as connection:
+                wait = time.perf_counter() - started
+                if cls.acquire_wait_metric is not None:
+                    cls.acquire_wait_metric.observe(wait)
+                cls.stats.record_acquire(wait)
+                current.set("acquire_wait_ms", round(wait * 1000, 3))
+                yield connection
+
+    @classmethod
+    def _timer(cls, query: QueryLike, args: Sequence[Any]) -> QueryTimer:
+        if isinstance(query, Query):
+            return QueryTimer(cls.stats, query.sql, args, cls._pool, name=query.name)
+        return QueryTimer(cls.stats, query, args, cls._pool)
+
+    @classmethod
+    async def _run(cls, connection: Any, operation: str, query: QueryLike, args: Sequence[Any]) -> Any:
+        """
+        Запрос по тексту: кеш statements asyncpg подготавливает его на соединении
+        один раз, а после изменения схемы (миграция из другого процесса) сам
+        подготавливает заново
+        """
+        sql = query.sql if isinstance(query, Query) else query
+        return await getattr(connection, operation)(sql, *args)
+
+    @classmethod
+    async def _call(cls, operation: str, query: QueryLike, args: Sequence[Any]) -> Any:
+        """Запрос на реплике (если можно) или на primary"""
+        replica = cls._read_pool(query)
+        if replica is not None:
+            try:
+                # Тот же срок, что и на primary: зависшая реплика не держит гостя command_timeout секунд
+                result = await asyncio.wait_for(
+                    cls._run_on_replica(operation, query, args, replica), timeout=cls.query_timeout
+                )
+                cls.replica_reads += 1
+                return result
+            except _CONNECTION_ERRORS as e:
+                # До следующей проверки читаем с primary
+                cls._replica_lag = None
+                cls.replica_fallbacks += 1
+                logger.warning(f"Ошибка реплики, запрос повторён на primary: {type(e).__name__}: {e}")
+        result = await cls._call_primary(operation, query, args)
+        # Всё, что не помечено readonly, считаем записью (в т.ч. проверки перед записью)
+        if operation == "execute" or (isinstance(query, Query) and not query.readonly):
+            cls._record_write()
+        return result
+
+    @classmethod
+    async def _call_primary(cls, operation: str, query: QueryLike, args: Sequence[Any]) -> Any:
+        """Запрос на primary со сроком query_timeout и через выключатель"""
+        breaker = cls.breaker
+        if breaker is not None:
+            try:
+                breaker.before_call()
+            except CircuitOpenError as e:
+                raise DatabaseUnavailableError(str(e)) from e
+        try:
+            result = await asyncio.wait_for(
+                cls._run_on_primary(operation, query, args), timeout=cls.query_timeout
+            )
+        except _CONNECTION_ERRORS as e:
+            if breaker is not None:
+                breaker.record_failure(e)
+            raise DatabaseUnavailableError(f"БД недоступна: {type(e).__name__}: {e}") from e
+        except asyncpg.PostgresError:
+            # Ошибка в самом запросе: сервер ответил, значит, он доступен
+            if breaker is not None:
+                breaker.record_success()
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+    @classmethod
+    async def _run_on_primary(cls, operation: str, query: QueryLike, args: Sequence[Any]) -> Any:
+        async with cls._acquire(operation, query) as connection:
+            with cls._timer(query, args):
+                return await cls._run(connection, operation, query, args)
+
+    @classmethod
+    async def _run_on_replica(
+        cls, operation: str, query: QueryLike, args: Sequence[Any], replica: asyncpg.Pool
+    ) -> Any:
+        async with cls._acquire(operation, query, replica) as connection:
+            with cls._timer(query, args):
+                return await cls._run(connection, operation, query, args)
+
+    @classmethod
+    def health(cls) -> Dict[str, Any]:
+        """Состояние выключателя для /health"""
+        if cls.breaker is None:
+            return {"breaker": None}
+        return {"breaker": cls.breaker.stats(), "query_timeout": cls.query_timeout}
+
+    @classmethod
+    async def execute(cls, query: QueryLike, *args) -> str:
+        """Выполнение запроса без возврата результата"""
+        return await cls._call("execute", query, args)
+
+    @classmethod
+    async def fetch(cls, query: QueryLike, *args) -> list:
+        """Выполнение запроса с возвратом списка строк"""
+        return await cls._call("fetch", query, args)
+
+    @classmethod
+    async def fetchrow(cls, query: QueryLike, *args) -> Optional[asyncpg.Record]:
+        """Выполнение запроса с возвратом одной строки (Record читается как dict, без копии)"""
+        return await cls._call("fetchrow", query, args)
+
+    @classmethod
+    async def fetchval(cls, query: QueryLike, *args) -> Optional[Any]:
+        """Выполнение запроса с возвратом одного значения"""
+        return await cls._call("fetchval", query, args)
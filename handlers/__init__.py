@@ -1,15 +1,15 @@
+from . import info, dresscode, disclaimer, wishlist
+from .errors import router as errors_router
 from .start import router as start_router
-from .wishlist import router as wishlist_router
-from .info import router as info_router
-from .dresscode import router as dresscode_router
-from .disclaimer import router as disclaimer_router
 from .video import router as video_router
+from utils.dispatch_table import dispatch
+
+# Кнопки меню и inline-кнопки всех разделов выбираются по таблице (utils/dispatch_table.py)
+dispatch_router = dispatch.router
 
 __all__ = [
+    "dispatch_router",
+    "errors_router",
     "start_router",
-    "wishlist_router",
-    "info_router",
-    "dresscode_router",
-    "disclaimer_router",
     "video_router",
 ]
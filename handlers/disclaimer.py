@@ -1,15 +1,10 @@
-from aiogram import Router, F
 from aiogram.types import Message
-from keyboards.main_menu import get_main_menu_keyboard
-from messages import get_disclaimer_text
+from keyboards.main_menu import MENU_DISCLAIMER
+from responses import DISCLAIMER_REPLY
+from utils.dispatch_table import dispatch
 
-router = Router()
 
-
-@router.message(F.text == "📋 Дисклеймер")
+@dispatch.message(MENU_DISCLAIMER)
 async def disclaimer_handler(message: Message):
     """Обработчик раздела дисклеймера"""
-    await message.answer(
-        get_disclaimer_text(),
-        reply_markup=get_main_menu_keyboard()
-    )
+    return DISCLAIMER_REPLY.answer(message)
@@ -1,15 +1,10 @@
-from aiogram import Router, F
 from aiogram.types import Message
-from keyboards.main_menu import get_main_menu_keyboard
-from messages import get_dresscode_text
+from keyboards.main_menu import MENU_DRESSCODE
+from responses import DRESSCODE_REPLY
+from utils.dispatch_table import dispatch
 
-router = Router()
 
-
-@router.message(F.text == "👰‍♀️ Дресс-код")
+@dispatch.message(MENU_DRESSCODE)
 async def dresscode_handler(message: Message):
     """Обработчик раздела дресс-кода"""
-    await message.answer(
-        get_dresscode_text(),
-        reply_markup=get_main_menu_keyboard()
-    )
+    return DRESSCODE_REPLY.answer(message)
@@ -0,0 +1,26 @@
+"""
+Ответ гостю, когда обработчику не хватило БД (DatabaseUnavailableError).
+Просмотр вишлиста в этом случае идёт по последнему списку (handlers/wishlist.py),
+сюда попадают действия с записью — гость получает просьбу повторить позже.
+"""
+import logging
+from aiogram import Router
+from aiogram.filters import ExceptionTypeFilter
+from aiogram.types import ErrorEvent
+from database import DatabaseUnavailableError
+from messages import get_database_unavailable_text
+
+logger = logging.getLogger(__name__)
+router = Router()
+
+
+@router.errors(ExceptionTypeFilter(DatabaseUnavailableError))
+async def database_unavailable_handler(event: ErrorEvent):
+    """Вместо молчания — короткое «попробуй ещё раз»"""
+    update = event.update
+    logger.warning(f"БД недоступна при обработке обновления {update.update_id}: {event.exception}")
+    
+    if update.callback_query is not None:
+        return update.callback_query.answer(get_database_unavailable_text(), show_alert=True)
+    if update.message is not None:
+        return update.message.answer(get_database_unavailable_text())
@@ -1,45 +1,65 @@
 import logging
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
-from keyboards.main_menu import get_main_menu_keyboard
+from keyboards.main_menu import MENU_MAIN, get_main_menu_keyboard
+from database import DatabaseUnavailableError, queries
 from database.connection import Database
 from messages import get_welcome_message
+from responses import WELCOME_REPLY
 from utils.telegram_logger import send_to_logs_group
+from utils import callback_codec
+from utils.bot_calls import reply_concurrently
+from utils.dispatch_table import dispatch
+from utils.lru import LRUCache
+from utils.task_queue import side_effects
 from config import Config
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# Недавно зарегистрированные гости: user_id -> (username, first_name, last_name)
+KNOWN_USERS_CACHE_SIZE = 10000
+_known_users = LRUCache(KNOWN_USERS_CACHE_SIZE)
+
+
+async def _notify_new_user(log_message: str) -> None:
+    """Уведомление о новом пользователе в группу логов (выполняется в очереди side_effects)"""
+    logger.info(f"Попытка отправить уведомление в группу {Config.LOGS_GROUP_ID}")
+    try:
+        result = await send_to_logs_group(log_message)
+        if result:
+            logger.info("✅ Уведомление о новом пользователе успешно отправлено в группу")
+        else:
+            logger.warning("❌ Не удалось отправить уведомление о новом пользователе в группу")
+    except Exception as e:
+        logger.error(f"Ошибка при отправке уведомления о новом пользователе: {e}", exc_info=True)
+
 
 @router.message(Command("start"))
 async def cmd_start(message: Message):
     """Обработчик команды /start"""
     user = message.from_user
     
-    # Проверяем, новый ли это пользователь
-    existing_user = await Database.fetchrow(
-        "SELECT user_id FROM users WHERE user_id = $1",
-        user.id
-    )
-    is_new_user = existing_user is None
+    profile = (user.username, user.first_name, user.last_name)
+    
+    # Гость уже нажимал /start и профиль не менялся — в БД ходить не нужно
+    if _known_users.get(user.id) == profile:
+        return WELCOME_REPLY.answer(message, get_welcome_message(user.first_name or "друг"))
     
-    # Сохранение/обновление пользователя в БД
-    await Database.execute("""
-        INSERT INTO users (user_id, username, first_name, last_name)
-        VALUES ($1, $2, $3, $4)
-        ON CONFLICT (user_id) 
-        DO UPDATE SET 
-            username = EXCLUDED.username,
-            first_name = EXCLUDED.first_name,
-            last_name = EXCLUDED.last_name,
-            updated_at = CURRENT_TIMESTAMP
-    """, user.id, user.username, user.first_name, user.last_name)
+    # Сохранение/обновление пользователя и счётчика одним запросом
+    try:
+        row = await Database.fetchrow(queries.USER_UPSERT, user.id, user.username, user.first_name, user.last_name)
+    except DatabaseUnavailableError as e:
+        # Приветствию БД не нужна; гость сохранится при следующем /start
+        logger.warning(f"Не удалось сохранить пользователя {user.id}: {e}")
+        return WELCOME_REPLY.answer(message, get_welcome_message(user.first_name or "друг"))
+    _known_users.set(user.id, profile)
+    is_new_user = row["is_new_user"]
     
     # Если новый пользователь - логируем и отправляем в группу
     if is_new_user:
-        # Получаем общее количество пользователей
-        total_users = await Database.fetchval("SELECT COUNT(*) FROM users")
+        total_users = row["total_users"]
         
         user_info = f"{user.first_name or ''} {user.last_name or ''}".strip() or "Без имени"
         username_info = f"@{user.username}" if user.username else "без username"
@@ -54,44 +74,33 @@ async def cmd_start(message: Message):
         
         logger.info(f"Новый пользователь: {user_info} (@{user.username or 'нет'}, ID: {user.id}). Всего: {total_users}")
         
-        # Отправляем в группу
+        # Отправляем в группу в фоне, чтобы не задерживать приветствие
         if Config.LOGS_GROUP_ID:
-            logger.info(f"Попытка отправить уведомление в группу {Config.LOGS_GROUP_ID}")
-            try:
-                result = await send_to_logs_group(log_message)
-                if result:
-                    logger.info("✅ Уведомление о новом пользователе успешно отправлено в группу")
-                else:
-                    logger.warning("❌ Не удалось отправить уведомление о новом пользователе в группу")
-            except Exception as e:
-                logger.error(f"Ошибка при отправке уведомления о новом пользователе: {e}", exc_info=True)
+            await side_effects.submit(_notify_new_user, log_message)
         else:
             logger.warning("LOGS_GROUP_ID не установлен, пропускаем отправку уведомления")
     
-    await message.answer(
-        get_welcome_message(user.first_name or "друг"),
-        reply_markup=get_main_menu_keyboard()
-    )
+    return WELCOME_REPLY.answer(message, get_welcome_message(user.first_name or "друг"))
 
 
-@router.message(F.text == "🏠 Главное меню")
+@dispatch.message(MENU_MAIN)
 async def main_menu_handler(message: Message):
     """Обработчик возврата в главное меню"""
     user = message.from_user
     
-    await message.answer(
-        get_welcome_message(user.first_name or "друг"),
-        reply_markup=get_main_menu_keyboard()
-    )
+    # Клавиатура сериализована заранее — ответ уходит прямо в ответе на webhook
+    return WELCOME_REPLY.answer(message, get_welcome_message(user.first_name or "друг"))
 
 
-@router.callback_query(F.data == "main_menu")
+@dispatch.callback(callback_codec.MAIN_MENU)
 async def main_menu_callback_handler(callback: CallbackQuery):
     """Обработчик возврата в главное меню через callback"""
     user = callback.from_user
     
-    await callback.message.answer(
-        get_welcome_message(user.first_name or "друг"),
-        reply_markup=get_main_menu_keyboard()
+    return reply_concurrently(
+        callback.answer(),
+        callback.message.answer(
+            get_welcome_message(user.first_name or "друг"),
+            reply_markup=get_main_menu_keyboard()
+        ),
     )
-    await callback.answer()
@@ -1,26 +1,24 @@
 import logging
 from aiogram import Router, F, Bot
 from aiogram.types import Message
-from keyboards.main_menu import get_main_menu_keyboard
+from keyboards.main_menu import MENU_VIDEO, get_main_menu_keyboard
 from messages import get_video_text
+from responses import VIDEO_UNAVAILABLE_REPLY
+from utils.dispatch_table import dispatch
 from config import Config
 
 logger = logging.getLogger(__name__)
 router = Router()
 
 
-@router.message(F.text == "🎥 Видео-приглашение")
+@dispatch.message(MENU_VIDEO)
 async def video_handler(message: Message):
     """Обработчик раздела видео-приглашения"""
     
     # Проверяем наличие VIDEO_FILE_ID
     if not Config.VIDEO_FILE_ID:
         logger.warning("VIDEO_FILE_ID не установлен в конфигурации")
-        await message.answer(
-            "❌ Видео временно недоступно. Обратитесь к администратору.",
-            reply_markup=get_main_menu_keyboard()
-        )
-        return
+        return VIDEO_UNAVAILABLE_REPLY.answer(message)
     
     # Отправка видео по file_id
     try:
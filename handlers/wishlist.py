@@ -1,19 +1,17 @@
-from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import Message, CallbackQuery
 from typing import Optional
 from html import escape
-from keyboards.main_menu import get_main_menu_keyboard
+from keyboards.main_menu import MENU_WISHLIST
 from keyboards.wishlist import get_wishlist_keyboard, get_wishlist_item_keyboard
+from database import DatabaseUnavailableError, queries
 from database.connection import Database
-from messages import (
-    get_wishlist_intro,
-    get_wishlist_select_item_text,
-    get_wishlist_how_it_works_text,
-    get_wishlist_logistics_text,
-    get_wishlist_empty_text,
-)
-
-router = Router()
+from database.models import WishlistItem
+from utils import callback_codec
+from utils.bot_calls import reply_concurrently
+from utils.dispatch_table import dispatch
+from utils.message_edit import prepare_edit_text
+from messages import get_wishlist_how_it_works_text
+from responses import WISHLIST_EMPTY_REPLY, WISHLIST_INTRO_REPLY, WISHLIST_LOGISTICS_REPLY
 
 
 def _format_price_hint(raw: Optional[str]) -> str:
@@ -59,344 +57,224 @@ def _format_links_block(link: Optional[str], link2: Optional[str]) -> str:
     numbered = [f"{idx + 1}) {l}" for idx, l in enumerate(links)]
     return "<b>Ссылки:</b>\n" + "\n".join(numbered) + "\n\n"
 
-@router.message(F.text == "🎁 Вишлист")
+# Последний список подарков из БД: пока БД недоступна, вишлист листается по нему
+_wishlist_snapshot: Optional[list[WishlistItem]] = None
+
+
+async def _load_wishlist() -> list[WishlistItem]:
+    """Список подарков из БД, а при её недоступности — последний полученный"""
+    global _wishlist_snapshot
+    try:
+        items = await Database.fetch(queries.WISHLIST_WINDOW)
+    except DatabaseUnavailableError:
+        if _wishlist_snapshot is None:
+            raise
+        return _wishlist_snapshot
+    _wishlist_snapshot = [WishlistItem.from_record(item) for item in items]
+    return _wishlist_snapshot
+
+
+async def _load_item(item_id: int) -> Optional[WishlistItem]:
+    """Подарок из БД, а при её недоступности — из последнего списка"""
+    try:
+        row = await Database.fetchrow(queries.WISHLIST_ITEM, item_id)
+    except DatabaseUnavailableError:
+        if _wishlist_snapshot is None:
+            raise
+        return next((item for item in _wishlist_snapshot if item.id == item_id), None)
+    return WishlistItem.from_record(row) if row else None
+
+
+@dispatch.message(MENU_WISHLIST)
 async def wishlist_handler(message: Message):
     """Обработчик раздела виш-листа (первый экран с двумя кнопками)"""
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="📝 Открыть вишлист",
-                    callback_data="wishlist_open",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="✈️ Информация по логистике",
-                    callback_data="wishlist_logistics",
-                )
-            ],
-        ]
-    )
-    await message.answer(
-        get_wishlist_intro(),
-        reply_markup=keyboard,
-    )
+    # Текст и кнопки собраны заранее — ответ уходит прямо в ответе на webhook
+    return WISHLIST_INTRO_REPLY.answer(message)
 
 
-@router.callback_query(F.data == "wishlist_open")
+@dispatch.callback(callback_codec.WISHLIST_OPEN)
 async def wishlist_open_handler(callback: CallbackQuery):
     """Открытие списка подарков с объяснением, как работает вишлист"""
-    items = await Database.fetch(
-        """
-        SELECT id,
-               name,
-               description,
-               link,
-               link2,
-               price_hint,
-               is_taken,
-               taken_by_user_id,
-               ROW_NUMBER() OVER (ORDER BY is_taken, order_index, created_at) AS display_index
-        FROM wishlist_items
-        ORDER BY is_taken, order_index, created_at
-        """
-    )
+    items_list = await _load_wishlist()
 
-    if not items:
-        await callback.message.edit_text(
-            get_wishlist_empty_text(),
-            reply_markup=get_main_menu_keyboard(),
-        )
-        await callback.answer()
-        return
+    if not items_list:
+        return reply_concurrently(callback.answer(), WISHLIST_EMPTY_REPLY.edit(callback.message))
 
-    items_list = [dict(item) for item in items]
-    await callback.message.edit_text(
-        get_wishlist_how_it_works_text(),
-        reply_markup=get_wishlist_keyboard(items_list),
-        disable_web_page_preview=True,
+    return reply_concurrently(
+        callback.answer(),
+        prepare_edit_text(
+            callback.message,
+            get_wishlist_how_it_works_text(),
+            reply_markup=get_wishlist_keyboard(items_list),
+            disable_web_page_preview=True,
+        ),
     )
-    await callback.answer()
 
 
-@router.callback_query(F.data == "wishlist_logistics")
+@dispatch.callback(callback_codec.WISHLIST_LOGISTICS)
 async def wishlist_logistics_handler(callback: CallbackQuery):
     """Пояснение по логистике подарков"""
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="⬅️ Назад",
-                    callback_data="wishlist_back_to_intro",
-                )
-            ],
-        ]
-    )
-    await callback.message.edit_text(
-        get_wishlist_logistics_text(),
-        reply_markup=keyboard,
-        disable_web_page_preview=True,
-    )
-    await callback.answer()
+    return reply_concurrently(callback.answer(), WISHLIST_LOGISTICS_REPLY.edit(callback.message))
 
 
-@router.callback_query(F.data == "wishlist_back_to_intro")
+@dispatch.callback(callback_codec.WISHLIST_BACK_TO_INTRO)
 async def wishlist_back_to_intro_handler(callback: CallbackQuery):
     """Возврат с логистики к первому экрану вишлиста"""
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="📝 Открыть вишлист",
-                    callback_data="wishlist_open",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="✈️ Информация по логистике",
-                    callback_data="wishlist_logistics",
-                )
-            ],
-        ]
-    )
-    await callback.message.edit_text(
-        get_wishlist_intro(),
-        reply_markup=keyboard,
-    )
-    await callback.answer()
+    return reply_concurrently(callback.answer(), WISHLIST_INTRO_REPLY.edit(callback.message))
 
-@router.callback_query(F.data.startswith("wishlist_page_"))
-async def wishlist_page_handler(callback: CallbackQuery):
+@dispatch.callback(callback_codec.WISHLIST_PAGE)
+async def wishlist_page_handler(callback: CallbackQuery, page: int):
     """Обработчик переключения страниц виш-листа"""
-    page = int(callback.data.split("_")[-1])
-    
-    items = await Database.fetch("""
-        SELECT id,
-               name,
-               description,
-               link,
-               link2,
-               price_hint,
-               is_taken,
-               taken_by_user_id,
-               ROW_NUMBER() OVER (ORDER BY is_taken, order_index, created_at) AS display_index
-        FROM wishlist_items
-        ORDER BY is_taken, order_index, created_at
-    """)
-    
-    items_list = [dict(item) for item in items]
-    await callback.message.edit_text(
-        get_wishlist_how_it_works_text(),
-        reply_markup=get_wishlist_keyboard(items_list, page=page)
+    items_list = await _load_wishlist()
+    return reply_concurrently(
+        callback.answer(),
+        prepare_edit_text(
+            callback.message,
+            get_wishlist_how_it_works_text(),
+            reply_markup=get_wishlist_keyboard(items_list, page=page)
+        ),
     )
-    await callback.answer()
 
 
-@router.callback_query(F.data.startswith("wishlist_item_"))
-async def wishlist_item_handler(callback: CallbackQuery):
+@dispatch.callback(callback_codec.WISHLIST_ITEM)
+async def wishlist_item_handler(callback: CallbackQuery, item_id: int):
     """Обработчик просмотра конкретного товара"""
-    item_id = int(callback.data.split("_")[-1])
-    
-    item = await Database.fetchrow("""
-        SELECT *
-        FROM (
-            SELECT id,
-                   name,
-                   description,
-                   link,
-                   link2,
-                   price_hint,
-                   is_taken,
-                   taken_by_user_id,
-                   ROW_NUMBER() OVER (ORDER BY is_taken, order_index, created_at) AS display_index
-            FROM wishlist_items
-        ) wi
-        WHERE wi.id = $1
-    """, item_id)
+    item = await _load_item(item_id)
     
     if not item:
         await callback.answer("Товар не найден", show_alert=True)
         return
 
     user_id = callback.from_user.id
-    is_taken = item["is_taken"]
-    taken_by = item.get("taken_by_user_id")
+    is_taken = item.is_taken
+    taken_by = item.taken_by_user_id
     can_untake = bool(is_taken and taken_by == user_id)
 
     status = "✅ Этот подарок кто-то уже выбрал" if is_taken else "🛒 Доступно"
-    index = item.get("display_index")
-    title = f"{index}. {item['name']}" if index is not None else item["name"]
+    index = item.display_index
+    title = f"{index}. {item.name}" if index is not None else item.name
     text = f"<b>{title}</b>\n\n"
     
-    if item["description"]:
-        text += f"<b>Комментарий:</b> {item['description']}\n\n"
+    if item.description:
+        text += f"<b>Комментарий:</b> {item.description}\n\n"
     
-    if item.get("price_hint"):
-        text += f"<b>Стоимость:</b> {_format_price_hint(item['price_hint'])}\n\n"
-    links_block = _format_links_block(item.get("link"), item.get("link2"))
+    if item.price_hint:
+        text += f"<b>Стоимость:</b> {_format_price_hint(item.price_hint)}\n\n"
+    links_block = _format_links_block(item.link, item.link2)
     if links_block:
         text += links_block
     
     text += f"<b>Статус:</b> {status}"
     
-    await callback.message.edit_text(
-        text,
-        reply_markup=get_wishlist_item_keyboard(item_id, is_taken, can_untake),
-        disable_web_page_preview=True,
-        parse_mode="HTML",
+    return reply_concurrently(
+        callback.answer(),
+        prepare_edit_text(
+            callback.message,
+            text,
+            reply_markup=get_wishlist_item_keyboard(item_id, is_taken, can_untake),
+            disable_web_page_preview=True,
+            parse_mode="HTML",
+        ),
     )
-    await callback.answer()
 
 
-@router.callback_query(F.data.startswith("wishlist_take_"))
-async def wishlist_take_handler(callback: CallbackQuery):
+@dispatch.callback(callback_codec.WISHLIST_TAKE)
+async def wishlist_take_handler(callback: CallbackQuery, item_id: int):
     """Обработчик отметки товара как забранного"""
-    item_id = int(callback.data.split("_")[-1])
     user_id = callback.from_user.id
     
     # Проверяем, не забран ли уже товар
-    item = await Database.fetchrow("""
-        SELECT is_taken FROM wishlist_items WHERE id = $1
-    """, item_id)
+    item = await Database.fetchrow(queries.WISHLIST_ITEM_STATUS, item_id)
     
     if item and item["is_taken"]:
         await callback.answer("Этот товар уже забран!", show_alert=True)
         return
     
-    await Database.execute("""
-        UPDATE wishlist_items
-        SET is_taken = TRUE, taken_by_user_id = $1, updated_at = CURRENT_TIMESTAMP
-        WHERE id = $2
-    """, user_id, item_id)
-    
-    # Краткое уведомление без модального окна
-    await callback.answer("✅ Вы выбрали этот подарок!")
+    await Database.execute(queries.WISHLIST_TAKE, user_id, item_id)
     
     # Обновляем информацию о товаре
-    updated_item = await Database.fetchrow("""
-        SELECT *
-        FROM (
-            SELECT id,
-                   name,
-                   description,
-                   link,
-                   link2,
-                   price_hint,
-                   is_taken,
-                   taken_by_user_id,
-                   ROW_NUMBER() OVER (ORDER BY is_taken, order_index, created_at) AS display_index
-            FROM wishlist_items
-        ) wi
-        WHERE wi.id = $1
-    """, item_id)
+    updated_item = await _load_item(item_id)
     
     status = "✅ Этот подарок кто-то уже выбрал"
-    index = updated_item.get("display_index")
-    title = f"{index}. {updated_item['name']}" if index is not None else updated_item["name"]
+    index = updated_item.display_index
+    title = f"{index}. {updated_item.name}" if index is not None else updated_item.name
     text = f"<b>{title}</b>\n\n"
-    if updated_item["description"]:
-        text += f"<b>Комментарий:</b> {updated_item['description']}\n\n"
-    if updated_item.get("price_hint"):
-        text += f"<b>Стоимость:</b> {_format_price_hint(updated_item['price_hint'])}\n\n"
-    links_block = _format_links_block(updated_item.get("link"), updated_item.get("link2"))
+    if updated_item.description:
+        text += f"<b>Комментарий:</b> {updated_item.description}\n\n"
+    if updated_item.price_hint:
+        text += f"<b>Стоимость:</b> {_format_price_hint(updated_item.price_hint)}\n\n"
+    links_block = _format_links_block(updated_item.link, updated_item.link2)
     if links_block:
         text += links_block
     text += f"<b>Статус:</b> {status}"
     
-    await callback.message.edit_text(
-        text,
-        # Этот пользователь только что выбрал подарок — даём возможность отменить
-        reply_markup=get_wishlist_item_keyboard(item_id, True, can_untake=True),
-        disable_web_page_preview=True,
-        parse_mode="HTML",
+    # Краткое уведомление без модального окна отправляем параллельно с обновлением карточки
+    return reply_concurrently(
+        callback.answer("✅ Вы выбрали этот подарок!"),
+        prepare_edit_text(
+            callback.message,
+            text,
+            # Этот пользователь только что выбрал подарок — даём возможность отменить
+            reply_markup=get_wishlist_item_keyboard(item_id, True, can_untake=True),
+            disable_web_page_preview=True,
+            parse_mode="HTML",
+        ),
     )
 
 
-@router.callback_query(F.data.startswith("wishlist_untake_"))
-async def wishlist_untake_handler(callback: CallbackQuery):
+@dispatch.callback(callback_codec.WISHLIST_UNTAKE)
+async def wishlist_untake_handler(callback: CallbackQuery, item_id: int):
     """Обработчик отмены отметки товара"""
-    item_id = int(callback.data.split("_")[-1])
     user_id = callback.from_user.id
     
     # Проверяем, что товар был забран именно этим пользователем
-    item = await Database.fetchrow("""
-        SELECT taken_by_user_id FROM wishlist_items WHERE id = $1
-    """, item_id)
+    item = await Database.fetchrow(queries.WISHLIST_ITEM_STATUS, item_id)
     
     if not item or item["taken_by_user_id"] != user_id:
         await callback.answer("Вы не можете отменить эту отметку", show_alert=True)
         return
     
-    await Database.execute("""
-        UPDATE wishlist_items
-        SET is_taken = FALSE, taken_by_user_id = NULL, updated_at = CURRENT_TIMESTAMP
-        WHERE id = $1
-    """, item_id)
-    
-    # Краткое уведомление без модального окна
-    await callback.answer("Вы отменили выбор этого подарка")
+    await Database.execute(queries.WISHLIST_UNTAKE, item_id)
     
     # Обновляем информацию о товаре
-    updated_item = await Database.fetchrow("""
-        SELECT *
-        FROM (
-            SELECT id,
-                   name,
-                   description,
-                   link,
-                   link2,
-                   price_hint,
-                   is_taken,
-                   taken_by_user_id,
-                   ROW_NUMBER() OVER (ORDER BY is_taken, order_index, created_at) AS display_index
-            FROM wishlist_items
-        ) wi
-        WHERE wi.id = $1
-    """, item_id)
+    updated_item = await _load_item(item_id)
     
     status = "🛒 Доступно"
-    index = updated_item.get("display_index")
-    title = f"{index}. {updated_item['name']}" if index is not None else updated_item["name"]
+    index = updated_item.display_index
+    title = f"{index}. {updated_item.name}" if index is not None else updated_item.name
     text = f"<b>{title}</b>\n\n"
-    if updated_item["description"]:
-        text += f"<b>Комментарий:</b> {updated_item['description']}\n\n"
-    if updated_item.get("price_hint"):
-        text += f"<b>Стоимость:</b> {_format_price_hint(updated_item['price_hint'])}\n\n"
-    links_block = _format_links_block(updated_item.get("link"), updated_item.get("link2"))
+    if updated_item.description:
+        text += f"<b>Комментарий:</b> {updated_item.description}\n\n"
+    if updated_item.price_hint:
+        text += f"<b>Стоимость:</b> {_format_price_hint(updated_item.price_hint)}\n\n"
+    links_block = _format_links_block(updated_item.link, updated_item.link2)
     if links_block:
         text += links_block
     text += f"<b>Статус:</b> {status}"
     
-    await callback.message.edit_text(
-        text,
-        # Подарок снова свободен — показываем кнопку выбора
-        reply_markup=get_wishlist_item_keyboard(item_id, False, can_untake=False),
-        disable_web_page_preview=True,
-        parse_mode="HTML",
+    # Краткое уведомление без модального окна отправляем параллельно с обновлением карточки
+    return reply_concurrently(
+        callback.answer("Вы отменили выбор этого подарка"),
+        prepare_edit_text(
+            callback.message,
+            text,
+            # Подарок снова свободен — показываем кнопку выбора
+            reply_markup=get_wishlist_item_keyboard(item_id, False, can_untake=False),
+            disable_web_page_preview=True,
+            parse_mode="HTML",
+        ),
     )
 
 
-@router.callback_query(F.data == "wishlist_list")
+@dispatch.callback(callback_codec.WISHLIST_LIST)
 async def wishlist_list_handler(callback: CallbackQuery):
     """Обработчик возврата к списку товаров"""
-    items = await Database.fetch("""
-        SELECT id,
-               name,
-               description,
-               link,
-               link2,
-               price_hint,
-               is_taken,
-               taken_by_user_id,
-               ROW_NUMBER() OVER (ORDER BY is_taken, order_index, created_at) AS display_index
-        FROM wishlist_items
-        ORDER BY is_taken, order_index, created_at
-    """)
-    
-    items_list = [dict(item) for item in items]
-    await callback.message.edit_text(
-        get_wishlist_how_it_works_text(),
-        reply_markup=get_wishlist_keyboard(items_list)
+    items_list = await _load_wishlist()
+    return reply_concurrently(
+        callback.answer(),
+        prepare_edit_text(
+            callback.message,
+            get_wishlist_how_it_works_text(),
+            reply_markup=get_wishlist_keyboard(items_list)
+        ),
     )
-    await callback.answer()
@@ -0,0 +1 @@
+"""Проверки слоя БД на живых серверах PostgreSQL (python -m integration.<проверка>)"""
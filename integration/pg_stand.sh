@@ -0,0 +1,59 @@
+#!/usr/bin/env bash
+
+# Пара PostgreSQL для проверок из integration/: primary и потоковая реплика
+# (standby из pg_basebackup). Вход без пароля, только с 127.0.0.1.
+#
+# Использование:
+#   integration/pg_stand.sh start /tmp/wedding-pg   # при первом запуске создаёт кластеры
+#   integration/pg_stand.sh stop /tmp/wedding-pg
+#
+# Бинарники PostgreSQL (initdb, pg_ctl, pg_basebackup) берутся из PG_BIN или PATH.
+# Порты: PRIMARY_PORT (по умолчанию 55432) и REPLICA_PORT (55433).
+# PostgreSQL не запускается от root — запускайте от обычного пользователя.
+
+set -euo pipefail
+
+ACTION="${1:-}"
+DIR="${2:-}"
+if [ -z "$ACTION" ] || [ -z "$DIR" ]; then
+  echo "Использование: $0 start|stop <каталог>"
+  exit 1
+fi
+
+PRIMARY_PORT="${PRIMARY_PORT:-55432}"
+REPLICA_PORT="${REPLICA_PORT:-55433}"
+if [ -n "${PG_BIN:-}" ]; then
+  PATH="$PG_BIN:$PATH"
+fi
+
+case "$ACTION" in
+  start)
+    if [ ! -d "$DIR/primary" ]; then
+      mkdir -p "$DIR"
+      initdb -D "$DIR/primary" -U postgres -A trust --encoding=UTF8 >/dev/null
+      cat >> "$DIR/primary/postgresql.conf" <<EOF
+listen_addresses = '127.0.0.1'
+port = $PRIMARY_PORT
+unix_socket_directories = '$DIR'
+EOF
+      pg_ctl -D "$DIR/primary" -l "$DIR/primary.log" -w start
+      # -R: standby.signal и primary_conninfo — реплика сразу читает WAL с primary
+      pg_basebackup -h 127.0.0.1 -p "$PRIMARY_PORT" -U postgres -D "$DIR/replica" -R -X stream
+      echo "port = $REPLICA_PORT" >> "$DIR/replica/postgresql.conf"
+      pg_ctl -D "$DIR/replica" -l "$DIR/replica.log" -w start
+    else
+      pg_ctl -D "$DIR/primary" -l "$DIR/primary.log" -w start
+      pg_ctl -D "$DIR/replica" -l "$DIR/replica.log" -w start
+    fi
+    echo "primary: postgresql://postgres@127.0.0.1:$PRIMARY_PORT/postgres"
+    echo "replica: postgresql://postgres@127.0.0.1:$REPLICA_PORT/postgres"
+    ;;
+  stop)
+    pg_ctl -D "$DIR/replica" -w -m fast stop || true
+    pg_ctl -D "$DIR/primary" -w -m fast stop || true
+    ;;
+  *)
+    echo "Неизвестное действие: $ACTION (start или stop)"
+    exit 1
+    ;;
+esac
@@ -0,0 +1,160 @@
+"""
+Проверка режима DB_POOLER_MODE=transaction на живом PostgreSQL через
+пулер-заглушку в режиме transaction (integration/txn_pooler.py).
+
+Запуск из корня репозитория (сервер пускает без пароля, например из
+integration/pg_stand.sh):
+    python -m integration.pooler_check --database-url postgresql://postgres@127.0.0.1:55432/postgres
+
+Клиентов больше, чем серверных соединений пулера, так что соседние запросы
+одного соединения asyncpg попадают на разные серверные. Проверяется:
+- контроль: в режиме session (именованные prepared statements) запросы за
+  пулером падают с «prepared statement ... does not exist» — заглушка
+  действительно ведёт себя как пулер в режиме transaction;
+- в режиме transaction проходят миграции (транзакция под
+  pg_advisory_xact_lock) и параллельные запросы бота: вишлист, /start,
+  «Выбрать»/«Отменить выбор», запись активности;
+- запрос сброса сессии (RESET ALL ...) при возврате соединения в пул asyncpg
+  не отправляется.
+
+Режим DB_POOLER_PREPARED_STATEMENTS=true заглушка не проверяет: для него нужен
+PgBouncer 1.21+ с max_prepared_statements. Тест добавляет подарок и гостей и
+удаляет их в конце.
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import Database, init_db, queries
+from integration.tcp_proxy import via_port
+from integration.txn_pooler import TransactionPooler
+
+ITEM_NAME = "[pooler-check] Подарок"
+GUEST_ID_BASE = 9_200_000_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Режим transaction-пулера на живом PostgreSQL")
+    parser.add_argument("--database-url", required=True, help="PostgreSQL без пароля (trust)")
+    parser.add_argument("--server-connections", type=int, default=3, help="серверных соединений у пулера")
+    parser.add_argument("--guests", type=int, default=20, help="параллельных гостей")
+    parser.add_argument("--rounds", type=int, default=20, help="действий каждого гостя")
+    return parser.parse_args()
+
+
+async def workload(item_id: int, guests: int, rounds: int) -> Counter:
+    """Запросы бота от параллельных гостей; возвращает ошибки по типам"""
+    errors: Counter = Counter()
+
+    async def guest(user_id: int) -> None:
+        for _ in range(rounds):
+            try:
+                await Database.fetch(queries.WISHLIST_WINDOW)
+                await Database.fetchrow(queries.WISHLIST_ITEM, item_id)
+                await Database.fetchrow(queries.USER_UPSERT, user_id, f"guest{user_id}", "Гость", None)
+                status = await Database.fetchrow(queries.WISHLIST_ITEM_STATUS, item_id)
+                if not status["is_taken"]:
+                    await Database.execute(queries.WISHLIST_TAKE, user_id, item_id)
+                    await Database.execute(queries.WISHLIST_UNTAKE, item_id)
+                await Database.execute(queries.USERS_FLUSH_ACTIVITY, [user_id], [datetime.now()], [1])
+            except Exception as e:
+                errors[f"{type(e).__name__}: {e}"] += 1
+
+    await asyncio.gather(*(guest(GUEST_ID_BASE + n) for n in range(guests)))
+    return errors
+
+
+async def run_mode(args: argparse.Namespace, mode: str, item_id: int) -> tuple:
+    """Пул Database в заданном режиме через свежий пулер; (ошибки, пулер)"""
+    target = urlsplit(args.database_url)
+    pooler = TransactionPooler(
+        target.hostname or "127.0.0.1",
+        target.port or 5432,
+        user=target.username or "postgres",
+        database=target.path.lstrip("/") or "postgres",
+        pool_size=args.server_connections,
+    )
+    port = await pooler.start()
+    Database.dsn = via_port(args.database_url, port)
+    Database.pooler_mode = mode
+    Database.pooler_prepared_statements = False
+    try:
+        await Database.create_pool()
+        if mode == "transaction":
+            await init_db()
+        errors = await workload(item_id, args.guests, args.rounds)
+    finally:
+        await Database.close_pool()
+        await pooler.stop()
+    return errors, pooler
+
+
+async def run(args: argparse.Namespace) -> bool:
+    # Без реплики и с пулом больше, чем соединений у пулера
+    Database.replica_dsn = ""
+    Database.min_size = 1
+    Database.max_size = args.server_connections * 3
+
+    # Подготовка — напрямую, без пулера
+    Database.dsn = args.database_url
+    Database.pooler_mode = "session"
+    await Database.create_pool()
+    try:
+        await init_db()
+        item_id = await Database.fetchval(
+            "INSERT INTO wishlist_items (name, order_index) VALUES ($1, 0) RETURNING id", ITEM_NAME
+        )
+    finally:
+        await Database.close_pool()
+
+    ok = True
+    try:
+        errors, pooler = await run_mode(args, "session", item_id)
+        missing = sum(n for error, n in errors.items() if "does not exist" in error)
+        print(
+            f"{'✅' if missing else '❌'} контроль, режим session: {missing} ошибок "
+            f"«prepared statement does not exist», сбросов сессии {pooler.reset_queries}"
+        )
+        ok &= missing > 0
+
+        errors, pooler = await run_mode(args, "transaction", item_id)
+        print(
+            f"{'✅' if not errors else '❌'} режим transaction: {args.guests}×{args.rounds} действий гостей, "
+            f"ошибок {sum(errors.values())}, выдач серверных соединений {pooler.checkouts}"
+        )
+        for error, count in errors.most_common(5):
+            print(f"    {count} × {error}")
+        ok &= not errors
+        print(f"{'✅' if not pooler.reset_queries else '❌'} сбросов сессии в режиме transaction: {pooler.reset_queries}")
+        ok &= not pooler.reset_queries
+    finally:
+        Database.dsn = args.database_url
+        Database.pooler_mode = "session"
+        await Database.create_pool()
+        try:
+            await Database.execute("DELETE FROM wishlist_items WHERE id = $1", item_id)
+            status = await Database.execute(
+                "DELETE FROM users WHERE user_id >= $1 AND user_id < $2", GUEST_ID_BASE, GUEST_ID_BASE + args.guests
+            )
+            await Database.execute(
+                "UPDATE users_counter SET total = GREATEST(total - $1, 0) WHERE id = 1", int(status.split()[-1])
+            )
+        finally:
+            await Database.close_pool()
+    return ok
+
+
+def main() -> None:
+    args = parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
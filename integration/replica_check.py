@@ -0,0 +1,243 @@
+"""
+Проверка чтения с реплики на паре живых PostgreSQL: primary и потоковая
+реплика (например, из integration/pg_stand.sh).
+
+Запуск из корня репозитория (нужен суперпользователь: pg_wal_replay_pause):
+    integration/pg_stand.sh start /tmp/wedding-pg
+    python -m integration.replica_check \\
+        --primary-url postgresql://postgres@127.0.0.1:55432/postgres \\
+        --replica-url postgresql://postgres@127.0.0.1:55433/postgres
+
+Гости нажимают кнопки вишлиста через настоящие обработчики и
+DatabaseUserMiddleware; Bot API — заглушка из loadtest/fake_bot_api.py, по
+последнему editMessageText видно, какие кнопки показала карточка подарка.
+Реплика подключена через TCP-прокси (integration/tcp_proxy.py), чтобы можно
+было оборвать соединения с ней. Проверяется:
+- чтения вишлиста идут на реплику;
+- read-your-writes: пока воспроизведение WAL на реплике остановлено, гость
+  после «Выбрать»/«Отменить выбор» сразу видит свой выбор (его чтения идут на
+  primary), а другой гость в это время читает с реплики и видит старое;
+- отставание больше replica_max_lag — чтение с primary;
+- обрыв соединения с репликой — запрос повторяется на primary;
+- реплика догнала primary или снова доступна — чтение возвращается на неё.
+Тест добавляет подарок и двух гостей на primary и удаляет их в конце.
+"""
+import argparse
+import asyncio
+import itertools
+import sys
+from pathlib import Path
+from typing import Tuple
+from urllib.parse import urlsplit
+
+import asyncpg
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import Database, init_db
+from handlers import dispatch_router, errors_router
+from integration.tcp_proxy import TcpProxy, via_port
+from loadtest.fake_bot_api import FakeBotAPI
+from loadtest.scenarios import callback_update
+from middlewares import DatabaseUserMiddleware
+from utils import callback_codec
+from utils.bot_calls import drain_background_calls
+
+ITEM_NAME = "[replica-check] Сервиз"
+GUEST_A = 9_300_000_001
+GUEST_B = 9_300_000_002
+
+_message_ids = itertools.count(1)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Чтение с реплики на паре живых PostgreSQL")
+    parser.add_argument("--primary-url", required=True)
+    parser.add_argument("--replica-url", required=True, help="потоковая реплика primary")
+    parser.add_argument("--max-lag", type=float, default=3.0, help="replica_max_lag, с")
+    parser.add_argument("--read-your-writes", type=float, default=2.0, help="read_your_writes_window, с")
+    return parser.parse_args()
+
+
+class Check:
+    """Сценарий проверки: бот, заглушка Bot API, прямое соединение с репликой"""
+
+    def __init__(self, args: argparse.Namespace, api: FakeBotAPI, bot: Bot, dp: Dispatcher):
+        self.args = args
+        self.api = api
+        self.bot = bot
+        self.dp = dp
+        self.replica: asyncpg.Connection = None
+        self.item_id = 0
+        self.ok = True
+
+    def expect(self, condition: bool, title: str, details: str = "") -> None:
+        print(f"{'✅' if condition else '❌'} {title}" + (f" ({details})" if details else ""))
+        self.ok &= condition
+
+    async def press(self, user_id: int, action: str) -> Tuple[int, int, str]:
+        """
+        Гость нажимает кнопку подарка. Возвращает, сколько чтений ушло на
+        реплику, сколько раз реплику пропустили, и кнопки карточки после нажатия
+        """
+        update = callback_update(user_id, callback_codec.encode(action, self.item_id))
+        # Свой message_id на каждое нажатие: одинаковые правки одного сообщения бот пропускает
+        update["callback_query"]["message"]["message_id"] = next(_message_ids)
+        reads, fallbacks = Database.replica_reads, Database.replica_fallbacks
+        self.api.reset()
+        await self.dp.feed_update(self.bot, Update.model_validate(update, context={"bot": self.bot}))
+        await drain_background_calls()
+        markup = self.api.last_fields.get("editMessageText", {}).get("reply_markup", "")
+        if callback_codec.encode(callback_codec.WISHLIST_TAKE, self.item_id) in markup:
+            buttons = "выбрать"
+        elif callback_codec.encode(callback_codec.WISHLIST_UNTAKE, self.item_id) in markup:
+            buttons = "отменить"
+        else:
+            buttons = "нет"
+        return Database.replica_reads - reads, Database.replica_fallbacks - fallbacks, buttons
+
+    async def caught_up(self) -> None:
+        """Ждёт, пока реплика воспроизведёт весь WAL primary"""
+        lsn = await Database.fetchval("SELECT pg_current_wal_lsn()::text")
+        for _ in range(100):
+            if await self.replica.fetchval("SELECT pg_last_wal_replay_lsn() >= $1::text::pg_lsn", lsn):
+                return
+            await asyncio.sleep(0.1)
+        raise RuntimeError("Реплика не догнала primary за 10 секунд")
+
+    async def refresh_lag(self) -> None:
+        # Фоновая проверка отставания отключена (см. run) — замеряем явно
+        await Database._check_replica()
+
+    async def run(self, proxy: TcpProxy) -> None:
+        args = self.args
+        self.item_id = await Database.fetchval(
+            "INSERT INTO wishlist_items (name, order_index) VALUES ($1, 0) RETURNING id", ITEM_NAME
+        )
+        await Database.execute(
+            "INSERT INTO users (user_id, first_name) VALUES ($1, 'Гость'), ($2, 'Гость') ON CONFLICT DO NOTHING",
+            GUEST_A,
+            GUEST_B,
+        )
+        await self.caught_up()
+        await self.refresh_lag()
+
+        reads, fallbacks, buttons = await self.press(GUEST_B, callback_codec.WISHLIST_ITEM)
+        self.expect((reads, fallbacks, buttons) == (1, 0, "выбрать"), "карточка подарка читается с реплики")
+
+        # Реплика перестаёт воспроизводить WAL сразу после свежей записи: отставание считается от неё
+        await Database.execute("UPDATE wishlist_items SET updated_at = CURRENT_TIMESTAMP WHERE id = $1", self.item_id)
+        await self.caught_up()
+        await self.replica.execute("SELECT pg_wal_replay_pause()")
+
+        reads, _, _ = await self.press(GUEST_A, callback_codec.WISHLIST_TAKE)
+        self.expect(reads == 0, "«Выбрать»: чтения гостя идут на primary")
+        reads, fallbacks, buttons = await self.press(GUEST_A, callback_codec.WISHLIST_ITEM)
+        self.expect(
+            (reads, buttons) == (0, "отменить"),
+            "после «Выбрать» гость сразу видит свой выбор",
+            f"чтений с реплики {reads}, кнопки: {buttons}",
+        )
+        await self.refresh_lag()
+        reads, fallbacks, buttons = await self.press(GUEST_B, callback_codec.WISHLIST_ITEM)
+        self.expect(
+            (reads, buttons) == (1, "выбрать"),
+            "другой гость в это время читает с отстающей реплики (видит старое)",
+            f"отставание {Database._replica_lag}",
+        )
+        reads, _, _ = await self.press(GUEST_A, callback_codec.WISHLIST_UNTAKE)
+        self.expect(reads == 0, "«Отменить выбор»: чтения гостя идут на primary")
+        reads, fallbacks, buttons = await self.press(GUEST_A, callback_codec.WISHLIST_ITEM)
+        self.expect(
+            (reads, buttons) == (0, "выбрать"),
+            "после «Отменить выбор» гость сразу видит подарок свободным",
+            f"чтений с реплики {reads}, кнопки: {buttons}",
+        )
+        await self.press(GUEST_A, callback_codec.WISHLIST_TAKE)
+
+        await asyncio.sleep(args.max_lag + 1)
+        await self.refresh_lag()
+        reads, fallbacks, buttons = await self.press(GUEST_B, callback_codec.WISHLIST_ITEM)
+        self.expect(
+            (reads, fallbacks, buttons) == (0, 1, "нет"),
+            f"отставание больше {args.max_lag} с — чтение с primary",
+            f"отставание {Database._replica_lag}, кнопки: {buttons}",
+        )
+
+        await self.replica.execute("SELECT pg_wal_replay_resume()")
+        await self.caught_up()
+        await self.refresh_lag()
+        reads, fallbacks, buttons = await self.press(GUEST_A, callback_codec.WISHLIST_ITEM)
+        self.expect(
+            (reads, fallbacks, buttons) == (1, 0, "отменить"),
+            "реплика догнала primary — чтение снова с неё",
+        )
+
+        await proxy.cut()
+        reads, fallbacks, buttons = await self.press(GUEST_B, callback_codec.WISHLIST_ITEM)
+        self.expect(
+            (reads, fallbacks, buttons) == (0, 1, "нет") and not Database.replica_stats()["healthy"],
+            "обрыв соединения с репликой — запрос повторён на primary",
+        )
+        await proxy.restore()
+        await self.refresh_lag()
+        reads, fallbacks, buttons = await self.press(GUEST_B, callback_codec.WISHLIST_ITEM)
+        self.expect((reads, fallbacks) == (1, 0), "реплика снова доступна — чтение с неё")
+
+    async def cleanup(self) -> None:
+        try:
+            await self.replica.execute("SELECT pg_wal_replay_resume()")
+        except asyncpg.PostgresError:
+            pass
+        await Database.execute("DELETE FROM wishlist_items WHERE id = $1", self.item_id)
+        await Database.execute("DELETE FROM users WHERE user_id IN ($1, $2)", GUEST_A, GUEST_B)
+
+
+async def run(args: argparse.Namespace) -> bool:
+    api = FakeBotAPI()
+    bot = Bot(
+        "123456:REPLICACHECK",
+        session=AiohttpSession(api=TelegramAPIServer.from_base(await api.start())),
+    )
+    dp = Dispatcher()
+    dp.update.outer_middleware(DatabaseUserMiddleware())
+    dp.include_router(dispatch_router)
+    dp.include_router(errors_router)
+
+    replica = urlsplit(args.replica_url)
+    proxy = TcpProxy(replica.hostname or "127.0.0.1", replica.port or 5432)
+    Database.dsn = args.primary_url
+    Database.replica_dsn = via_port(args.replica_url, await proxy.start())
+    Database.replica_max_lag = args.max_lag
+    Database.read_your_writes_window = args.read_your_writes
+    # Отставание замеряется явно в нужные моменты (Check.refresh_lag)
+    Database.replica_check_interval = 3600
+
+    check = Check(args, api, bot, dp)
+    await Database.create_pool()
+    check.replica = await asyncpg.connect(args.replica_url)
+    try:
+        await init_db()
+        await check.run(proxy)
+    finally:
+        await check.cleanup()
+        await check.replica.close()
+        await Database.close_pool()
+        await proxy.stop()
+        await bot.session.close()
+        await api.stop()
+    return check.ok
+
+
+def main() -> None:
+    args = parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
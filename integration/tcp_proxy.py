@@ -0,0 +1,76 @@
+"""
+TCP-прокси до сервера БД для integration/replica_check.py: через него можно
+«уронить» сервер для клиента — cut() обрывает открытые соединения и перестаёт
+принимать новые (в подключении будет отказано), restore() открывает порт снова.
+"""
+import asyncio
+from typing import Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+
+_CHUNK = 64 * 1024
+
+
+def via_port(url: str, port: int) -> str:
+    """Тот же DSN, но на 127.0.0.1:<port> (прокси или пулер перед сервером)"""
+    parts = urlsplit(url)
+    auth = parts.netloc.rpartition("@")[0]
+    netloc = f"{auth}@127.0.0.1:{port}" if auth else f"127.0.0.1:{port}"
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+class TcpProxy:
+    """Прокси 127.0.0.1:<port> -> target_host:target_port"""
+
+    def __init__(self, target_host: str, target_port: int):
+        self.target_host = target_host
+        self.target_port = target_port
+        self.port = 0
+        self._listener: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self, port: int = 0) -> int:
+        """Открывает порт (0 — любой свободный) и возвращает его"""
+        self._listener = await asyncio.start_server(self._serve, "127.0.0.1", port or self.port)
+        self.port = self._listener.sockets[0].getsockname()[1]
+        return self.port
+
+    async def cut(self) -> None:
+        """Обрыв: открытые соединения закрываются, новые получают отказ"""
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+
+    async def restore(self) -> None:
+        await self.start(self.port)
+
+    async def stop(self) -> None:
+        await self.cut()
+
+    async def _serve(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter) -> None:
+        try:
+            server_reader, server_writer = await asyncio.open_connection(self.target_host, self.target_port)
+        except OSError:
+            client_writer.close()
+            return
+        self._writers.update((client_writer, server_writer))
+        await asyncio.gather(
+            self._pipe(client_reader, server_writer),
+            self._pipe(server_reader, client_writer),
+        )
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                data = await reader.read(_CHUNK)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
@@ -0,0 +1,210 @@
+"""
+Пулер-заглушка в режиме transaction (как PgBouncer с pool_mode=transaction)
+для integration/pooler_check.py.
+
+Серверное соединение выдаётся клиенту с его первого сообщения и до
+ReadyForQuery со статусом «вне транзакции» (I), когда обработаны все его
+Sync/Query; потом оно возвращается в общий пул, и следующий запрос клиента
+может попасть на другое. Поэтому, как и за настоящим пулером, состояние
+сессии (именованные prepared statements, SET) с одного серверного соединения
+на другом не видно.
+
+Упрощения: к серверу — только без пароля (trust) и под одним пользователем и
+базой для всех клиентов; SSL и отмена запросов не поддерживаются.
+"""
+import asyncio
+import struct
+from typing import List, Optional, Set, Tuple
+
+PROTOCOL_VERSION = 196608
+SSL_REQUEST = 80877103
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[bytes, bytes]:
+    """Сообщение протокола PostgreSQL: (тип, тело)"""
+    header = await reader.readexactly(5)
+    (length,) = struct.unpack("!I", header[1:])
+    return header[:1], await reader.readexactly(length - 4)
+
+
+def encode_message(kind: bytes, body: bytes = b"") -> bytes:
+    return kind + struct.pack("!I", len(body) + 4) + body
+
+
+class _Server:
+    """Серверное соединение пулера"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+
+class _Client:
+    """Состояние клиента: выданное ему серверное соединение и неотвеченные Sync/Query"""
+
+    def __init__(self):
+        self.server: Optional[_Server] = None
+        self.pending = 0
+        self.pump: Optional[asyncio.Task] = None
+
+
+class TransactionPooler:
+    """Слушает порт и раздаёт клиентам pool_size серверных соединений по транзакциям"""
+
+    def __init__(self, host: str, port: int, user: str, database: str, pool_size: int = 2):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.database = database
+        self.pool_size = pool_size
+        # Сколько раз клиенту выдавалось серверное соединение
+        self.checkouts = 0
+        # Запросы сброса сессии (asyncpg шлёт их при возврате соединения в свой пул)
+        self.reset_queries = 0
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle: List[_Server] = []
+        self._parameters = b""  # ParameterStatus сервера для приветствия клиентов
+        self._listener: Optional[asyncio.AbstractServer] = None
+        self._client_writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Запускает пулер и возвращает его порт (0 — любой свободный)"""
+        self._listener = await asyncio.start_server(self._serve_client, host, port)
+        return self._listener.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        for writer in list(self._client_writers):
+            writer.close()
+        for server in self._idle:
+            server.writer.close()
+        self._idle.clear()
+
+    # --- Серверные соединения ---
+
+    async def _open_server(self) -> _Server:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        params = b""
+        for key, value in (
+            ("user", self.user),
+            ("database", self.database),
+            ("client_encoding", "UTF8"),
+            ("application_name", "txn-pooler"),
+        ):
+            params += key.encode() + b"\0" + value.encode() + b"\0"
+        body = struct.pack("!I", PROTOCOL_VERSION) + params + b"\0"
+        writer.write(struct.pack("!I", len(body) + 4) + body)
+        parameters = b""
+        while True:
+            kind, body = await read_message(reader)
+            if kind == b"R" and struct.unpack("!I", body[:4])[0] != 0:
+                writer.close()
+                raise RuntimeError("Пулер-заглушка подключается к серверу только без пароля (trust)")
+            if kind == b"E":
+                writer.close()
+                raise RuntimeError(f"Сервер отказал в подключении: {body!r}")
+            if kind == b"S":
+                parameters += encode_message(kind, body)
+            if kind == b"Z":
+                break
+        self._parameters = self._parameters or parameters
+        return _Server(reader, writer)
+
+    async def _checkout(self) -> _Server:
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await self._open_server()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, server: _Server) -> None:
+        self._idle.append(server)
+        self._slots.release()
+
+    def _discard(self, server: _Server) -> None:
+        """Соединение в неизвестном состоянии (клиент ушёл посреди транзакции) не переиспользуется"""
+        server.writer.close()
+        self._slots.release()
+
+    # --- Клиенты ---
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._client_writers.add(writer)
+        try:
+            if await self._handshake(reader, writer):
+                await self._relay(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._client_writers.discard(writer)
+            writer.close()
+
+    async def _handshake(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Стартовое сообщение клиента; вход без пароля, параметры — как у сервера"""
+        while True:
+            length, code = struct.unpack("!II", await reader.readexactly(8))
+            await reader.readexactly(length - 8)
+            if code != SSL_REQUEST:
+                break
+            writer.write(b"N")
+        if code != PROTOCOL_VERSION:
+            # CancelRequest и прочее не поддерживаются
+            return False
+        if not self._parameters:
+            self._checkin(await self._checkout())
+        writer.write(
+            encode_message(b"R", struct.pack("!I", 0))
+            + self._parameters
+            + encode_message(b"K", struct.pack("!II", 0, 0))
+            + encode_message(b"Z", b"I")
+        )
+        await writer.drain()
+        return True
+
+    async def _relay(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Сообщения клиента — на выданное ему серверное соединение (при необходимости выдаёт новое)"""
+        client = _Client()
+        try:
+            while True:
+                kind, body = await read_message(reader)
+                if kind == b"X":
+                    return
+                if kind == b"Q" and b"RESET ALL" in body:
+                    self.reset_queries += 1
+                if client.server is None:
+                    client.server = await self._checkout()
+                    self.checkouts += 1
+                    client.pump = asyncio.create_task(self._pump(client, client.server, writer))
+                if kind in (b"S", b"Q"):
+                    client.pending += 1
+                server = client.server
+                server.writer.write(encode_message(kind, body))
+                await server.writer.drain()
+        finally:
+            if client.server is not None:
+                client.pump.cancel()
+                self._discard(client.server)
+
+    async def _pump(self, client: _Client, server: _Server, writer: asyncio.StreamWriter) -> None:
+        """Ответы сервера клиенту; на конце транзакции соединение возвращается в пул"""
+        try:
+            while True:
+                kind, body = await read_message(server.reader)
+                if kind == b"Z":
+                    client.pending -= 1
+                    if body == b"I" and client.pending == 0:
+                        # Отдаём соединение до отправки ответа: клиент может сразу прислать следующий запрос
+                        client.server = None
+                        self._checkin(server)
+                        writer.write(encode_message(kind, body))
+                        await writer.drain()
+                        return
+                writer.write(encode_message(kind, body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
@@ -1,8 +1,17 @@
 from .main_menu import get_main_menu_keyboard
-from .wishlist import get_wishlist_keyboard, get_wishlist_item_keyboard
+from .wishlist import (
+    get_wishlist_keyboard,
+    get_wishlist_item_keyboard,
+    get_wishlist_intro_keyboard,
+    get_wishlist_logistics_keyboard,
+)
+from .info import get_calendar_keyboard
 
 __all__ = [
     "get_main_menu_keyboard",
     "get_wishlist_keyboard",
     "get_wishlist_item_keyboard",
+    "get_wishlist_intro_keyboard",
+    "get_wishlist_logistics_keyboard",
+    "get_calendar_keyboard",
 ]
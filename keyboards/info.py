@@ -0,0 +1,32 @@
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from messages import get_google_calendar_url, get_apple_calendar_url
+
+
+def get_calendar_keyboard() -> InlineKeyboardMarkup:
+    """Inline-кнопки для добавления свадьбы в календарь"""
+    # Получаем URL для календарей
+    apple_calendar_url = get_apple_calendar_url()
+    google_calendar_url = get_google_calendar_url()
+    
+    buttons = []
+    
+    # Добавляем кнопку Apple Calendar только если URL установлен
+    if apple_calendar_url and apple_calendar_url.strip():
+        buttons.append(
+            InlineKeyboardButton(
+                text="📱 Apple Calendar",
+                url=apple_calendar_url
+            )
+        )
+    
+    # Добавляем кнопку Google Calendar
+    buttons.append(
+        InlineKeyboardButton(
+            text="📅 Google Calendar",
+            url=google_calendar_url
+        )
+    )
+    
+    return InlineKeyboardMarkup(
+        inline_keyboard=[buttons] if buttons else []
+    )
@@ -1,15 +1,26 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
+# Тексты кнопок главного меню (по ним же выбираются обработчики в utils/dispatch_table.py)
+MENU_INFO = "💍 Информация о свадьбе"
+MENU_DRESSCODE = "👰‍♀️ Дресс-код"
+MENU_WISHLIST = "🎁 Вишлист"
+MENU_DISCLAIMER = "📋 Дисклеймер"
+MENU_VIDEO = "🎥 Видео-приглашение"
+MENU_MAIN = "🏠 Главное меню"
+
+
+# Клавиатура не меняется, поэтому собирается один раз (модели aiogram неизменяемые)
+MAIN_MENU_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text=MENU_INFO), KeyboardButton(text=MENU_DRESSCODE)],
+        [KeyboardButton(text=MENU_WISHLIST), KeyboardButton(text=MENU_DISCLAIMER)],
+        [KeyboardButton(text=MENU_VIDEO), KeyboardButton(text=MENU_MAIN)],
+    ],
+    resize_keyboard=True,
+    input_field_placeholder="Выберите раздел из меню"
+)
+
 
 def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     """Главное меню бота"""
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="💍 Информация о свадьбе"), KeyboardButton(text="👰‍♀️ Дресс-код")],
-            [KeyboardButton(text="🎁 Вишлист"), KeyboardButton(text="📋 Дисклеймер")],
-            [KeyboardButton(text="🎥 Видео-приглашение"), KeyboardButton(text="🏠 Главное меню")],
-        ],
-        resize_keyboard=True,
-        input_field_placeholder="Выберите раздел из меню"
-    )
-    return keyboard
+    return MAIN_MENU_KEYBOARD
@@ -1,30 +1,78 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import Optional
+from typing import Optional, Sequence
+from database.models import WishlistItem
+from utils import callback_codec
 
 
-def get_wishlist_keyboard(items: list[dict], page: int = 0, items_per_page: int = 5) -> InlineKeyboardMarkup:
+# Первый экран вишлиста и экран логистики не меняются — клавиатуры собираются один раз
+WISHLIST_INTRO_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="📝 Открыть вишлист",
+                callback_data=callback_codec.encode(callback_codec.WISHLIST_OPEN),
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="✈️ Информация по логистике",
+                callback_data=callback_codec.encode(callback_codec.WISHLIST_LOGISTICS),
+            )
+        ],
+    ]
+)
+
+WISHLIST_LOGISTICS_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="⬅️ Назад",
+                callback_data=callback_codec.encode(callback_codec.WISHLIST_BACK_TO_INTRO),
+            )
+        ],
+    ]
+)
+
+
+# Пустой вишлист показывается правкой сообщения с inline-кнопками, поэтому и
+# клавиатура у него inline (editMessageText не принимает ReplyKeyboardMarkup)
+WISHLIST_EMPTY_KEYBOARD = WISHLIST_LOGISTICS_KEYBOARD
+
+
+def get_wishlist_intro_keyboard() -> InlineKeyboardMarkup:
+    """Кнопки первого экрана вишлиста"""
+    return WISHLIST_INTRO_KEYBOARD
+
+
+def get_wishlist_logistics_keyboard() -> InlineKeyboardMarkup:
+    """Кнопка возврата с экрана логистики"""
+    return WISHLIST_LOGISTICS_KEYBOARD
+
+
+def get_wishlist_keyboard(items: Sequence[WishlistItem], page: int = 0, items_per_page: int = 5) -> InlineKeyboardMarkup:
     """Клавиатура для списка товаров виш-листа"""
     keyboard_buttons = []
     
     # Показываем все товары сразу, без пагинации
     for item in items:
         # Порядковый номер по всему списку
-        index = item.get("display_index")
-        if item.get("is_taken"):
+        index = item.display_index
+        name = item.name or "Без названия"
+        if item.is_taken:
             # Для уже занятых показываем зелёную галочку вместо номера
-            button_text = f"✅ {item.get('name', 'Без названия')}"
+            button_text = f"✅ {name}"
         else:
             number_prefix = f"{index}. " if index is not None else ""
-            button_text = f"{number_prefix}{item.get('name', 'Без названия')}"
+            button_text = f"{number_prefix}{name}"
         keyboard_buttons.append([
             InlineKeyboardButton(
                 text=button_text,
-                callback_data=f"wishlist_item_{item['id']}"
+                callback_data=callback_codec.encode(callback_codec.WISHLIST_ITEM, item.id)
             )
         ])
     
     keyboard_buttons.append([
-        InlineKeyboardButton(text="⬅️ Назад", callback_data="wishlist_back_to_intro")
+        InlineKeyboardButton(text="⬅️ Назад", callback_data=callback_codec.encode(callback_codec.WISHLIST_BACK_TO_INTRO))
     ])
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
@@ -50,7 +98,7 @@ def get_wishlist_item_keyboard(
             [
                 InlineKeyboardButton(
                     text="✅ Выбрать этот подарок",
-                    callback_data=f"wishlist_take_{item_id}",
+                    callback_data=callback_codec.encode(callback_codec.WISHLIST_TAKE, item_id),
                 )
             ]
         )
@@ -59,13 +107,13 @@ def get_wishlist_item_keyboard(
             [
                 InlineKeyboardButton(
                     text="❌ Отменить выбор",
-                    callback_data=f"wishlist_untake_{item_id}",
+                    callback_data=callback_codec.encode(callback_codec.WISHLIST_UNTAKE, item_id),
                 )
             ]
         )
 
     keyboard_buttons.append(
-        [InlineKeyboardButton(text="🔙 К списку", callback_data="wishlist_list")]
+        [InlineKeyboardButton(text="🔙 К списку", callback_data=callback_codec.encode(callback_codec.WISHLIST_LIST))]
     )
 
     return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
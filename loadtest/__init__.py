@@ -0,0 +1 @@
+"""Нагрузочный тест webhook бота (python -m loadtest.run)"""
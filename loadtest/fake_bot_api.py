@@ -0,0 +1,90 @@
+"""
+Заглушка Bot API для нагрузочного теста: бот ходит сюда вместо
+api.telegram.org (TELEGRAM_API_URL). Отвечает правдоподобными результатами,
+может добавлять задержку и ошибки, считает вызовы по методам и помнит поля
+последнего вызова каждого метода.
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+# Методы, которые возвращают Message (остальным достаточно True)
+_MESSAGE_METHODS = {
+    "sendMessage",
+    "sendVideo",
+    "sendPhoto",
+    "editMessageText",
+    "editMessageReplyMarkup",
+}
+
+
+class FakeBotAPI:
+    """HTTP-сервер вида /bot<token>/<method>"""
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.last_fields: Dict[str, Dict[str, str]] = {}
+        self._message_id = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def _message(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        self._message_id += 1
+        chat_id = int(fields.get("chat_id") or 0)
+        return {
+            "message_id": int(fields.get("message_id") or self._message_id),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": fields.get("text") or "",
+        }
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        # aiogram отправляет поля формой (multipart или urlencoded)
+        fields = await request.post()
+        self.last_fields[method] = {key: str(value) for key, value in fields.items()}
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors[method] += 1
+            return web.json_response(
+                {"ok": False, "error_code": 500, "description": "Internal Server Error: fake"},
+                status=500,
+            )
+        if method == "getMe":
+            result: Any = {"id": 42, "is_bot": True, "first_name": "LoadTest", "username": "loadtest_bot"}
+        elif method in _MESSAGE_METHODS:
+            result = self._message(fields)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запускает сервер и возвращает его адрес (порт 0 — любой свободный)"""
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.errors.clear()
+        self.last_fields.clear()
@@ -0,0 +1,263 @@
+"""
+Нагрузочный тест webhook бота: настоящее aiohttp-приложение из main.py,
+заглушка Bot API (loadtest/fake_bot_api.py) и локальный PostgreSQL.
+
+Запуск из корня репозитория (нужна отдельная БД — тест пишет в users и wishlist_items):
+    python -m loadtest.run --database-url postgresql://localhost/wedding_loadtest \\
+        --concurrency 1,10,50 --duration 20
+
+Гости заранее заносятся в users (как после /start: иначе «Выбрать» упирается
+во внешний ключ taken_by_user_id). На каждом уровне параллельности N гостей
+одновременно выполняют сценарии из loadtest/scenarios.py, каждый ждёт ответа
+на webhook перед следующим действием. Отчёт: пропускная способность, p50/p95/p99 по обработчикам и доля
+ошибок (ответ webhook не 200 или обрыв соединения), а также вызовы Bot API на
+одно обновление и состояние БД из /health.
+
+Остальные настройки бота (размер пула, режим webhook, троттлинг) берутся из
+окружения и .env, как при обычном запуске. В режиме WEBHOOK_MODE=queue
+задержка — только время постановки в очередь. Генератор и бот работают в одном
+процессе, поэтому при высокой параллельности потолок — одно ядро на двоих.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loadtest.fake_bot_api import FakeBotAPI
+
+BOT_TOKEN = "123456:LOADTEST"
+WEBHOOK_SECRET = "loadtest"
+ITEM_PREFIX = "[loadtest] "
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест webhook бота")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("LOADTEST_DATABASE_URL", ""),
+        help="отдельная БД для теста (по умолчанию LOADTEST_DATABASE_URL)",
+    )
+    parser.add_argument("--concurrency", default="1,10,50", help="уровни параллельности через запятую")
+    parser.add_argument("--duration", type=float, default=20.0, help="секунд на уровень")
+    parser.add_argument("--guests", type=int, default=2000, help="размер пула гостей")
+    parser.add_argument("--mix", default="", help="веса сценариев, например start=10,menu=35,browse=40,race=15")
+    parser.add_argument("--items", type=int, default=30, help="сколько подарков добавить в вишлист")
+    parser.add_argument("--bot-api-latency", type=float, default=50.0, help="задержка заглушки Bot API, мс")
+    parser.add_argument("--bot-api-error-rate", type=float, default=0.0, help="доля ответов 500 от заглушки")
+    parser.add_argument("--json", default="", help="сохранить результаты в файл")
+    parser.add_argument("--keep-data", action="store_true", help="не удалять данные теста из БД")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace, api_url: str) -> None:
+    """Переменные окружения бота; задаются до импорта config"""
+    os.environ.update({
+        "BOT_TOKEN": BOT_TOKEN,
+        "DATABASE_URL": args.database_url,
+        "TELEGRAM_API_URL": api_url,
+        "WEBHOOK_HOST": "http://127.0.0.1",
+        "WEBHOOK_SECRET": WEBHOOK_SECRET,
+        # Без уведомлений в группу логов и выборочной записи трасс
+        "LOGS_GROUP_ID": "",
+        "TRACE_SAMPLE_RATE": "0",
+    })
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+async def seed_wishlist(database, count: int) -> List[int]:
+    """Подарки теста (с префиксом в названии, чтобы потом удалить только их)"""
+    await database.execute("DELETE FROM wishlist_items WHERE name LIKE $1", ITEM_PREFIX + "%")
+    rows = await database.fetch(
+        "INSERT INTO wishlist_items (name, description, price_hint, order_index) "
+        "SELECT $1::text || n, 'Подарок для нагрузочного теста', '5 000 ₽', n "
+        "FROM generate_series(1, $2::int) AS n RETURNING id",
+        ITEM_PREFIX,
+        count,
+    )
+    return sorted(row["id"] for row in rows)
+
+
+async def seed_guests(database, guest_id_base: int, guests: int) -> None:
+    """Пул гостей теста в users; счётчик пользователей растёт на число новых"""
+    rows = await database.fetch(
+        "INSERT INTO users (user_id, username, first_name) "
+        "SELECT $1::bigint + n, 'guest' || ($1::bigint + n), 'Гость' "
+        "FROM generate_series(0, $2::int - 1) AS n "
+        "ON CONFLICT (user_id) DO NOTHING RETURNING user_id",
+        guest_id_base,
+        guests,
+    )
+    await database.execute(
+        "UPDATE users_counter SET total = total + $1 WHERE id = 1", len(rows)
+    )
+
+
+async def cleanup(database, guest_id_base: int, guests: int) -> None:
+    """Удаляет подарки и гостей теста и возвращает счётчик пользователей"""
+    await database.execute("DELETE FROM wishlist_items WHERE name LIKE $1", ITEM_PREFIX + "%")
+    status = await database.execute(
+        "DELETE FROM users WHERE user_id >= $1 AND user_id < $2", guest_id_base, guest_id_base + guests
+    )
+    deleted = int(status.split()[-1])
+    await database.execute(
+        "UPDATE users_counter SET total = GREATEST(total - $1, 0) WHERE id = 1", deleted
+    )
+
+
+async def run_level(
+    client: aiohttp.ClientSession,
+    url: str,
+    mix,
+    concurrency: int,
+    duration: float,
+    dumps,
+) -> Dict[str, Any]:
+    """N гостей параллельно в течение duration секунд"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, Counter] = defaultdict(Counter)
+    headers = {
+        "Content-Type": "application/json",
+        "X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET,
+    }
+    deadline = time.monotonic() + duration
+
+    async def guest() -> None:
+        while time.monotonic() < deadline:
+            for label, update in mix.next_scenario():
+                started = time.perf_counter()
+                try:
+                    async with client.post(url, data=dumps(update), headers=headers) as response:
+                        await response.read()
+                        error = None if response.status == 200 else f"HTTP {response.status}"
+                except aiohttp.ClientError as e:
+                    error = type(e).__name__
+                latencies[label].append((time.perf_counter() - started) * 1000)
+                if error:
+                    errors[label][error] += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(guest() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    handlers = {}
+    for label in sorted(latencies):
+        values = sorted(latencies[label])
+        failed = sum(errors[label].values())
+        handlers[label] = {
+            "requests": len(values),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "error_rate": round(failed / len(values), 4),
+            "errors": dict(errors[label]),
+        }
+    total = sum(len(v) for v in latencies.values())
+    failed = sum(sum(c.values()) for c in errors.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "handlers": handlers,
+    }
+
+
+def print_level(result: Dict[str, Any]) -> None:
+    print(
+        f"\nПараллельных гостей: {result['concurrency']} — {result['requests']} обновлений "
+        f"за {result['seconds']} с, {result['throughput_rps']} обн/с, ошибок {result['error_rate']:.2%}"
+    )
+    print(f"{'обработчик':>18} | {'запросов':>8} | {'p50, мс':>8} | {'p95, мс':>8} | {'p99, мс':>8} | {'ошибки':>7}")
+    for label, stats in result["handlers"].items():
+        print(
+            f"{label:>18} | {stats['requests']:>8} | {stats['p50_ms']:>8.1f} | {stats['p95_ms']:>8.1f} | "
+            f"{stats['p99_ms']:>8.1f} | {stats['error_rate']:>7.2%}"
+        )
+    calls = result["bot_api_calls"]
+    per_update = sum(calls.values()) / result["requests"] if result["requests"] else 0.0
+    print(f"Bot API: {per_update:.2f} вызова на обновление {dict(calls)}")
+    breaker = (result.get("health") or {}).get("database", {}).get("breaker")
+    if breaker:
+        print(f"БД: выключатель {breaker['state']}, отклонено {breaker['rejected']}")
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    fake_api = FakeBotAPI(latency_ms=args.bot_api_latency, error_rate=args.bot_api_error_rate)
+    configure_environment(args, await fake_api.start())
+
+    # config читает окружение при импорте, поэтому бот импортируется только здесь
+    from database import Database
+    from loadtest.scenarios import DEFAULT_MIX, GUEST_ID_BASE, UpdateMix, parse_mix
+    from main import create_app
+    from config import Config
+    from utils import json_codec
+
+    app = await create_app()
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    results = []
+    try:
+        item_ids = await seed_wishlist(Database, args.items)
+        await seed_guests(Database, GUEST_ID_BASE, args.guests)
+        mix = UpdateMix(parse_mix(args.mix) if args.mix else DEFAULT_MIX, item_ids, args.guests)
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as client:
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                fake_api.reset()
+                result = await run_level(
+                    client,
+                    base_url + Config.WEBHOOK_PATH,
+                    mix,
+                    concurrency,
+                    args.duration,
+                    json_codec.dumps_bytes,
+                )
+                result["bot_api_calls"] = dict(fake_api.calls)
+                result["bot_api_errors"] = dict(fake_api.errors)
+                async with client.get(base_url + "/health") as response:
+                    result["health"] = await response.json()
+                print_level(result)
+                results.append(result)
+    finally:
+        # on_shutdown бота: дожидается фоновых вызовов и сбрасывает активность в users
+        await runner.cleanup()
+        if not args.keep_data:
+            await cleanup(Database, GUEST_ID_BASE, args.guests)
+        await Database.close_pool()
+        await fake_api.stop()
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.database_url:
+        sys.exit("Укажите отдельную БД для теста: --database-url или LOADTEST_DATABASE_URL")
+    results = asyncio.run(run(args))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Смесь обновлений для нагрузочного теста.
+
+Сценарий — короткая последовательность действий одного гостя; каждое действие
+— тело webhook и метка обработчика для отчёта. Доли сценариев задаются
+весами (--mix start=10,menu=35,browse=40,race=15):
+- start — /start (запись гостя в users);
+- menu — кнопки главного меню (статичные ответы);
+- browse — вишлист: список, страница, карточка подарка, возврат к списку;
+- race — «Выбрать» и «Отменить выбор» одного из нескольких «горячих»
+  подарков: гости одновременно борются за одни и те же строки.
+"""
+import itertools
+import random
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from keyboards.main_menu import MENU_DISCLAIMER, MENU_DRESSCODE, MENU_INFO, MENU_MAIN, MENU_WISHLIST
+from utils import callback_codec
+
+# Гости нагрузочного теста — вне диапазона настоящих Telegram ID
+GUEST_ID_BASE = 9_100_000_000
+
+DEFAULT_MIX = {"start": 10, "menu": 35, "browse": 40, "race": 15}
+
+MENU_BUTTONS = (
+    ("menu:info", MENU_INFO),
+    ("menu:dresscode", MENU_DRESSCODE),
+    ("menu:disclaimer", MENU_DISCLAIMER),
+    ("menu:wishlist", MENU_WISHLIST),
+    ("menu:main", MENU_MAIN),
+)
+
+Step = Tuple[str, Dict[str, Any]]
+
+_update_ids = itertools.count(1)
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """«start=10,menu=35» -> {"start": 10, "menu": 35}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Неизвестный сценарий: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": False, "first_name": "Гость", "username": f"guest{user_id}"}
+
+
+def message_update(user_id: int, text: str) -> Dict[str, Any]:
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": random.randint(1, 1_000_000),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": _user(user_id),
+            "text": text,
+        },
+    }
+
+
+def callback_update(user_id: int, data: str) -> Dict[str, Any]:
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            # Сообщение с кнопками, которое гость «нажал»: его бот и редактирует
+            "message": {
+                "message_id": user_id % 1_000_000,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": 42, "is_bot": True, "first_name": "LoadTest"},
+                "text": "…",
+            },
+        },
+    }
+
+
+class UpdateMix:
+    """Выбор сценариев по весам для гостей из пула"""
+
+    def __init__(self, mix: Dict[str, int], item_ids: Sequence[int], guests: int, hot_items: int = 3):
+        if not item_ids:
+            raise ValueError("В вишлисте нет подарков для сценариев browse/race")
+        self.item_ids = list(item_ids)
+        self.hot_item_ids = self.item_ids[:hot_items]
+        self.guests = guests
+        self._scenarios: List[Callable[[int], List[Step]]] = []
+        self._weights: List[int] = []
+        builders = {"start": self._start, "menu": self._menu, "browse": self._browse, "race": self._race}
+        for name, weight in mix.items():
+            if weight > 0:
+                self._scenarios.append(builders[name])
+                self._weights.append(weight)
+
+    def next_scenario(self) -> List[Step]:
+        """Действия случайного гостя по случайному сценарию"""
+        user_id = GUEST_ID_BASE + random.randrange(self.guests)
+        scenario = random.choices(self._scenarios, weights=self._weights)[0]
+        return scenario(user_id)
+
+    def _start(self, user_id: int) -> List[Step]:
+        return [("start", message_update(user_id, "/start"))]
+
+    def _menu(self, user_id: int) -> List[Step]:
+        label, text = random.choice(MENU_BUTTONS)
+        return [(label, message_update(user_id, text))]
+
+    def _browse(self, user_id: int) -> List[Step]:
+        item_id = random.choice(self.item_ids)
+        return [
+            ("wishlist:open", callback_update(user_id, callback_codec.encode(callback_codec.WISHLIST_OPEN))),
+            ("wishlist:page", callback_update(user_id, callback_codec.encode(callback_codec.WISHLIST_PAGE, 0))),
+            ("wishlist:item", callback_update(user_id, callback_codec.encode(callback_codec.WISHLIST_ITEM, item_id))),
+            ("wishlist:list", callback_update(user_id, callback_codec.encode(callback_codec.WISHLIST_LIST))),
+        ]
+
+    def _race(self, user_id: int) -> List[Step]:
+        item_id = random.choice(self.hot_item_ids)
+        return [
+            ("wishlist:take", callback_update(user_id, callback_codec.encode(callback_codec.WISHLIST_TAKE, item_id))),
+            ("wishlist:untake", callback_update(user_id, callback_codec.encode(callback_codec.WISHLIST_UNTAKE, item_id))),
+        ]
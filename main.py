@@ -1,14 +1,47 @@
 import asyncio
 import logging
 import sys
+from typing import Optional
+from config import Config
+from utils.startup_profiler import startup_profiler
+
+# Замер импортов ставится до тяжёлых модулей (aiogram, httpx, слой БД)
+if Config.STARTUP_PROFILE:
+    startup_profiler.install()
+
 from aiohttp import web
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
-from config import Config
+from aiogram.webhook.aiohttp_server import setup_application
 from database import Database, init_db
-from handlers import start_router, wishlist_router, info_router, dresscode_router, disclaimer_router, video_router
+from middlewares import (
+    ActivityMiddleware,
+    BotApiMetricsMiddleware,
+    BotApiTracingMiddleware,
+    DatabaseUserMiddleware,
+    HandlerMetricsMiddleware,
+    HandlerSpanMiddleware,
+    TracingMiddleware,
+    UpdateMetricsMiddleware,
+    activity_buffer,
+    callback_throttling,
+    deduplication,
+    message_throttling,
+)
+from handlers import dispatch_router, errors_router, start_router, video_router
+from utils.tracing import tracer
 from utils.telegram_logger import TelegramGroupHandler, init_telegram_logger, close_telegram_logger
+from utils import json_codec
+from utils.bot_calls import drain_background_calls
+from utils.message_edit import edit_cache
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
+from utils.task_queue import side_effects
+from utils.webhook_reply import WebhookReplyRequestHandler
+from utils.webhook_queue import QueuedRequestHandler
+
+startup_profiler.finish_imports()
 
 # Scheduler теперь запускается отдельным процессом/воркером
 # Не импортируем его здесь, чтобы избежать дублирования
@@ -33,6 +66,12 @@ logging.getLogger("uvicorn").setLevel(logging.CRITICAL)
 logging.getLogger("uvicorn.access").setLevel(logging.CRITICAL)
 logging.getLogger("fastapi").setLevel(logging.CRITICAL)
 
+# Отчёт профилировщика старта пишется в лог, несмотря на уровень ERROR
+if Config.STARTUP_PROFILE:
+    logging.getLogger("utils.startup_profiler").setLevel(logging.INFO)
+# Медленные запросы (дольше SLOW_QUERY_MS) с параметрами — тоже
+logging.getLogger("utils.query_stats").setLevel(logging.WARNING)
+
 # Добавляем handler для отправки ошибок в Telegram группу
 if Config.LOGS_GROUP_ID:
     telegram_handler = TelegramGroupHandler()
@@ -40,23 +79,96 @@ if Config.LOGS_GROUP_ID:
     logging.getLogger().addHandler(telegram_handler)
 
 
-async def on_startup(bot: Bot) -> None:
-    """Выполняется при запуске бота"""
-    # Инициализируем Telegram logger
-    await init_telegram_logger()
-    
-    # Убираем слеш в конце WEBHOOK_HOST, если он есть
-    host = Config.WEBHOOK_HOST.rstrip('/')
-    # Формируем правильный URL
-    webhook_url = f"{host}{Config.WEBHOOK_PATH}"
-    await bot.set_webhook(
-        webhook_url,
-        secret_token=Config.WEBHOOK_SECRET if Config.WEBHOOK_SECRET else None
+def setup_metrics(webhook_requests_handler) -> None:
+    """Метрики, которые читаются из других модулей в момент запроса /metrics"""
+    metrics_registry.gauge(
+        "bot_duplicate_updates_total", "Повторно доставленные обновления",
+        lambda: deduplication.duplicates,
+        kind="counter",
+    )
+    metrics_registry.gauge(
+        "bot_throttled_events_total", "События сверх лимита частоты",
+        lambda: {
+            ("message",): message_throttling.throttled_events,
+            ("callback_query",): callback_throttling.throttled_events,
+        },
+        labels=("type",),
+        kind="counter",
+    )
+    metrics_registry.gauge(
+        "bot_edits_skipped_total", "Пропущенные одинаковые редактирования сообщений",
+        lambda: edit_cache.skipped,
+        kind="counter",
     )
+    metrics_registry.gauge(
+        "bot_side_effects_queue", "Очередь фоновых задач",
+        lambda: {(key,): value for key, value in side_effects.stats().items()},
+        labels=("stat",),
+    )
+    if isinstance(webhook_requests_handler, QueuedRequestHandler):
+        metrics_registry.gauge(
+            "bot_webhook_queue", "Очередь входящих обновлений",
+            lambda: {(key,): value for key, value in webhook_requests_handler.stats().items()},
+            labels=("stat",),
+        )
+
+
+# Некритичная инициализация, которая идёт уже после открытия порта
+_deferred_startup_task: Optional[asyncio.Task] = None
+
+
+async def deferred_startup(bot: Bot) -> None:
+    """
+    Инициализация, без которой можно принимать обновления: HTTP клиент логгера
+    (send_to_logs_group и так создаёт его при первой отправке) и повторная
+    регистрация webhook — Telegram помнит его между перезапусками.
+    """
+    try:
+        with startup_profiler.phase("telegram_logger"):
+            await init_telegram_logger()
+        
+        # Убираем слеш в конце WEBHOOK_HOST, если он есть
+        host = Config.WEBHOOK_HOST.rstrip('/')
+        # Формируем правильный URL
+        webhook_url = f"{host}{Config.WEBHOOK_PATH}"
+        with startup_profiler.phase("set_webhook"):
+            await bot.set_webhook(
+                webhook_url,
+                secret_token=Config.WEBHOOK_SECRET if Config.WEBHOOK_SECRET else None
+            )
+    except Exception as e:
+        logger.error(f"❌ Ошибка при регистрации webhook: {e}")
+    finally:
+        if Config.STARTUP_PROFILE:
+            startup_profiler.log_report(Config.STARTUP_PROFILE_TOP)
+
+
+async def on_startup(bot: Bot) -> None:
+    """Выполняется при запуске бота (до открытия порта — только быстрые шаги)"""
+    # Фоновая запись активности пользователей
+    activity_buffer.start()
+    
+    # Воркеры для некритичных побочных эффектов (уведомления в группу логов)
+    side_effects.start()
 
 
 async def on_shutdown(bot: Bot) -> None:
     """Выполняется при остановке бота"""
+    # Регистрация webhook могла ещё не закончиться (остановка сразу после старта)
+    if _deferred_startup_task is not None and not _deferred_startup_task.done():
+        _deferred_startup_task.cancel()
+        try:
+            await _deferred_startup_task
+        except asyncio.CancelledError:
+            pass
+    # Даём завершиться параллельным вызовам Bot API, запущенным обработчиками
+    await drain_background_calls()
+    # Дожидаемся отправки уведомлений, пока HTTP клиент логгера ещё открыт
+    await side_effects.drain()
+    # Сохраняем накопленную активность до закрытия пула БД
+    await activity_buffer.stop()
+    # Трассы, которые ещё дописываются в файл в фоновом потоке
+    await tracer.drain()
     await bot.session.close()
     await close_telegram_logger()
 
@@ -71,22 +183,57 @@ async def init_bot():
         raise ValueError("WEBHOOK_HOST не установлен в .env файле. Укажите URL для webhook (например: https://your-app.railway.app или https://your-ngrok-url.ngrok.io)")
     
     # Инициализация базы данных
-    await Database.create_pool()
+    with startup_profiler.phase("db_pool"):
+        await Database.create_pool()
     
     # Создание таблиц
-    await init_db()
+    with startup_profiler.phase("migrations"):
+        await init_db()
     
     # Инициализация бота и диспетчера
-    bot = Bot(token=Config.BOT_TOKEN)
+    # Ответы Bot API и тела webhook (bot.session.json_loads) разбираются быстрым JSON
+    session = AiohttpSession(json_loads=json_codec.loads, json_dumps=json_codec.dumps)
+    if Config.TELEGRAM_API_URL:
+        session.api = TelegramAPIServer.from_base(Config.TELEGRAM_API_URL)
+    bot = Bot(token=Config.BOT_TOKEN, session=session)
     dp = Dispatcher(storage=MemoryStorage())
     
+    # Метрики: время и ошибки исходящих запросов к Bot API
+    bot.session.middleware(BotApiMetricsMiddleware())
+    # Трассировка: span на каждый запрос к Bot API внутри обработки обновления
+    bot.session.middleware(BotApiTracingMiddleware())
+    
+    # Трассировка: корневой span обновления (медленные пишутся в TRACE_FILE)
+    dp.update.outer_middleware(TracingMiddleware())
+    # Метрики: число обновлений по типу (до отбрасывания дублей, чтобы видеть и их)
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    
+    # Повторно доставленные Telegram обновления (тот же update_id) отбрасываем первыми
+    dp.update.outer_middleware(deduplication)
+    
+    # Запросы к БД привязываются к гостю: после его записи чтения идут с primary, а не с реплики
+    dp.update.outer_middleware(DatabaseUserMiddleware())
+    
+    # Учёт активности пользователей (в памяти, с пакетной записью в БД)
+    dp.update.outer_middleware(ActivityMiddleware())
+    
+    # Ограничение частоты сообщений и нажатий кнопок от одного гостя
+    dp.message.outer_middleware(message_throttling)
+    dp.callback_query.outer_middleware(callback_throttling)
+    
+    # Метрики: время работы обработчиков (inner-middleware видит выбранный обработчик)
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+    dp.message.middleware(HandlerSpanMiddleware())
+    dp.callback_query.middleware(HandlerSpanMiddleware())
+    
     # Регистрация роутеров
+    # Таблица кнопок подключается первой: кнопки меню и колбэки выбираются по словарю
+    dp.include_router(dispatch_router)
     dp.include_router(start_router)
-    dp.include_router(wishlist_router)
-    dp.include_router(info_router)
-    dp.include_router(dresscode_router)
-    dp.include_router(disclaimer_router)
     dp.include_router(video_router)
+    # Сбой БД: вежливый ответ гостю вместо тишины
+    dp.include_router(errors_router)
     
     # Scheduler теперь запускается отдельным процессом/воркером
     # Не запускаем его здесь, чтобы избежать дублирования
@@ -95,46 +242,125 @@ async def init_bot():
     return bot, dp
 
 
-async def main():
-    """Главная функция запуска бота через webhook"""
-    try:
+# Бот в приложении aiohttp (нужен для фоновой регистрации webhook после открытия порта)
+BOT_KEY = web.AppKey("bot", Bot)
+
+
+async def create_app() -> web.Application:
+    """
+    Веб-приложение бота: webhook, /health и /metrics, startup/shutdown.
+    Используется main() и общей точкой входа run_all.py.
+    """
+    with startup_profiler.phase("init_bot"):
         bot, dp = await init_bot()
-        
-        # Создаём веб-приложение
-        app = web.Application()
-        
-        # Настраиваем webhook
-        webhook_requests_handler = SimpleRequestHandler(
+    
+    # Создаём веб-приложение
+    app = web.Application()
+    app[BOT_KEY] = bot
+    
+    secret_token = Config.WEBHOOK_SECRET if Config.WEBHOOK_SECRET else None
+    if Config.WEBHOOK_MODE == "queue":
+        # Подтверждаем webhook сразу, обновления разбирают воркеры из ограниченных очередей
+        webhook_requests_handler = QueuedRequestHandler(
             dispatcher=dp,
             bot=bot,
-            secret_token=Config.WEBHOOK_SECRET if Config.WEBHOOK_SECRET else None
+            secret_token=secret_token,
+            workers=Config.WEBHOOK_WORKERS,
+            queue_size=Config.WEBHOOK_QUEUE_SIZE
         )
-        webhook_requests_handler.register(app, path=Config.WEBHOOK_PATH)
-        
-        # Health check endpoint
-        async def health_check(request):
-            return web.Response(text="OK")
-        
-        app.router.add_get("/health", health_check)
-        
-        # Настройка startup и shutdown
-        setup_application(app, dp, bot=bot)
-        
-        # Добавляем обработчики startup и shutdown
-        async def startup_handler(app):
-            await on_startup(bot)
-        
-        async def shutdown_handler(app):
-            await on_shutdown(bot)
-        
-        app.on_startup.append(startup_handler)
-        app.on_shutdown.append(shutdown_handler)
-        
-        # Запуск веб-сервера внутри существующего event loop
+    else:
+        # Режим webhook-reply: метод, возвращённый обработчиком,
+        # уходит прямо в ответе Telegram без отдельного запроса к Bot API
+        webhook_requests_handler = WebhookReplyRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            secret_token=secret_token
+        )
+    webhook_requests_handler.register(app, path=Config.WEBHOOK_PATH)
+    
+    # Health check endpoint
+    async def health_check(request):
+        status = {
+            "status": "ok",
+            "duplicate_updates": deduplication.duplicates,
+            "throttled_events": message_throttling.throttled_events + callback_throttling.throttled_events,
+            "throttled_users": message_throttling.throttled_users + callback_throttling.throttled_users,
+            "tracing": tracer.stats(),
+            "startup": startup_profiler.summary(),
+            "replica": Database.replica_stats(),
+            "database": Database.health(),
+        }
+        if isinstance(webhook_requests_handler, QueuedRequestHandler):
+            status["webhook_queue"] = webhook_requests_handler.stats()
+        return web.json_response(status)
+    
+    app.router.add_get("/health", health_check)
+    
+    # Метрики в формате Prometheus
+    setup_metrics(webhook_requests_handler)
+    
+    async def metrics_handler(request):
+        if Config.METRICS_TOKEN:
+            token = request.query.get("token") or request.headers.get("Authorization", "").removeprefix("Bearer ")
+            if token != Config.METRICS_TOKEN:
+                return web.Response(status=401, text="Unauthorized")
+        return web.Response(
+            body=metrics_registry.render().encode("utf-8"),
+            headers={"Content-Type": METRICS_CONTENT_TYPE},
+        )
+    
+    app.router.add_get("/metrics", metrics_handler)
+    
+    # Настройка startup и shutdown
+    setup_application(app, dp, bot=bot)
+    
+    # Добавляем обработчики startup и shutdown
+    async def startup_handler(app):
+        await on_startup(bot)
+    
+    async def shutdown_handler(app):
+        await on_shutdown(bot)
+    
+    app.on_startup.append(startup_handler)
+    app.on_shutdown.append(shutdown_handler)
+    
+    return app
+
+
+async def start_webhook_server(app: web.Application) -> web.AppRunner:
+    """Открывает порт webhook; некритичная инициализация продолжается в фоне"""
+    global _deferred_startup_task
+    with startup_profiler.phase("listener"):
         runner = web.AppRunner(app)
         await runner.setup()
         site = web.TCPSite(runner, "0.0.0.0", Config.WEBHOOK_PORT)
         await site.start()
+    startup_profiler.mark_ready()
+    
+    # Порт уже открыт: логгер и повторная регистрация webhook — в фоне
+    _deferred_startup_task = asyncio.create_task(deferred_startup(app[BOT_KEY]))
+    return runner
+
+
+def log_startup_error(e: Exception) -> None:
+    """Краткое сообщение об ошибке запуска"""
+    error_msg = str(e)
+    if "nodename nor servname" in error_msg or "Connection" in error_msg:
+        logger.error(f"❌ Ошибка подключения к базе данных: {error_msg}")
+        logger.error("💡 Проверьте настройки DATABASE_URL в файле .env")
+    elif "WEBHOOK_HOST" in error_msg:
+        logger.error(f"❌ {error_msg}")
+    else:
+        logger.error(f"❌ Ошибка при запуске бота: {error_msg}")
+
+
+async def main():
+    """Главная функция запуска бота через webhook"""
+    try:
+        app = await create_app()
+        
+        # Запуск веб-сервера внутри существующего event loop
+        runner = await start_webhook_server(app)
         
         # Логируем только запуск бота
         logger.info("🤖 Бот запущен и готов к работе")
@@ -150,15 +376,8 @@ async def main():
     except KeyboardInterrupt:
         pass
     except Exception as e:
-        error_msg = str(e)
         # Показываем только краткую информацию об ошибке
-        if "nodename nor servname" in error_msg or "Connection" in error_msg:
-            logger.error(f"❌ Ошибка подключения к базе данных: {error_msg}")
-            logger.error("💡 Проверьте настройки DATABASE_URL в файле .env")
-        elif "WEBHOOK_HOST" in error_msg:
-            logger.error(f"❌ {error_msg}")
-        else:
-            logger.error(f"❌ Ошибка при запуске бота: {error_msg}")
+        log_startup_error(e)
         sys.exit(1)
     finally:
         # Закрытие подключений
@@ -1,7 +1,9 @@
 """
 Модуль с функциями для всех текстовых сообщений бота.
 Все тексты централизованы здесь для удобства редактирования.
+Готовые ответы разделов (текст + клавиатура) собираются из них в responses.py.
 """
+from functools import lru_cache
 
 
 def get_welcome_message(first_name: str) -> str:
@@ -126,6 +128,7 @@ def get_info_text() -> str:
     )
 
 
+@lru_cache(maxsize=1)
 def get_google_calendar_url() -> str:
     """Возвращает URL для добавления события в Google Calendar"""
     from urllib.parse import quote
@@ -157,6 +160,7 @@ def get_google_calendar_url() -> str:
     return url
 
 
+@lru_cache(maxsize=1)
 def get_apple_calendar_url() -> str:
     """Возвращает URL для добавления события в Apple Calendar (через .ics файл на Railway)"""
     from config import Config
@@ -178,6 +182,11 @@ def get_wishlist_empty_text() -> str:
     return "Виш-лист пока пуст. Скоро здесь появятся подарки! 🎁"
 
 
+def get_database_unavailable_text() -> str:
+    """Возвращает текст, когда действие не удалось из-за сбоя базы данных"""
+    return "Не получилось — у нас небольшой сбой. Попробуй ещё раз через минуту 🙏"
+
+
 def get_main_menu_text() -> str:
     """Возвращает текст для главного меню"""
     return "Выбери раздел из меню:"
@@ -0,0 +1,23 @@
+from .activity import ActivityMiddleware, activity_buffer
+from .database_user import DatabaseUserMiddleware
+from .deduplication import DeduplicationMiddleware, deduplication
+from .metrics import BotApiMetricsMiddleware, HandlerMetricsMiddleware, UpdateMetricsMiddleware
+from .tracing import BotApiTracingMiddleware, HandlerSpanMiddleware, TracingMiddleware
+from .throttling import ThrottlingMiddleware, callback_throttling, message_throttling
+
+__all__ = [
+    "ActivityMiddleware",
+    "activity_buffer",
+    "DatabaseUserMiddleware",
+    "DeduplicationMiddleware",
+    "deduplication",
+    "UpdateMetricsMiddleware",
+    "HandlerMetricsMiddleware",
+    "BotApiMetricsMiddleware",
+    "TracingMiddleware",
+    "HandlerSpanMiddleware",
+    "BotApiTracingMiddleware",
+    "ThrottlingMiddleware",
+    "message_throttling",
+    "callback_throttling",
+]
@@ -0,0 +1,128 @@
+"""
+Учёт активности гостей (последний визит и число действий) с отложенной записью.
+
+Запись в БД на каждое обновление удвоила бы нагрузку на горячем пути, поэтому
+активность копится в памяти и сбрасывается в таблицу users одним пакетным
+запросом раз в ACTIVITY_FLUSH_INTERVAL секунд или при накоплении
+ACTIVITY_FLUSH_MAX_ENTRIES гостей. Частота записи не зависит от частоты сообщений.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from config import Config
+from database import queries
+from database.connection import Database
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    """Буфер активности: user_id -> [последний визит, число действий]"""
+
+    def __init__(self, flush_interval: float, max_entries: int):
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self._entries: Dict[int, List[Any]] = {}
+        self._flush_requested = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.flushes = 0
+        self.flushed_entries = 0
+
+    def record(self, user_id: int) -> None:
+        """Отмечает действие гостя (без обращения к БД)"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self._entries[user_id] = [now, 1]
+            if len(self._entries) >= self.max_entries:
+                self._flush_requested.set()
+        else:
+            entry[0] = now
+            entry[1] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def flush(self) -> None:
+        """Записывает накопленную активность одним запросом"""
+        if not self._entries:
+            return
+        entries, self._entries = self._entries, {}
+
+        user_ids = list(entries)
+        last_seen = [entries[uid][0] for uid in user_ids]
+        hits = [entries[uid][1] for uid in user_ids]
+        try:
+            # Обновляем только уже зарегистрированных гостей: строку в users создаёт /start
+            await Database.execute(queries.USERS_FLUSH_ACTIVITY, user_ids, last_seen, hits)
+        except Exception as e:
+            logger.error(f"Не удалось сохранить активность пользователей: {e}")
+            self._restore(entries)
+            return
+        self.flushes += 1
+        self.flushed_entries += len(user_ids)
+
+    def _restore(self, entries: Dict[int, List[Any]]) -> None:
+        """Возвращает несохранённые записи в буфер, не превышая его размер"""
+        for user_id, (seen_at, count) in entries.items():
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[1] += count
+            elif len(self._entries) < self.max_entries:
+                self._entries[user_id] = [seen_at, count]
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Запускает фоновый сброс буфера"""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновый сброс и записывает остаток буфера"""
+        if self._task is not None:
+            # Без cancel(): отмена посреди flush() потеряла бы уже забранную из буфера пачку.
+            # Цикл просыпается, дописывает текущую пачку и выходит.
+            self._stopping = True
+            self._flush_requested.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+activity_buffer = ActivityBuffer(
+    flush_interval=Config.ACTIVITY_FLUSH_INTERVAL,
+    max_entries=Config.ACTIVITY_FLUSH_MAX_ENTRIES,
+)
+
+
+class ActivityMiddleware(BaseMiddleware):
+    """Outer-middleware диспетчера: отмечает каждое обновление от гостя в буфере"""
+
+    def __init__(self, buffer: ActivityBuffer = activity_buffer):
+        self.buffer = buffer
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user is not None and not user.is_bot:
+            self.buffer.record(user.id)
+        return await handler(event, data)
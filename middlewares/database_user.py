@@ -0,0 +1,30 @@
+"""
+Привязка запросов к БД к гостю текущего обновления.
+
+Нужна для read-your-writes при чтении с реплики (database/repository.py):
+после записи от гостя (выбор подарка и т.п.) его чтения какое-то время идут
+на primary, а другие гости продолжают читать с реплики.
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from database.repository import bind_user, unbind_user
+
+
+class DatabaseUserMiddleware(BaseMiddleware):
+    """Outer-middleware для dp.update: пользователь обновления для слоя БД"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        token = bind_user(user.id if user else None)
+        try:
+            return await handler(event, data)
+        finally:
+            unbind_user(token)
@@ -0,0 +1,61 @@
+"""
+Отбрасывание повторно доставленных обновлений по update_id.
+
+Если бот отвечает медленно, Telegram повторяет доставку webhook, и тот же
+wishlist_take_ или /start может выполниться дважды. Недавние update_id хранятся
+в кольцевом буфере фиксированного размера: слот = update_id % window. Так как
+update_id растут последовательно, окно покрывает последние window обновлений.
+"""
+import logging
+from array import array
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+# 4096 слотов по 8 байт — 32 КБ памяти
+DEDUP_WINDOW = 4096
+
+
+class UpdateIdWindow:
+    """Компактное окно недавно обработанных update_id"""
+
+    __slots__ = ("window", "_ring")
+
+    def __init__(self, window: int = DEDUP_WINDOW):
+        self.window = window
+        self._ring = array("q", [-1]) * window
+
+    def check_and_add(self, update_id: int) -> bool:
+        """True, если update_id уже встречался (дубликат); иначе запоминает его"""
+        slot = update_id % self.window
+        if self._ring[slot] == update_id:
+            return True
+        self._ring[slot] = update_id
+        return False
+
+
+class DeduplicationMiddleware(BaseMiddleware):
+    """Outer-middleware диспетчера: повторные update_id не доходят до обработчиков"""
+
+    def __init__(self, window: int = DEDUP_WINDOW):
+        self._seen = UpdateIdWindow(window)
+        self.duplicates = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update) and self._seen.check_and_add(event.update_id):
+            # Отмечаем update_id до обработки, поэтому дубликат отсекается и во время неё
+            self.duplicates += 1
+            logger.warning(f"Повторная доставка обновления {event.update_id}, пропускаем")
+            return None
+        return await handler(event, data)
+
+
+deduplication = DeduplicationMiddleware()
@@ -0,0 +1,79 @@
+"""
+Сбор метрик для /metrics: обновления по типу, время обработчиков и запросов к Bot API.
+Сами счётчики и гистограммы — в utils/metrics.py.
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from utils.metrics import bot_api_duration, bot_api_errors, handler_duration, handler_errors, updates_total
+
+
+def handler_name(data: Dict[str, Any]) -> str:
+    """Имя обработчика: из таблицы маршрутизации (route) или из роутера aiogram"""
+    route = data.get("route")
+    if route is None:
+        handler = data.get("handler")
+        route = getattr(handler, "callback", None)
+    return getattr(route, "__name__", "unknown")
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer-middleware для dp.update: считает обновления по типу"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            updates_total.inc(event.event_type)
+        return await handler(event, data)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner-middleware для message/callback_query: время работы выбранного обработчика.
+    Inner-middleware вызывается уже после фильтров, поэтому обработчик известен.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        name = handler_name(data)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.inc(name)
+            raise
+        finally:
+            handler_duration.observe(time.perf_counter() - started, name)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время и ошибки исходящих запросов к Bot API"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Any,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            bot_api_errors.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            bot_api_duration.observe(time.perf_counter() - started, api_method)
@@ -0,0 +1,97 @@
+"""
+Ограничение частоты действий одного гостя (token bucket на пользователя).
+
+Каждое нажатие «🎁 Вишлист» или кнопки страницы — это запросы в БД и к Telegram.
+Корзины хранятся в ограниченном LRU; корзины гостей, которые давно ничего не
+делали, вытесняются. У сообщений и колбэков отдельные лимиты. Для колбэков сверх
+лимита гостю уходит только дешёвый callback.answer, чтобы не крутился индикатор
+загрузки. Так пул соединений с БД (max_size=10) не выбирает один гость.
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject, User
+
+from config import Config
+from utils.lru import LRUCache
+
+THROTTLE_NOTICE = "⏳ Слишком часто, подождите пару секунд"
+
+
+class TokenBucketLimiter:
+    """Token bucket на каждого пользователя: rate токенов в секунду, не больше burst"""
+
+    def __init__(self, rate: float, burst: int, max_users: int = 10000, idle_ttl: float = 600.0):
+        self.rate = rate
+        self.burst = burst
+        self.idle_ttl = idle_ttl
+        # user_id -> [оставшиеся токены, время последнего пополнения]
+        self._buckets = LRUCache(max_users)
+
+    def allow(self, user_id: int) -> bool:
+        """Списывает токен; False — лимит исчерпан"""
+        now = time.monotonic()
+        self._evict_idle(now)
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            self._buckets.set(user_id, [self.burst - 1.0, now])
+            return True
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1.0
+        return True
+
+    def _evict_idle(self, now: float) -> None:
+        # В начале LRU — самые давние корзины; за вызов убираем не больше пары штук
+        for _ in range(2):
+            oldest = self._buckets.oldest()
+            if oldest is None or now - oldest[1][1] < self.idle_ttl:
+                return
+            self._buckets.pop(oldest[0])
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Outer-middleware для message/callback_query: отбрасывает события сверх лимита"""
+
+    def __init__(self, limiter: TokenBucketLimiter, notice: Optional[str] = THROTTLE_NOTICE):
+        self.limiter = limiter
+        self.notice = notice
+        self.throttled_events = 0
+        # Гости, упиравшиеся в лимит (ограниченное множество для подсчёта)
+        self._throttled_users = LRUCache(10000)
+
+    @property
+    def throttled_users(self) -> int:
+        return len(self._throttled_users)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user is None or self.limiter.allow(user.id):
+            return await handler(event, data)
+
+        self.throttled_events += 1
+        self._throttled_users.set(user.id, True)
+        if isinstance(event, CallbackQuery):
+            # Отвечаем на колбэк прямо в ответе на webhook, без запросов в БД
+            return event.answer(self.notice)
+        return None
+
+
+message_throttling = ThrottlingMiddleware(
+    TokenBucketLimiter(Config.THROTTLE_MESSAGE_RATE, Config.THROTTLE_MESSAGE_BURST)
+)
+callback_throttling = ThrottlingMiddleware(
+    TokenBucketLimiter(Config.THROTTLE_CALLBACK_RATE, Config.THROTTLE_CALLBACK_BURST)
+)
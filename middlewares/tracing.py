@@ -0,0 +1,67 @@
+"""
+Span'ы трассировки для обновлений, обработчиков и запросов к Bot API.
+Сама трассировка и запись медленных обновлений — в utils/tracing.py.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import TelegramObject, Update, User
+
+from middlewares.metrics import handler_name
+from utils.tracing import Tracer, span, tracer
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Outer-middleware для dp.update: корневой span «dispatch» на каждое обновление"""
+
+    def __init__(self, tracer: Tracer = tracer):
+        self.tracer = tracer
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+        user: Optional[User] = data.get("event_from_user")
+        with self.tracer.trace(
+            "dispatch",
+            update_id=event.update_id,
+            type=event.event_type,
+            user_id=user.id if user is not None else None,
+        ) as root:
+            result = await handler(event, data)
+            if result is not None and hasattr(result, "__api_method__"):
+                # Метод, который уйдёт в теле ответа на webhook
+                root.set("webhook_reply", result.__api_method__)
+            return result
+
+
+class HandlerSpanMiddleware(BaseMiddleware):
+    """Inner-middleware для message/callback_query: span выбранного обработчика"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with span("handler", handler=handler_name(data)):
+            return await handler(event, data)
+
+
+class BotApiTracingMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: span на каждый запрос к Bot API"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Any,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        with span("bot_api", method=method.__api_method__):
+            return await make_request(bot, method)
@@ -0,0 +1,84 @@
+"""
+Заранее собранные ответы статичных разделов бота.
+Тексты берутся из messages.py, клавиатуры — из keyboards/, и всё это
+сериализуется один раз при импорте (т.е. при старте бота).
+
+Ответы неизменяемы (см. StaticReply); реестр RESPONSES — read-only словарь
+«раздел -> ответ» для мест, где раздел выбирается по имени.
+"""
+from types import MappingProxyType
+from typing import Mapping
+
+from keyboards.info import get_calendar_keyboard
+from keyboards.main_menu import MAIN_MENU_KEYBOARD
+from keyboards.wishlist import (
+    WISHLIST_EMPTY_KEYBOARD,
+    WISHLIST_INTRO_KEYBOARD,
+    WISHLIST_LOGISTICS_KEYBOARD,
+)
+from messages import (
+    get_info_text,
+    get_dresscode_text,
+    get_disclaimer_text,
+    get_wishlist_intro,
+    get_wishlist_logistics_text,
+    get_wishlist_empty_text,
+)
+from utils.webhook_reply import StaticReply
+
+INFO_REPLY = StaticReply(
+    get_info_text(),
+    reply_markup=get_calendar_keyboard(),
+    parse_mode="HTML",
+    disable_web_page_preview=True,
+)
+
+DRESSCODE_REPLY = StaticReply(
+    get_dresscode_text(),
+    reply_markup=MAIN_MENU_KEYBOARD,
+)
+
+DISCLAIMER_REPLY = StaticReply(
+    get_disclaimer_text(),
+    reply_markup=MAIN_MENU_KEYBOARD,
+)
+
+# Текст приветствия зависит от имени гостя и подставляется при ответе
+WELCOME_REPLY = StaticReply(
+    None,
+    reply_markup=MAIN_MENU_KEYBOARD,
+)
+
+WISHLIST_INTRO_REPLY = StaticReply(
+    get_wishlist_intro(),
+    reply_markup=WISHLIST_INTRO_KEYBOARD,
+)
+
+WISHLIST_LOGISTICS_REPLY = StaticReply(
+    get_wishlist_logistics_text(),
+    reply_markup=WISHLIST_LOGISTICS_KEYBOARD,
+    disable_web_page_preview=True,
+)
+
+WISHLIST_EMPTY_REPLY = StaticReply(
+    get_wishlist_empty_text(),
+    reply_markup=WISHLIST_EMPTY_KEYBOARD,
+)
+
+VIDEO_UNAVAILABLE_REPLY = StaticReply(
+    "❌ Видео временно недоступно. Обратитесь к администратору.",
+    reply_markup=MAIN_MENU_KEYBOARD,
+)
+
+RESPONSES: Mapping[str, StaticReply] = MappingProxyType(
+    {
+        "info": INFO_REPLY,
+        "dresscode": DRESSCODE_REPLY,
+        "disclaimer": DISCLAIMER_REPLY,
+        "welcome": WELCOME_REPLY,
+        "wishlist_intro": WISHLIST_INTRO_REPLY,
+        "wishlist_logistics": WISHLIST_LOGISTICS_REPLY,
+        "wishlist_empty": WISHLIST_EMPTY_REPLY,
+        "video_unavailable": VIDEO_UNAVAILABLE_REPLY,
+    }
+)
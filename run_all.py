@@ -0,0 +1,115 @@
+"""
+Все сервисы в одном процессе: webhook бота, админка (FastAPI через uvicorn),
+scheduler пушей и .ics для Apple Calendar.
+
+Для небольших деплоев вместо четырёх процессов (main.py, admin/main.py,
+admin.scheduler, calendar_server.py) — один интерпретатор, один event loop и
+один пул asyncpg на всех. Порты:
+- PORT / WEBHOOK_PORT — webhook, /health, /metrics и /wedding.ics
+  (CALENDAR_SERVER_URL тогда указывает на адрес бота);
+- ADMIN_PORT — админка.
+
+Запуск: python run_all.py
+"""
+import asyncio
+import logging
+import signal
+import sys
+
+import uvicorn
+from aiohttp import web
+
+from main import create_app, log_startup_error, start_webhook_server
+from admin.app import app as admin_app
+from admin.config import AdminConfig
+from admin.database import AdminDatabase
+from admin.scheduler import run_scheduler_forever
+from database import Database
+from utils.calendar_ics import ICS_HEADERS, generate_ics_file
+
+logger = logging.getLogger(__name__)
+
+
+async def wedding_calendar(request: web.Request) -> web.Response:
+    """То же, что /wedding.ics в calendar_server.py"""
+    return web.Response(text=generate_ics_file(), headers=ICS_HEADERS)
+
+
+def create_admin_server() -> uvicorn.Server:
+    """uvicorn.Server для админки в уже работающем event loop"""
+    config = uvicorn.Config(
+        admin_app,
+        host="0.0.0.0",
+        port=AdminConfig.ADMIN_PORT,
+        log_level="error",
+    )
+    server = uvicorn.Server(config)
+    # Сигналы обрабатывает run_all, иначе uvicorn перехватит SIGINT/SIGTERM у всего процесса
+    server.install_signal_handlers = lambda: None
+    return server
+
+
+async def main():
+    """Бот, админка, scheduler и календарь в одном event loop"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    runner = None
+    admin_task = None
+    scheduler_task = None
+    admin_server = create_admin_server()
+    try:
+        # Пулы (primary и реплику) создаёт бот (create_app -> init_bot), админка и scheduler работают через них
+        app = await create_app()
+        AdminDatabase.use_pool(Database._pool, Database._replica_pool)
+
+        app.router.add_get("/wedding.ics", wedding_calendar)
+        runner = await start_webhook_server(app)
+
+        admin_task = asyncio.create_task(admin_server.serve())
+        scheduler_task = asyncio.create_task(run_scheduler_forever())
+
+        # Падение админки или scheduler'а останавливает весь процесс, как и сигнал
+        stop_task = asyncio.create_task(stop.wait())
+        done, _ = await asyncio.wait(
+            {stop_task, admin_task, scheduler_task},
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        stop_task.cancel()
+        for task in done:
+            if task is stop_task:
+                continue
+            # exception() у отменённой задачи сам бросает CancelledError — проверяем отмену раньше
+            error = None if task.cancelled() else task.exception()
+            if error is not None:
+                raise error
+            # uvicorn завершает serve() без исключения, если не прошёл startup админки
+            logger.error("❌ Админка или scheduler остановились, завершаем процесс")
+            sys.exit(1)
+
+    except Exception as e:
+        log_startup_error(e)
+        sys.exit(1)
+    finally:
+        # Сначала админка и scheduler, затем бот (сбрасывает активность в БД), в конце — пул
+        if admin_task is not None:
+            admin_server.should_exit = True
+            await asyncio.gather(admin_task, return_exceptions=True)
+        if scheduler_task is not None:
+            scheduler_task.cancel()
+            await asyncio.gather(scheduler_task, return_exceptions=True)
+        if runner is not None:
+            await runner.cleanup()
+        try:
+            await Database.close_pool()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Параллельная отправка независимых запросов к Bot API из одного обработчика.
+
+Обработчики колбэков обычно делают два независимых вызова: callback.answer()
+и edit_text()/answer(). Последовательное ожидание удваивает задержку, которую
+видит гость. Здесь вызовы запускаются одновременно, а ошибка одного из них не
+мешает остальным.
+
+Первый метод возвращается из обработчика: в режиме webhook-reply aiogram
+отдаёт его прямо в теле ответа на webhook (без отдельного HTTP-запроса), а в
+фоновом режиме отправляет сам.
+"""
+import asyncio
+import logging
+from typing import Any, List, Optional, Set
+
+from aiogram.methods import TelegramMethod
+
+from utils.message_edit import forget_failed_edit, is_not_modified_error
+
+logger = logging.getLogger(__name__)
+
+# Ссылки на фоновые задачи, чтобы их не собрал GC до завершения
+_background_calls: Set[asyncio.Task] = set()
+
+
+async def _call_isolated(method: TelegramMethod[Any]) -> Optional[Any]:
+    """Выполняет один вызов; ошибка логируется и не пробрасывается дальше"""
+    try:
+        return await method
+    except Exception as e:
+        if is_not_modified_error(e):
+            return None
+        forget_failed_edit(method)
+        logger.error(f"Ошибка вызова Bot API {method.__api_method__}: {e}")
+        return None
+
+
+async def call_concurrently(*methods: Optional[TelegramMethod[Any]]) -> List[Optional[Any]]:
+    """
+    Выполняет вызовы одновременно и ждёт их завершения.
+    Пропущенные (None) методы игнорируются, неудачные дают None в результате.
+    """
+    return await asyncio.gather(*(_call_isolated(m) for m in methods if m is not None))
+
+
+def run_in_background(*methods: Optional[TelegramMethod[Any]]) -> None:
+    """Запускает вызовы в фоне, не дожидаясь результата"""
+    for method in methods:
+        if method is None:
+            continue
+        task = asyncio.create_task(_call_isolated(method))
+        _background_calls.add(task)
+        task.add_done_callback(_background_calls.discard)
+
+
+def reply_concurrently(*methods: Optional[TelegramMethod[Any]]) -> Optional[TelegramMethod[Any]]:
+    """
+    Возвращает первый метод для ответа на webhook, остальные запускает параллельно.
+
+    Использование в обработчике:
+        return reply_concurrently(callback.answer(), prepare_edit_text(...))
+
+    Первым лучше передавать callback.answer(): ошибки вызова из тела ответа
+    на webhook не видны, а потеря answer безобидна.
+    """
+    pending = [m for m in methods if m is not None]
+    if not pending:
+        return None
+    run_in_background(*pending[1:])
+    return pending[0]
+
+
+async def drain_background_calls(timeout: float = 5.0) -> None:
+    """Дожидается незавершённых фоновых вызовов (при остановке бота)"""
+    if not _background_calls:
+        return
+    await asyncio.wait(set(_background_calls), timeout=timeout)
@@ -0,0 +1,89 @@
+"""
+Компактный формат callback_data: код действия и упакованные id.
+
+Новый формат — "wi:1z" (код действия, двоеточие, id в base36 через точку).
+Он короче старого "wishlist_item_71", оставляет больше места в лимите
+Telegram (64 байта) и разбирается одним partition без split по всей строке.
+
+Кнопки в уже отправленных сообщениях остаются со старыми данными
+("wishlist_item_5", "wishlist_open"), поэтому decode понимает и их.
+"""
+from typing import Optional, Tuple
+
+# Коды действий
+WISHLIST_OPEN = "wo"
+WISHLIST_LOGISTICS = "wg"
+WISHLIST_BACK_TO_INTRO = "wb"
+WISHLIST_LIST = "wl"
+WISHLIST_PAGE = "wp"
+WISHLIST_ITEM = "wi"
+WISHLIST_TAKE = "wt"
+WISHLIST_UNTAKE = "wu"
+MAIN_MENU = "mm"
+
+# Старые callback_data без id
+_LEGACY_EXACT = {
+    "wishlist_open": WISHLIST_OPEN,
+    "wishlist_logistics": WISHLIST_LOGISTICS,
+    "wishlist_back_to_intro": WISHLIST_BACK_TO_INTRO,
+    "wishlist_list": WISHLIST_LIST,
+    "main_menu": MAIN_MENU,
+}
+
+# Старые callback_data вида "<префикс>_<id>"
+_LEGACY_PREFIXES = {
+    "wishlist_page": WISHLIST_PAGE,
+    "wishlist_item": WISHLIST_ITEM,
+    "wishlist_take": WISHLIST_TAKE,
+    "wishlist_untake": WISHLIST_UNTAKE,
+}
+
+Decoded = Tuple[str, Tuple[int, ...]]
+
+
+def _to_base36(value: int) -> str:
+    if value < 0:
+        return "-" + _to_base36(-value)
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while True:
+        value, rest = divmod(value, 36)
+        result = digits[rest] + result
+        if not value:
+            return result
+
+
+def encode(action: str, *ids: int) -> str:
+    """Собирает callback_data: encode(WISHLIST_ITEM, 71) -> "wi:1z" """
+    if not ids:
+        return action
+    return action + ":" + ".".join(_to_base36(int(i)) for i in ids)
+
+
+def decode(data: Optional[str]) -> Optional[Decoded]:
+    """
+    Разбирает callback_data в (код действия, id).
+    Возвращает None для пустых или повреждённых данных.
+    """
+    if not data:
+        return None
+
+    action, sep, packed = data.partition(":")
+    if sep:
+        try:
+            return action, tuple(int(part, 36) for part in packed.split("."))
+        except ValueError:
+            return None
+
+    legacy = _LEGACY_EXACT.get(data)
+    if legacy is not None:
+        return legacy, ()
+
+    prefix, sep, tail = data.rpartition("_")
+    if sep and prefix in _LEGACY_PREFIXES:
+        try:
+            return _LEGACY_PREFIXES[prefix], (int(tail),)
+        except ValueError:
+            return None
+
+    return data, ()
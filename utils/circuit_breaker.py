@@ -0,0 +1,90 @@
+"""
+Автоматический выключатель (circuit breaker) для обращений к внешнему сервису.
+
+Пока сервис отвечает, выключатель закрыт (closed). После failure_threshold
+сбоев подряд он размыкается (open): вызовы сразу отклоняются, не дожидаясь
+таймаута, — обработчик может ответить гостю из кеша или попросить повторить.
+Через reset_timeout секунд выключатель пропускает один пробный вызов
+(half_open): успех замыкает его, сбой снова размыкает.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонён: выключатель разомкнут"""
+
+
+class CircuitBreaker:
+    """Выключатель с порогом сбоев подряд и паузой перед пробным вызовом"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 15.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # Метрики
+        self.opened_count = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def before_call(self) -> None:
+        """Проверка перед вызовом; CircuitOpenError — вызывать нельзя"""
+        if self.state == CLOSED:
+            return
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            # Пробный вызов один: остальные отклоняются, пока он не завершится
+            self._probe_in_flight = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(f"{self.name}: выключатель разомкнут")
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"✅ {self.name}: сервис снова отвечает, выключатель замкнут")
+        self.state = CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        self.last_error = f"{type(error).__name__}: {error}"
+        self._failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+            if self.state == CLOSED:
+                self.opened_count += 1
+                logger.error(f"❌ {self.name}: {self._failures} сбоев подряд, выключатель разомкнут ({self.last_error})")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Пробный вызов завершился без ответа о здоровье сервиса (например, отменён)"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние для /health"""
+        status: Dict[str, Any] = {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened_count,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+        if self.state == OPEN:
+            status["retry_in_seconds"] = round(
+                max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1
+            )
+        return status
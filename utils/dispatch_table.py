@@ -0,0 +1,96 @@
+"""
+Таблица маршрутизации для кнопок меню и inline-кнопок.
+
+Раньше каждое обновление проходило по всем роутерам и проверяло фильтры
+F.text == ... и F.data.startswith(...) по очереди, так что время выбора
+обработчика росло с числом разделов. Здесь точный текст кнопки меню и код
+действия из callback_data (см. utils/callback_codec.py) ищутся в словаре,
+а обработчик колбэка сразу получает разобранные id.
+
+Таблица отдаёт один роутер, который подключается к диспетчеру первым.
+Остальные обработчики (команды, видео) работают через обычные роутеры aiogram.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from aiogram import Router
+from aiogram.types import CallbackQuery, Message
+
+from utils.callback_codec import decode
+
+MessageHandler = Callable[[Message], Awaitable[Any]]
+CallbackHandler = Callable[..., Awaitable[Any]]
+
+
+class DispatchTable:
+    """Словари «текст кнопки -> обработчик» и «код действия -> обработчик»"""
+
+    def __init__(self, name: str = "dispatch_table"):
+        self._texts: Dict[str, MessageHandler] = {}
+        self._actions: Dict[str, CallbackHandler] = {}
+        self.router = Router(name=name)
+        self.router.message.register(self._dispatch_message, self._match_message)
+        self.router.callback_query.register(self._dispatch_callback, self._match_callback)
+
+    def message(self, text: str) -> Callable[[MessageHandler], MessageHandler]:
+        """Декоратор: обработчик сообщения с точным текстом (кнопки главного меню)"""
+
+        def decorator(handler: MessageHandler) -> MessageHandler:
+            if text in self._texts:
+                raise ValueError(f"Текст «{text}» уже зарегистрирован")
+            self._texts[text] = handler
+            return handler
+
+        return decorator
+
+    def callback(self, action: str) -> Callable[[CallbackHandler], CallbackHandler]:
+        """
+        Декоратор: обработчик колбэка с кодом действия.
+        Обработчик вызывается как handler(callback, *ids).
+        """
+
+        def decorator(handler: CallbackHandler) -> CallbackHandler:
+            if action in self._actions:
+                raise ValueError(f"Действие «{action}» уже зарегистрировано")
+            self._actions[action] = handler
+            return handler
+
+        return decorator
+
+    def resolve_message(self, text: Optional[str]) -> Optional[MessageHandler]:
+        return self._texts.get(text) if text else None
+
+    def resolve_callback(self, data: Optional[str]) -> Optional[tuple]:
+        """(обработчик, id) для callback_data или None"""
+        decoded = decode(data)
+        if decoded is None:
+            return None
+        handler = self._actions.get(decoded[0])
+        if handler is None:
+            return None
+        return handler, decoded[1]
+
+    # Фильтры роутера: возвращают найденный обработчик в data, чтобы не искать дважды
+
+    def _match_message(self, message: Message) -> Union[bool, Dict[str, Any]]:
+        handler = self.resolve_message(message.text)
+        if handler is None:
+            return False
+        return {"route": handler}
+
+    def _match_callback(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        resolved = self.resolve_callback(callback.data)
+        if resolved is None:
+            return False
+        return {"route": resolved[0], "route_ids": resolved[1]}
+
+    @staticmethod
+    async def _dispatch_message(message: Message, route: MessageHandler) -> Any:
+        return await route(message)
+
+    @staticmethod
+    async def _dispatch_callback(callback: CallbackQuery, route: CallbackHandler, route_ids: tuple) -> Any:
+        return await route(callback, *route_ids)
+
+
+# Общая таблица бота; обработчики регистрируются при импорте модулей handlers/
+dispatch = DispatchTable()
@@ -0,0 +1,49 @@
+"""
+JSON для трафика Bot API: тела webhook, запросы сессии aiogram, рассылки
+scheduler'а и сообщения в группу логов.
+
+Если установлен orjson, используется он (разбор и сериализация в несколько раз
+быстрее стандартного json), иначе — стандартный json с теми же параметрами:
+компактные разделители и UTF-8 без \\u-экранирования, так что результат
+одинаков. JSON_CODEC=json принудительно включает стандартный модуль.
+
+Отладочные файлы (трассировка, EXPLAIN) по-прежнему пишутся стандартным json:
+там нужен default=str для произвольных значений.
+"""
+import json
+from typing import Any, Union
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    # orjson необязателен: без него работает стандартный json
+    orjson = None
+
+# Заголовок для httpx-запросов с готовым телом (content=dumps_bytes(...))
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+if orjson is not None and Config.JSON_CODEC != "json":
+    BACKEND = "orjson"
+
+    def dumps_bytes(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def dumps(value: Any) -> str:
+        return orjson.dumps(value).decode("utf-8")
+
+    loads = orjson.loads
+else:
+    BACKEND = "json"
+
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(value: Any) -> str:
+        return _encoder.encode(value)
+
+    def dumps_bytes(value: Any) -> bytes:
+        return _encoder.encode(value).encode("utf-8")
+
+    def loads(data: Union[str, bytes]) -> Any:
+        return json.loads(data)
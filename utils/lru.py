@@ -0,0 +1,58 @@
+"""
+Простой ограниченный LRU-кеш для in-memory структур бота
+"""
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+
+class LRUCache:
+    """Словарь с ограниченным размером: при переполнении вытесняется самый давний ключ"""
+
+    __slots__ = ("max_size", "_data")
+
+    def __init__(self, max_size: int = 4096):
+        if max_size <= 0:
+            raise ValueError("max_size должен быть больше нуля")
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает значение и помечает ключ как недавно использованный"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение, вытесняя самый старый ключ при переполнении"""
+        data = self._data
+        if key in data:
+            data.move_to_end(key)
+        data[key] = value
+        if len(data) > self.max_size:
+            data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Удаляет ключ и возвращает его значение"""
+        return self._data.pop(key, default)
+
+    def oldest(self) -> Optional[Tuple[Hashable, Any]]:
+        """Возвращает самую давнюю пару (ключ, значение) без изменения порядка"""
+        if not self._data:
+            return None
+        key = next(iter(self._data))
+        return key, self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._data)
@@ -0,0 +1,92 @@
+"""
+Пропуск повторных редактирований сообщений с тем же содержимым.
+
+Гости часто нажимают «🔙 К списку» или кнопки страниц по несколько раз подряд.
+Telegram отвечает на такие edit_text ошибкой "message is not modified", а мы
+тратим на это полный запрос к API. Здесь хранится отпечаток последнего
+отрисованного текста и клавиатуры для каждого (chat_id, message_id), и
+одинаковые редактирования отсекаются локально.
+"""
+from typing import Any, Optional
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+from aiogram.types import Message
+
+from utils.lru import LRUCache
+
+# Сколько сообщений помнить (примерно по одному-два на активного гостя)
+EDIT_CACHE_SIZE = 4096
+
+
+class EditFingerprintCache:
+    """LRU-кеш отпечатков последнего содержимого сообщений"""
+
+    def __init__(self, max_size: int = EDIT_CACHE_SIZE):
+        self._cache = LRUCache(max_size)
+        self.skipped = 0
+
+    @staticmethod
+    def fingerprint(text: str, reply_markup: Any = None, **kwargs: Any) -> int:
+        """Отпечаток текста, клавиатуры и параметров отображения"""
+        markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup is not None else ""
+        options = tuple(sorted((key, repr(value)) for key, value in kwargs.items()))
+        return hash((text, markup, options))
+
+    def is_unchanged(self, chat_id: int, message_id: int, fingerprint: int) -> bool:
+        """True, если сообщение уже показывает это содержимое"""
+        return self._cache.get((chat_id, message_id)) == fingerprint
+
+    def remember(self, chat_id: int, message_id: int, fingerprint: int) -> None:
+        self._cache.set((chat_id, message_id), fingerprint)
+
+    def forget(self, chat_id: int, message_id: int) -> None:
+        self._cache.pop((chat_id, message_id))
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+edit_cache = EditFingerprintCache()
+
+
+def is_not_modified_error(error: Exception) -> bool:
+    """True для ошибки Telegram «message is not modified»"""
+    return isinstance(error, TelegramBadRequest) and "message is not modified" in str(error).lower()
+
+
+def prepare_edit_text(
+    message: Message,
+    text: str,
+    reply_markup: Optional[Any] = None,
+    *,
+    fingerprint: Optional[int] = None,
+    **kwargs: Any,
+) -> Optional[EditMessageText]:
+    """
+    Готовит (но не отправляет) метод editMessageText.
+
+    Возвращает None, если сообщение уже показывает это содержимое. Отпечаток
+    запоминается сразу; при неудачной отправке его сбрасывает forget_failed_edit().
+    Для заранее собранных ответов отпечаток можно передать готовым (fingerprint).
+    """
+    chat_id = message.chat.id
+    message_id = message.message_id
+    if fingerprint is None:
+        fingerprint = edit_cache.fingerprint(text, reply_markup, **kwargs)
+
+    if edit_cache.is_unchanged(chat_id, message_id, fingerprint):
+        edit_cache.skipped += 1
+        return None
+
+    # Метод собирается до запоминания: если aiogram его не примет, отпечаток не останется
+    method = message.edit_text(text, reply_markup=reply_markup, **kwargs)
+    edit_cache.remember(chat_id, message_id, fingerprint)
+    return method
+
+
+def forget_failed_edit(method: Any) -> None:
+    """Сбрасывает отпечаток, если подготовленное редактирование не дошло до Telegram"""
+    if isinstance(method, EditMessageText) and method.message_id is not None:
+        edit_cache.forget(method.chat_id, method.message_id)
+
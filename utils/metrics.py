@@ -0,0 +1,215 @@
+"""
+Метрики бота в формате Prometheus (эндпоинт /metrics в main.py).
+
+Все обновления обрабатываются в одном event loop, поэтому счётчики — это
+обычные словари и списки без блокировок: инкремент стоит одно обращение к
+dict, гистограмма — bisect по границам корзин. Значения, которые и так
+хранятся в других модулях (размер пула БД, очереди), не дублируются, а
+читаются функциями-коллекторами в момент запроса /metrics.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Границы корзин по умолчанию (секунды): от быстрых обработчиков до таймаутов Bot API
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Монотонный счётчик с метками"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterable[str]:
+        for label_values, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как histogram в Prometheus)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label_values -> [счётчики по корзинам..., +Inf, сумма]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._values.get(label_values)
+        if series is None:
+            series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        # Корзины храним без накопления, суммируем только при выводе
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._values.get(label_values)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        bounds = self.buckets + (float("inf"),)
+        for label_values, series in self._values.items():
+            cumulative = 0
+            for bound, hits in zip(bounds, series):
+                cumulative += hits
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(series[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+GaugeValue = Union[float, Dict[LabelValues, float], None]
+
+
+class CallbackGauge:
+    """
+    Значение, которое читается функцией в момент запроса /metrics.
+    kind="counter" — для счётчиков, которые ведут другие модули.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], GaugeValue],
+        labels: Sequence[str] = (),
+        kind: str = "gauge",
+    ):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._collect = collect
+
+    def samples(self) -> Iterable[str]:
+        value = self._collect()
+        if value is None:
+            return
+        if isinstance(value, dict):
+            for label_values, item in value.items():
+                yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(item)}"
+        else:
+            yield f"{self.name} {_format_value(value)}"
+
+
+Metric = Union[Counter, Histogram, CallbackGauge]
+
+
+class MetricsRegistry:
+    """Набор метрик и вывод в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], GaugeValue],
+        labels: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, collect, labels, kind))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = MetricsRegistry()
+
+# Обновления и обработчики
+updates_total = registry.counter(
+    "bot_updates_total", "Обновления Telegram по типу", labels=("type",)
+)
+handler_duration = registry.histogram(
+    "bot_handler_duration_seconds", "Время работы обработчика", labels=("handler",)
+)
+handler_errors = registry.counter(
+    "bot_handler_errors_total", "Исключения в обработчиках", labels=("handler",)
+)
+
+# Исходящие запросы к Bot API (ответы в теле webhook сюда не попадают)
+bot_api_duration = registry.histogram(
+    "bot_api_request_duration_seconds", "Время запроса к Bot API", labels=("method",)
+)
+bot_api_errors = registry.counter(
+    "bot_api_errors_total", "Ошибки запросов к Bot API", labels=("method", "error")
+)
+
+# Пул соединений с БД
+db_acquire_wait = registry.histogram(
+    "db_pool_acquire_wait_seconds",
+    "Ожидание свободного соединения из пула",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
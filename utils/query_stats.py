@@ -0,0 +1,264 @@
+"""
+Статистика SQL-запросов для обёрток над пулом (Database и AdminDatabase).
+
+Время каждого запроса записывается под его именем из database/queries.py, а
+для запросов, переданных текстом, — под нормализованным текстом SQL (пробелы
+схлопнуты, литералы заменены на ?), так что один и тот же запрос из разных
+обработчиков попадает в одну строку статистики. Для p50/p99 хранятся последние
+SAMPLES_PER_QUERY замеров каждого запроса. Ожидание соединения из пула
+считается отдельно от выполнения запроса.
+
+Запросы дольше порога логируются с параметрами; при заданном explain_file
+их план (EXPLAIN без ANALYZE — запрос повторно не выполняется) дописывается в файл.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SAMPLES_PER_QUERY = 1024
+QUERY_LABEL_LIMIT = 160
+PARAM_REPR_LIMIT = 200
+
+_SPACES = re.compile(r"\s+")
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+
+_EXPLAINABLE = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"}
+
+# Кеш нормализации: тексты запросов в коде постоянные, поэтому регулярки срабатывают один раз
+_normalized: Dict[str, str] = {}
+
+
+def normalize_sql(query: str) -> str:
+    """Текст запроса без лишних пробелов и литералов (параметры $1.. остаются)"""
+    result = _normalized.get(query)
+    if result is None:
+        result = _SPACES.sub(" ", query).strip()
+        result = _STRINGS.sub("?", result)
+        result = _NUMBERS.sub("?", result)
+        if len(_normalized) < 4096:
+            _normalized[query] = result
+    return result
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _format_params(args: Iterable[Any]) -> str:
+    parts = []
+    for value in args:
+        text = repr(value)
+        if len(text) > PARAM_REPR_LIMIT:
+            text = text[:PARAM_REPR_LIMIT] + "…"
+        parts.append(text)
+    return "[" + ", ".join(parts) + "]"
+
+
+class _Timings:
+    __slots__ = ("count", "total", "max", "errors", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.samples: Deque[float] = deque(maxlen=SAMPLES_PER_QUERY)
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.samples.append(duration)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(_percentile(ordered, 0.5) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class QueryStats:
+    """
+    Статистика запросов одного пула. Регистрируется в реестре /metrics как summary
+    (kind/name/documentation/samples — интерфейс метрик из utils/metrics.py).
+    """
+
+    kind = "summary"
+
+    def __init__(
+        self,
+        name: str,
+        slow_query_ms: float = 500.0,
+        explain_file: str = "",
+    ):
+        self.name = name
+        self.documentation = "Время выполнения SQL-запросов по нормализованному тексту"
+        self.slow_threshold = slow_query_ms / 1000
+        self.explain_file = explain_file
+        self._queries: Dict[str, _Timings] = {}
+        self.acquire = _Timings()
+        self.slow_queries = 0
+        self._explained: set = set()
+        # Ссылки на задачи EXPLAIN, чтобы их не собрал GC до завершения
+        self._explain_tasks: set = set()
+
+    def record_acquire(self, wait: float) -> None:
+        """Ожидание свободного соединения из пула"""
+        self.acquire.add(wait)
+
+    def record(
+        self,
+        query: str,
+        duration: float,
+        args: Sequence[Any],
+        failed: bool = False,
+        name: Optional[str] = None,
+    ) -> bool:
+        """Записывает замер; True — запрос медленный (уже залогирован)"""
+        key = name or normalize_sql(query)
+        timings = self._queries.get(key)
+        if timings is None:
+            timings = self._queries[key] = _Timings()
+        timings.add(duration)
+        if failed:
+            timings.errors += 1
+        if duration < self.slow_threshold:
+            return False
+        self.slow_queries += 1
+        logger.warning(
+            f"Медленный запрос ({duration * 1000:.1f} мс): {key[:500]} параметры={_format_params(args)}"
+        )
+        return True
+
+    def should_explain(self, query: str, name: Optional[str] = None) -> bool:
+        """План пишется один раз на запрос (только для DML — у DDL плана нет)"""
+        if not self.explain_file:
+            return False
+        if normalize_sql(query).split(" ", 1)[0].upper() not in _EXPLAINABLE:
+            return False
+        key = name or normalize_sql(query)
+        if key in self._explained:
+            return False
+        self._explained.add(key)
+        return True
+
+    def schedule_explain(
+        self,
+        pool: Any,
+        query: str,
+        args: Sequence[Any],
+        duration: float,
+        name: Optional[str] = None,
+    ) -> None:
+        """Запускает capture_explain в фоне, если план этого запроса ещё не сохранён"""
+        if not self.should_explain(query, name):
+            return
+        task = asyncio.create_task(self.capture_explain(pool, query, args, duration, name))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def capture_explain(
+        self,
+        pool: Any,
+        query: str,
+        args: Sequence[Any],
+        duration: float,
+        name: Optional[str] = None,
+    ) -> None:
+        """EXPLAIN медленного запроса в explain_file (одна JSON-строка на план)"""
+        try:
+            async with pool.acquire() as connection:
+                rows = await connection.fetch(f"EXPLAIN (FORMAT TEXT) {query}", *args)
+            plan = "\n".join(row[0] for row in rows)
+            record = {
+                "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "duration_ms": round(duration * 1000, 3),
+                "name": name,
+                "query": normalize_sql(query),
+                "params": _format_params(args),
+                "plan": plan,
+            }
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            await asyncio.to_thread(self._append, line)
+        except Exception as e:
+            logger.error(f"Не удалось получить EXPLAIN медленного запроса: {e}")
+
+    def _append(self, line: str) -> None:
+        with open(self.explain_file, "a", encoding="utf-8") as file:
+            file.write(line)
+
+    def report(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Сводка: запросы по суммарному времени (самые дорогие первыми) и ожидание пула"""
+        queries: List[Dict[str, Any]] = []
+        for key, timings in self._queries.items():
+            queries.append({"query": key, **timings.summary()})
+        queries.sort(key=lambda item: item["total_ms"], reverse=True)
+        return {
+            "acquire": self.acquire.summary(),
+            "slow_queries": self.slow_queries,
+            "queries": queries[:limit] if limit else queries,
+        }
+
+    def samples(self) -> Iterable[str]:
+        """Строки для /metrics: p50/p99, сумма и количество по каждому запросу"""
+        for key, timings in list(self._queries.items()):
+            label = json.dumps(key[:QUERY_LABEL_LIMIT], ensure_ascii=False)
+            ordered = sorted(timings.samples)
+            for quantile in (0.5, 0.99):
+                value = _percentile(ordered, quantile)
+                yield f'{self.name}{{query={label},quantile="{quantile}"}} {value!r}'
+            yield f"{self.name}_sum{{query={label}}} {timings.total!r}"
+            yield f"{self.name}_count{{query={label}}} {timings.count}"
+
+
+class QueryTimer:
+    """
+    Замер одного запроса: with QueryTimer(stats, query, args): ...
+    Создаётся обёрткой над пулом; медленный запрос при необходимости уходит в EXPLAIN.
+    name — имя запроса из database/queries.py (ключ статистики вместо текста).
+    """
+
+    __slots__ = ("stats", "query", "args", "pool", "name", "started")
+
+    def __init__(
+        self,
+        stats: QueryStats,
+        query: str,
+        args: Sequence[Any],
+        pool: Any = None,
+        name: Optional[str] = None,
+    ):
+        self.stats = stats
+        self.query = query
+        self.args = args
+        self.pool = pool
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> "QueryTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self.started
+        slow = self.stats.record(self.query, duration, self.args, failed=exc_type is not None, name=self.name)
+        if slow and exc_type is None and self.pool is not None:
+            self.stats.schedule_explain(self.pool, self.query, self.args, duration, self.name)
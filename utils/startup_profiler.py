@@ -0,0 +1,176 @@
+"""
+Профилировщик холодного старта: время импорта модулей и фаз инициализации.
+
+На хостинге с засыпанием (scale-to-zero) каждый холодный старт ждёт гость,
+поэтому полезно видеть, из чего он складывается:
+- импорты — хук в sys.meta_path замеряет выполнение каждого модуля
+  (собственное время и вместе с вложенными импортами); включается
+  STARTUP_PROFILE=true, т.к. добавляет немного работы каждому импорту;
+- фазы — создание пула, миграции, запуск веб-сервера, set_webhook и т.п.
+  через with startup_profiler.phase("..."); записываются всегда, это
+  несколько вызовов perf_counter.
+
+Модуль не импортирует ничего, кроме стандартной библиотеки, чтобы его можно
+было подключить первым в main.py. Отсчёт времени — от импорта этого модуля.
+"""
+import importlib.abc
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _TimingLoader(importlib.abc.Loader):
+    """Обёртка над настоящим загрузчиком: замеряет exec_module и возвращает загрузчик на место"""
+
+    def __init__(self, loader: Any, profiler: "StartupProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        profiler = self._profiler
+        profiler._enter_import()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            profiler._exit_import(module.__name__)
+            # После импорта модуль не должен видеть обёртку (get_data, get_source и т.п.)
+            module.__loader__ = self._loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Находит модуль остальными finder'ами и подменяет загрузчик на замеряющий"""
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _TimingLoader(spec.loader, self._profiler)
+        return spec
+
+
+class StartupProfiler:
+    """Замеры холодного старта одного процесса"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports_finished: Optional[float] = None
+        self.ready: Optional[float] = None
+        self.phases: List[Tuple[str, float, float]] = []  # (имя, начало от старта, длительность)
+        # Модуль -> (время с вложенными импортами, собственное время)
+        self.imports: Dict[str, Tuple[float, float]] = {}
+        self._finder: Optional[_TimingFinder] = None
+        # Стек выполняющихся импортов: [начало, время вложенных импортов]
+        self._stack: List[List[float]] = []
+
+    # --- Импорты ---
+
+    def install(self) -> None:
+        """Начинает замер импортов (хук ставится первым в sys.meta_path)"""
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def finish_imports(self) -> None:
+        """Конец импортов при старте: хук снимается, поздние импорты не замеряются"""
+        if self.imports_finished is None:
+            self.imports_finished = time.perf_counter()
+        if self._finder is not None:
+            try:
+                sys.meta_path.remove(self._finder)
+            except ValueError:
+                pass
+            self._finder = None
+
+    def _enter_import(self) -> None:
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def _exit_import(self, name: str) -> None:
+        started, nested = self._stack.pop()
+        duration = time.perf_counter() - started
+        self.imports[name] = (duration, duration - nested)
+        if self._stack:
+            self._stack[-1][1] += duration
+
+    # --- Фазы ---
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Фаза инициализации: with startup_profiler.phase("db_pool"): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, started - self.started, time.perf_counter() - started))
+
+    def mark_ready(self) -> None:
+        """Веб-сервер принимает соединения"""
+        if self.ready is None:
+            self.ready = time.perf_counter()
+
+    # --- Отчёт ---
+
+    def _since_start(self, moment: Optional[float]) -> Optional[float]:
+        return round((moment - self.started) * 1000, 1) if moment is not None else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Сводка для /health: время до конца импортов, до готовности и фазы (мс)"""
+        return {
+            "imports_ms": self._since_start(self.imports_finished),
+            "ready_ms": self._since_start(self.ready),
+            "phases": [
+                {"name": name, "start_ms": round(offset * 1000, 1), "duration_ms": round(duration * 1000, 1)}
+                for name, offset, duration in self.phases
+            ],
+        }
+
+    def slowest_imports(self, limit: int = 25) -> List[Tuple[str, float, float]]:
+        """Самые дорогие модули по собственному времени: (модуль, с вложенными, собственное)"""
+        ordered = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        return [(name, total, own) for name, (total, own) in ordered[:limit]]
+
+    def report(self, limit: int = 25) -> str:
+        summary = self.summary()
+        lines = [
+            f"Холодный старт: импорты {summary['imports_ms']} мс, "
+            f"готов принимать webhook через {summary['ready_ms']} мс"
+        ]
+        for phase in summary["phases"]:
+            lines.append(
+                f"  фаза {phase['name']:<20} +{phase['start_ms']:>8.1f} мс  {phase['duration_ms']:>8.1f} мс"
+            )
+        if self.imports:
+            lines.append(f"  импорты (собственное / с вложенными, мс), всего модулей: {len(self.imports)}")
+            for name, total, own in self.slowest_imports(limit):
+                lines.append(f"    {own * 1000:>8.1f} {total * 1000:>8.1f}  {name}")
+        return "\n".join(lines)
+
+    def log_report(self, limit: int = 25) -> None:
+        logger.info(self.report(limit))
+
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,170 @@
+"""
+Ограниченная очередь фоновых задач для некритичных побочных эффектов
+(уведомления админам, аналитика, аудит).
+
+Обработчик кладёт задачу в очередь и сразу отвечает гостю, а задачу выполняют
+воркеры. Очередь ограничена по размеру; при переполнении работает одна из политик:
+- drop_new — новая задача отбрасывается;
+- drop_oldest — отбрасывается самая старая задача в очереди;
+- block — отправитель ждёт место не дольше put_timeout, затем задача отбрасывается.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DROP_NEW = "drop_new"
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+_Job = Tuple[Callable[..., Awaitable[Any]], tuple, str, float]
+
+
+class BackgroundTaskQueue:
+    """Очередь корутин-функций с пулом воркеров"""
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = 1000,
+        workers: int = 2,
+        overflow: str = DROP_NEW,
+        put_timeout: float = 1.0,
+    ):
+        if overflow not in (DROP_NEW, DROP_OLDEST, BLOCK):
+            raise ValueError(f"Неизвестная политика переполнения: {overflow}")
+        self.name = name
+        self.max_size = max_size
+        self.workers_count = workers
+        self.overflow = overflow
+        self.put_timeout = put_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Метрики
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.high_watermark = 0
+        self.wait_time_total = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Запускает воркеры (вызывается из on_startup)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers_count)
+        ]
+
+    async def submit(self, func: Callable[..., Awaitable[Any]], *args: Any, label: Optional[str] = None) -> bool:
+        """
+        Ставит func(*args) в очередь. Возвращает False, если задача отброшена.
+        Если воркеры не запущены (например, в отдельном скрипте), задача выполняется сразу.
+        """
+        label = label or getattr(func, "__name__", "task")
+        if not self.running:
+            await self._run_job((func, args, label, time.monotonic()))
+            return True
+
+        job: _Job = (func, args, label, time.monotonic())
+        self.submitted += 1
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            if not await self._handle_overflow(job):
+                self.dropped += 1
+                logger.warning(f"Очередь {self.name} переполнена, задача {label} отброшена")
+                return False
+
+        depth = self._queue.qsize()
+        if depth > self.high_watermark:
+            self.high_watermark = depth
+        return True
+
+    async def _handle_overflow(self, job: _Job) -> bool:
+        if self.overflow == DROP_OLDEST:
+            try:
+                _, _, old_label, _ = self._queue.get_nowait()
+                self._queue.task_done()
+            except asyncio.QueueEmpty:
+                pass
+            else:
+                self.dropped += 1
+                logger.warning(f"Очередь {self.name} переполнена, вытеснена задача {old_label}")
+            self._queue.put_nowait(job)
+            return True
+        if self.overflow == BLOCK:
+            try:
+                await asyncio.wait_for(self._queue.put(job), timeout=self.put_timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+        return False
+
+    async def _run_job(self, job: _Job) -> None:
+        func, args, label, enqueued_at = job
+        self.wait_time_total += time.monotonic() - enqueued_at
+        try:
+            await func(*args)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Ошибка фоновой задачи {label} в очереди {self.name}: {e}", exc_info=True)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Дожидается выполнения оставшихся задач и останавливает воркеры (on_shutdown)"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Очередь {self.name}: не дождались {self._queue.qsize()} задач при остановке")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики очереди"""
+        finished = self.processed + self.failed
+        return {
+            "depth": self.depth,
+            "max_size": self.max_size,
+            "high_watermark": self.high_watermark,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "avg_wait_ms": round(self.wait_time_total / finished * 1000, 2) if finished else 0.0,
+        }
+
+
+# Очередь для некритичных побочных эффектов обработчиков бота
+side_effects = BackgroundTaskQueue(
+    "side_effects",
+    max_size=Config.SIDE_EFFECTS_QUEUE_SIZE,
+    workers=Config.SIDE_EFFECTS_WORKERS,
+    overflow=Config.SIDE_EFFECTS_OVERFLOW,
+)
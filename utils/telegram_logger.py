@@ -3,10 +3,16 @@
 """
 import asyncio
 import logging
-import httpx
+import queue
 import threading
-from typing import Optional
+import time
+from collections import OrderedDict, deque
+from html import escape
+from typing import Deque, List, Optional, Tuple
+
+import httpx
 from config import Config
+from utils import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -54,15 +60,16 @@ def send_to_logs_group_sync(message: str) -> bool:
         url = f"https://api.telegram.org/bot{Config.BOT_TOKEN}/sendMessage"
         response = _sync_http_client.post(
             url,
-            json={
+            content=json_codec.dumps_bytes({
                 "chat_id": Config.LOGS_GROUP_ID,
                 "text": message,
                 "parse_mode": "HTML"
-            }
+            }),
+            headers=json_codec.JSON_HEADERS,
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = json_codec.loads(response.content)
             return data.get("ok", False)
         return False
     except Exception:
@@ -90,15 +97,16 @@ async def send_to_logs_group(message: str) -> bool:
         url = f"https://api.telegram.org/bot{Config.BOT_TOKEN}/sendMessage"
         response = await _http_client.post(
             url,
-            json={
+            content=json_codec.dumps_bytes({
                 "chat_id": Config.LOGS_GROUP_ID,
                 "text": message,
                 "parse_mode": "HTML"
-            }
+            }),
+            headers=json_codec.JSON_HEADERS,
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = json_codec.loads(response.content)
             if data.get("ok"):
                 logger.debug(f"Сообщение успешно отправлено в группу {Config.LOGS_GROUP_ID}")
                 return True
@@ -116,19 +124,171 @@ async def send_to_logs_group(message: str) -> bool:
 
 
 class TelegramGroupHandler(logging.Handler):
-    """Кастомный handler для отправки ошибок в Telegram группу"""
+    """
+    Кастомный handler для отправки ошибок в Telegram группу.
+    
+    emit() только кладёт отформатированную запись в очередь и никогда не блокирует
+    вызывающий код. Один фоновый поток собирает записи пачками, схлопывает
+    одинаковые ошибки со счётчиком повторов, склеивает их в сообщения не длиннее
+    лимита Telegram и отправляет не чаще max_per_minute сообщений в минуту.
+    """
+    
+    # Лимит Telegram — 4096 символов, оставляем запас на заголовок и разметку
+    MESSAGE_LIMIT = 3900
+    # Сколько разных ошибок держать, пока действует ограничение частоты
+    MAX_PENDING = 200
+    
+    def __init__(
+        self,
+        level: int = logging.ERROR,
+        batch_interval: float = 2.0,
+        max_per_minute: int = 20,
+        queue_size: int = 1000,
+    ):
+        super().__init__(level)
+        self.batch_interval = batch_interval
+        self.max_per_minute = max_per_minute
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        # Ошибки, ожидающие отправки: текст -> число повторов (в порядке появления)
+        self._pending: "OrderedDict[str, int]" = OrderedDict()
+        self._sent_at: Deque[float] = deque()
+        # Записи, потерянные из-за переполнения очереди или буфера; растёт и в потоках,
+        # пишущих логи (emit), и в потоке отправки — поэтому под замком
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
     
     def emit(self, record: logging.LogRecord):
-        """Отправляет только ERROR и CRITICAL логи в группу"""
-        if record.levelno >= logging.ERROR:
+        """Кладёт ERROR и CRITICAL логи в очередь на отправку в группу"""
+        if record.levelno < logging.ERROR:
+            return
+        try:
+            message = self.format(record)
+            self._ensure_sender()
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self._count_dropped()
+        except Exception:
+            # Игнорируем ошибки при отправке логов, чтобы не создавать бесконечный цикл
+            pass
+    
+    def _ensure_sender(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="telegram-log-sender", daemon=True
+                )
+                self._thread.start()
+    
+    def _collect(self, timeout: float) -> None:
+        """Забирает из очереди всё, что придёт за timeout секунд, и схлопывает дубликаты"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
             try:
-                message = self.format(record)
-                # Отправляем в отдельном потоке, чтобы не блокировать основной поток
-                def send_in_thread():
-                    send_to_logs_group_sync(f"❌ <b>Ошибка в боте:</b>\n\n<code>{message}</code>")
-                
-                thread = threading.Thread(target=send_in_thread, daemon=True)
-                thread.start()
-            except Exception:
-                # Игнорируем ошибки при отправке логов, чтобы не создавать бесконечный цикл
-                pass
+                if remaining > 0:
+                    message = self._queue.get(timeout=remaining)
+                else:
+                    message = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._add_pending(message)
+    
+    def _add_pending(self, message: str) -> None:
+        """Добавляет запись в буфер: повтор увеличивает счётчик, сверх MAX_PENDING — пропуск"""
+        if message in self._pending:
+            self._pending[message] += 1
+        elif len(self._pending) < self.MAX_PENDING:
+            self._pending[message] = 1
+        else:
+            self._count_dropped()
+    
+    def _count_dropped(self) -> None:
+        with self._dropped_lock:
+            self.dropped += 1
+    
+    def _can_send(self) -> bool:
+        now = time.monotonic()
+        while self._sent_at and now - self._sent_at[0] >= 60:
+            self._sent_at.popleft()
+        return len(self._sent_at) < self.max_per_minute
+    
+    def _build_messages(self, dropped: int = 0) -> List[Tuple[str, List[str]]]:
+        """
+        Склеивает ожидающие ошибки в сообщения в пределах лимита Telegram;
+        dropped — сколько записей пропущено (пишется в последнее сообщение).
+        Возвращает пары (HTML сообщения, ошибки, вошедшие в него).
+        Лимит считается по видимому тексту: HTML-сущности Telegram считает за один символ.
+        """
+        header = "❌ <b>Ошибки в боте:</b>\n\n"
+        header_len = len("❌ Ошибки в боте:\n\n")
+        max_entry_len = self.MESSAGE_LIMIT - header_len - 50
+        
+        messages: List[Tuple[str, List[str]]] = []
+        parts: List[str] = []
+        keys: List[str] = []
+        length = header_len
+        for message, count in self._pending.items():
+            text = message if len(message) <= max_entry_len else message[: max_entry_len - 1] + "…"
+            entry = f"<code>{escape(text)}</code>"
+            entry_len = len(text) + 2
+            if count > 1:
+                suffix = f"повторилось {count} раз"
+                entry += f"\n<i>{suffix}</i>"
+                entry_len += len(suffix) + 1
+            if parts and length + entry_len > self.MESSAGE_LIMIT:
+                messages.append((header + "\n\n".join(parts), keys))
+                parts, keys, length = [], [], header_len
+            parts.append(entry)
+            keys.append(message)
+            length += entry_len
+        if parts:
+            if dropped:
+                parts.append(f"<i>⚠️ Пропущено записей из-за переполнения: {dropped}</i>")
+            messages.append((header + "\n\n".join(parts), keys))
+        return messages
+    
+    def _flush(self) -> None:
+        """Отправляет накопленное, если позволяет ограничение частоты"""
+        if not self._pending:
+            return
+        with self._dropped_lock:
+            dropped = self.dropped
+        for message, keys in self._build_messages(dropped):
+            if not self._can_send():
+                # Лимит исчерпан — остальное ждёт следующего окна, счётчики повторов продолжат расти
+                return
+            send_to_logs_group_sync(message)
+            self._sent_at.append(time.monotonic())
+            for key in keys:
+                del self._pending[key]
+        # Пропуски, случившиеся во время отправки, попадут в следующее сообщение
+        with self._dropped_lock:
+            self.dropped -= dropped
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Ждём первую запись, затем добираем пачку за batch_interval
+                message = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._flush()
+                continue
+            self._add_pending(message)
+            self._collect(self.batch_interval)
+            self._flush()
+        # При остановке забираем остаток очереди и отправляем последний раз
+        self._collect(0)
+        self._flush()
+    
+    def close(self):
+        """Останавливает фоновый поток, отправив накопленные ошибки"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+        super().close()
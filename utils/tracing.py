@@ -0,0 +1,221 @@
+"""
+Трассировка обработки обновлений: дерево span'ов (диспетчер, обработчик,
+запросы к БД, запросы к Bot API) для каждого обновления.
+
+Текущий span хранится в ContextVar, поэтому вложенность сохраняется и в
+задачах, запущенных из обработчика (asyncio копирует контекст). Span'ы
+записываются для каждого обновления — это несколько маленьких объектов, — а на
+диск попадают только:
+- медленные обновления (дольше TRACE_SLOW_THRESHOLD_MS) — всегда и целиком;
+- случайная выборка остальных с вероятностью TRACE_SAMPLE_RATE.
+Формат файла — JSONL, одна трасса на строку.
+
+Вызовы, которые закончились уже после ответа на обновление (фоновые
+edit_text из reply_concurrently), в записанную трассу не попадают.
+Строка трассы сериализуется сразу, а в файл дописывается в отдельном потоке
+(asyncio.to_thread), чтобы запись на диск не останавливала event loop.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_SQL_SPACES = re.compile(r"\s+")
+SQL_ATTR_LIMIT = 300
+
+
+class Span:
+    """Участок работы: имя, время начала и конца, атрибуты и вложенные span'ы"""
+
+    __slots__ = ("name", "started", "finished", "attrs", "children", "error")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.attrs = attrs or {}
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        attrs = dict(self.attrs)
+        sql = attrs.get("sql")
+        if isinstance(sql, str):
+            # Запрос нормализуется только при записи, а не на горячем пути
+            attrs["sql"] = _SQL_SPACES.sub(" ", sql).strip()[:SQL_ATTR_LIMIT]
+        result: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.finished is None:
+            result["unfinished"] = True
+        if attrs:
+            result["attrs"] = attrs
+        if self.error:
+            result["error"] = self.error
+        if self.children:
+            result["children"] = [child.to_dict(origin) for child in self.children]
+        return result
+
+
+class _NullSpan:
+    """Заглушка вне трассы: span() ничего не записывает"""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Any]:
+    """
+    Вложенный span внутри текущей трассы; вне трассы — NULL_SPAN без затрат.
+
+        with span("db.fetch", sql=query) as s:
+            s.set("rows", len(rows))
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NULL_SPAN
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+class Tracer:
+    """Корневые span'ы обновлений и запись медленных/выбранных трасс в JSONL"""
+
+    def __init__(self, path: str, slow_threshold_ms: float, sample_rate: float):
+        self.path = path
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self._ids = count(1)
+        # Метрики
+        self.traces = 0
+        self.slow = 0
+        self.sampled = 0
+        self.write_errors = 0
+        self._writes: set = set()
+
+    @contextmanager
+    def trace(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """Корневой span обновления; по завершении решает, записывать ли трассу"""
+        root = Span(name, attrs)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.finish()
+            _current_span.reset(token)
+            self._finish(root)
+
+    def _finish(self, root: Span) -> None:
+        self.traces += 1
+        if root.duration >= self.slow_threshold:
+            self.slow += 1
+            self._write(root, "slow")
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            self.sampled += 1
+            self._write(root, "sampled")
+
+    def _write(self, root: Span, reason: str) -> None:
+        record = {
+            "trace_id": f"{os.getpid()}-{next(self._ids)}",
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "reason": reason,
+            "duration_ms": round(root.duration * 1000, 3),
+            "root": root.to_dict(root.started),
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop (скрипты, тесты) блокировать некого — пишем сразу
+            self._append_logged(line)
+            return
+        task = asyncio.create_task(self._append_in_thread(line))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _append_in_thread(self, line: str) -> None:
+        try:
+            await asyncio.to_thread(self._append, line)
+        except OSError as e:
+            self._write_failed(e)
+
+    def _append_logged(self, line: str) -> None:
+        try:
+            self._append(line)
+        except OSError as e:
+            self._write_failed(e)
+
+    def _append(self, line: str) -> None:
+        # Строка пишется одним вызовом write: медленных трасс мало, файл не держим открытым
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line)
+
+    def _write_failed(self, error: OSError) -> None:
+        self.write_errors += 1
+        logger.error(f"Не удалось записать трассу в {self.path}: {error}")
+
+    async def drain(self, timeout: float = 5.0) -> None:
+        """Дожидается записи трасс, ещё не дописанных в файл (при остановке бота)"""
+        if not self._writes:
+            return
+        await asyncio.wait(set(self._writes), timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "traces": self.traces,
+            "slow": self.slow,
+            "sampled": self.sampled,
+            "write_errors": self.write_errors,
+        }
+
+
+tracer = Tracer(
+    Config.TRACE_FILE,
+    slow_threshold_ms=Config.TRACE_SLOW_THRESHOLD_MS,
+    sample_rate=Config.TRACE_SAMPLE_RATE,
+)
@@ -0,0 +1,161 @@
+"""
+Режим приёма webhook через очередь: Telegram получает ответ сразу, а обновления
+обрабатывают N воркеров из ограниченных очередей.
+
+Медленные обработчики (БД, отправка в группу логов) больше не держат соединение
+Telegram открытым, поэтому он не присылает те же обновления повторно. Чтобы
+обновления одного чата обрабатывались по порядку, чат всегда попадает в одну и
+ту же очередь (chat_id % workers), которую разбирает один воркер.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+
+logger = logging.getLogger(__name__)
+
+
+def extract_chat_id(update: Dict[str, Any]) -> int:
+    """Определяет чат обновления по сырому JSON (без разбора в модели aiogram)"""
+    for key, value in update.items():
+        if key == "update_id" or not isinstance(value, dict):
+            continue
+        chat = value.get("chat")
+        if chat is None and isinstance(value.get("message"), dict):
+            chat = value["message"].get("chat")
+        if chat is not None:
+            return int(chat.get("id", 0))
+        sender = value.get("from") or value.get("user")
+        if sender is not None:
+            return int(sender.get("id", 0))
+    return 0
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик webhook, который подтверждает обновление сразу и кладёт его в очередь.
+    Если очередь чата переполнена, отвечает 503 — Telegram повторит доставку позже.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: Optional[str] = None,
+        workers: int = 4,
+        queue_size: int = 1000,
+        **data: Any,
+    ):
+        super().__init__(dispatcher=dispatcher, bot=bot, secret_token=secret_token, **data)
+        self.workers_count = max(1, workers)
+        self.shard_size = max(1, queue_size // self.workers_count)
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+        # Метрики
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self._lag_total = 0.0
+        self._lag_samples = 0
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        app.on_startup.append(self._handle_startup)
+        super().register(app, path=path, **kwargs)
+
+    async def _handle_startup(self, app: web.Application) -> None:
+        self.start()
+
+    def start(self) -> None:
+        """Запускает воркеры (по одному на очередь)"""
+        if self._workers:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.shard_size) for _ in range(self.workers_count)]
+        self._workers = [
+            asyncio.create_task(self._worker(q), name=f"webhook-worker-{i}")
+            for i, q in enumerate(self._queues)
+        ]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+        if not self._workers:
+            self.start()
+
+        update = await request.json(loads=bot.session.json_loads)
+        queue = self._queues[extract_chat_id(update) % self.workers_count]
+        try:
+            queue.put_nowait((bot, update, time.monotonic()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return web.Response(status=503, text="Busy")
+        self.accepted += 1
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    __call__ = handle
+
+    async def _process(self, bot: Bot, update: Dict[str, Any]) -> None:
+        result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+        if isinstance(result, TelegramMethod):
+            await self.dispatcher.silent_call_request(bot=bot, result=result)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            bot, update, enqueued_at = await queue.get()
+            lag = time.monotonic() - enqueued_at
+            self.lag_last = lag
+            if lag > self.lag_max:
+                self.lag_max = lag
+            self._lag_total += lag
+            self._lag_samples += 1
+            try:
+                await self._process(bot, update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Ошибка обработки обновления {update.get('update_id')}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    @property
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def stats(self) -> Dict[str, Any]:
+        """Глубина очередей и задержка обработки (от приёма до начала обработки)"""
+        return {
+            "workers": self.workers_count,
+            "depth": self.depth,
+            "max_shard_depth": max((q.qsize() for q in self._queues), default=0),
+            "capacity": self.shard_size * self.workers_count,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "lag_last_ms": round(self.lag_last * 1000, 2),
+            "lag_max_ms": round(self.lag_max * 1000, 2),
+            "lag_avg_ms": round(self._lag_total / self._lag_samples * 1000, 2) if self._lag_samples else 0.0,
+        }
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Дорабатывает очередь (не дольше timeout), останавливает воркеры и закрывает сессию бота"""
+        if self._workers:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(q.join() for q in self._queues)), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Не дождались обработки {self.depth} обновлений при остановке")
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        await super().close()
@@ -0,0 +1,153 @@
+"""
+Ответы на webhook без отдельного запроса к Bot API (webhook-reply).
+
+Telegram позволяет выполнить один метод Bot API прямо в теле ответа на
+webhook. Для статичных разделов (информация, дресс-код, дисклеймер, главное
+меню) тело ответа сериализуется заранее, при старте, и на каждый запрос
+подставляется только chat_id (и при необходимости текст).
+"""
+from typing import Any, Optional
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.methods import EditMessageText, SendMessage
+from aiogram.types import Message
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from pydantic import PrivateAttr
+
+from utils.json_codec import dumps as _dumps
+from utils.message_edit import edit_cache, prepare_edit_text
+
+
+class StaticSendMessage(SendMessage):
+    """sendMessage с заранее собранным телом ответа на webhook"""
+
+    _static_body: Optional[bytes] = PrivateAttr(default=None)
+
+    @property
+    def static_body(self) -> Optional[bytes]:
+        return self._static_body
+
+
+class StaticReply:
+    """Неизменяемый ответ sendMessage, сериализованный один раз при старте"""
+
+    __slots__ = (
+        "text",
+        "reply_markup",
+        "parse_mode",
+        "disable_web_page_preview",
+        "_options",
+        "_text_json",
+        "_tail_json",
+        "_edit_fingerprint",
+    )
+
+    def __init__(
+        self,
+        text: Optional[str],
+        reply_markup: Optional[Any] = None,
+        parse_mode: Optional[str] = None,
+        disable_web_page_preview: Optional[bool] = None,
+    ):
+        """text=None — текст подставляется при каждом ответе (например, приветствие с именем)"""
+        options = {}
+        if parse_mode is not None:
+            options["parse_mode"] = parse_mode
+        if disable_web_page_preview is not None:
+            options["disable_web_page_preview"] = disable_web_page_preview
+
+        fields = dict(options)
+        if reply_markup is not None:
+            fields["reply_markup"] = reply_markup.model_dump(mode="json", exclude_none=True)
+
+        init = object.__setattr__
+        init(self, "text", text)
+        init(self, "reply_markup", reply_markup)
+        init(self, "parse_mode", parse_mode)
+        init(self, "disable_web_page_preview", disable_web_page_preview)
+        init(self, "_options", options)
+        # Хвост объекта после текста: ',"parse_mode":...}' или просто '}'
+        tail_json = (("," + _dumps(fields)[1:]) if fields else "}").encode("utf-8")
+        init(self, "_tail_json", tail_json)
+        # Для постоянного текста всё после chat_id уже готово в байтах
+        init(
+            self,
+            "_text_json",
+            b',"text":' + _dumps(text).encode("utf-8") + tail_json if text is not None else None,
+        )
+        # Отпечаток для пропуска одинаковых редактирований (utils/message_edit.py)
+        init(
+            self,
+            "_edit_fingerprint",
+            edit_cache.fingerprint(text, reply_markup, **options) if text is not None else None,
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("StaticReply неизменяем")
+
+    def body(self, chat_id: int, text: Optional[str] = None) -> bytes:
+        """Готовое JSON-тело ответа на webhook для конкретного чата"""
+        if text is None:
+            rest = self._text_json
+        else:
+            rest = b',"text":' + _dumps(text).encode("utf-8") + self._tail_json
+        return b'{"method":"sendMessage","chat_id":%d%s' % (int(chat_id), rest)
+
+    def answer(self, message: Message, text: Optional[str] = None) -> StaticSendMessage:
+        """
+        Метод для возврата из обработчика: return REPLY.answer(message).
+        В режиме webhook-reply уходит в теле ответа, иначе aiogram отправит его сам.
+        """
+        if text is None and self.text is None:
+            raise ValueError("Для этого ответа текст нужно передать явно")
+        # Поля уже проверены при сборке ответа, поэтому модель создаётся без валидации
+        method = StaticSendMessage.model_construct(
+            chat_id=message.chat.id,
+            text=self.text if text is None else text,
+            reply_markup=self.reply_markup,
+            **self._options,
+        )
+        method._static_body = self.body(message.chat.id, text)
+        return method.as_(message.bot)
+
+    def edit(self, message: Message) -> Optional[EditMessageText]:
+        """
+        Редактирование сообщения в этот ответ (для inline-кнопок).
+        None, если сообщение уже показывает этот ответ — см. prepare_edit_text().
+        """
+        if self.text is None:
+            raise ValueError("Редактировать можно только в ответ с постоянным текстом")
+        return prepare_edit_text(
+            message,
+            self.text,
+            reply_markup=self.reply_markup,
+            fingerprint=self._edit_fingerprint,
+            **self._options,
+        )
+
+
+class WebhookReplyRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик webhook, который отдаёт заранее сериализованные ответы как есть,
+    а остальные методы — стандартным multipart-ответом aiogram.
+    """
+
+    def __init__(self, dispatcher, bot: Bot, secret_token: Optional[str] = None, **data: Any):
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=False,
+            secret_token=secret_token,
+            **data,
+        )
+
+    async def _handle_request(self, bot: Bot, request: web.Request) -> web.Response:
+        result = await self.dispatcher.feed_webhook_update(
+            bot,
+            await request.json(loads=bot.session.json_loads),
+            **self.data,
+        )
+        if isinstance(result, StaticSendMessage) and result.static_body is not None:
+            return web.Response(body=result.static_body, content_type="application/json")
+        return web.Response(body=self._build_response_writer(bot=bot, result=result))